@@ -3,14 +3,17 @@ SFSU CS Chatbot - Enhanced Backend API
 Features: RAG, Web Search, Professor Correction Workflow, Analytics
 """
 
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime, timedelta
 import os
+import json
 import time
+import asyncio
 from dotenv import load_dotenv
 
 # Import custom modules
@@ -21,9 +24,10 @@ from services.dual_source_rag import DualSourceRAG  # NEW: Dual-source retrieval
 from services.context_merger import ContextMerger  # NEW: Intelligent context merging
 from services.auth import AuthService
 from services.database import DatabaseService
-from services.cache import ResponseCache
+from services.cache import ResponseCache, MemoryCacheBackend, SQLiteCacheBackend
 from services.email import EmailService
-from services.request_queue import RequestQueueService
+from services.single_flight import SingleFlight
+from services.request_queue import AdmissionController, ServerBusy, PRIORITY_PROFESSOR, PRIORITY_STUDENT
 
 # Load environment
 load_dotenv()
@@ -52,17 +56,38 @@ app.add_middleware(
 # Security
 security = HTTPBearer()
 
-# Initialize services
+# Initialize services (one DatabaseService = one embedding model + one Supabase client per worker)
+db_service = DatabaseService()
+web_search_service = WebSearchService()
 llm_service = LLMService()  # Using Groq with dual-source zero-hallucination prompts
-dual_source_rag = DualSourceRAG()  # NEW: Parallel retrieval from both sources
+dual_source_rag = DualSourceRAG(db_service=db_service, web_search=web_search_service)  # NEW: Parallel retrieval from both sources
 context_merger = ContextMerger()  # NEW: Intelligent context merging
-rag_service = RAGService()  # Legacy RAG (kept for verified facts)
-web_search_service = WebSearchService()
+rag_service = RAGService(db_service=db_service)  # Legacy RAG (kept for verified facts)
 auth_service = AuthService()
-db_service = DatabaseService()
-response_cache = ResponseCache(max_size=100, ttl_seconds=3600)  # Cache 100 responses for 1 hour
+# RESPONSE_CACHE_BACKEND=sqlite shares one on-disk cache across workers and restarts
+if os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower() == "sqlite":
+    cache_backend = SQLiteCacheBackend(
+        path=os.getenv("RESPONSE_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "responses.sqlite3")),
+        max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+    )
+else:
+    cache_backend = MemoryCacheBackend(max_size=100)
+
+response_cache = ResponseCache(
+    max_size=100,
+    ttl_seconds=3600,  # Cache 100 responses for 1 hour
+    backend=cache_backend,
+    embedder=db_service.embeddings,
+    semantic_threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD")) if os.getenv("SEMANTIC_CACHE_THRESHOLD") else None
+)
 email_service = EmailService()
-request_queue = RequestQueueService(max_requests_per_minute=14)  # Groq free tier: 14 req/min
+# Bounded LLM concurrency: pool-wide cap of N generations x available Ollama backends, professors first, shed when the wait is too long
+llm_admission = AdmissionController(
+    max_in_flight_per_backend=int(os.getenv("LLM_MAX_IN_FLIGHT_PER_BACKEND", "2")),
+    backend_count=llm_service.pool.available_count,
+    max_wait_seconds=float(os.getenv("LLM_ADMISSION_MAX_WAIT_SECONDS", "20"))
+)
+chat_flights = SingleFlight("chat")  # Coalesces identical in-flight /chat questions
 
 # ============================================================================
 # REQUEST/RESPONSE MODELS
@@ -210,6 +235,199 @@ def enhance_query_with_sfsu_context(query: str) -> str:
     # Examples: "Tell me about CS courses" -> "Tell me about CS courses in SFSU"
     return f"{query_stripped} in SFSU?"
 
+class ClientDisconnected(Exception):
+    """Raised when the HTTP client goes away while we are still generating."""
+    pass
+
+async def run_until_disconnected(http_request: Optional[Request], coro, poll_interval: float = 0.5):
+    """
+    Await a coroutine, cancelling it if the HTTP client disconnects first.
+    Frees the Ollama slot instead of finishing a generation nobody will read.
+
+    Args:
+        http_request: Incoming Starlette request (None disables the check)
+        coro: Coroutine to run (e.g. an LLM generation call)
+        poll_interval: Seconds between disconnect checks
+
+    Returns:
+        The coroutine's result
+
+    Raises:
+        ClientDisconnected: If the client disconnected before completion
+    """
+    if http_request is None:
+        return await coro
+
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                task.cancel()
+                raise ClientDisconnected()
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+
+async def run_admitted(priority: int, coro):
+    """
+    Run an LLM coroutine once the admission controller grants a slot.
+
+    Args:
+        priority: PRIORITY_PROFESSOR or PRIORITY_STUDENT
+        coro: Generation coroutine (closed unstarted if the request is shed)
+
+    Raises:
+        ServerBusy: If the request was shed instead of queued
+    """
+    try:
+        async with llm_admission.slot(priority):
+            return await coro
+    finally:
+        coro.close()  # No-op once the coroutine has run
+
+def _busy_response_data(start_time: float) -> Dict:
+    """Fast response payload for a request shed by the admission controller."""
+    return {
+        "response": "I'm currently handling a lot of requests. Please wait a moment and try again!",
+        "source": 'busy',
+        "confidence": 0.0,
+        "response_time_ms": int((time.time() - start_time) * 1000),
+        "sources": []
+    }
+
+# ============================================================================
+# HELPERS: Response Assembly (shared by /chat and /chat/stream)
+# ============================================================================
+
+async def _build_verified_fact_response(request: ChatRequest, verified_result: Dict, start_time: float) -> Dict:
+    """Log, cache and return the response payload for a verified-fact hit."""
+    response_time = int((time.time() - start_time) * 1000)
+
+    # Log the query
+    await db_service.log_chat(
+        query=request.query,
+        response=verified_result['answer'],
+        response_time_ms=response_time,
+        source='verified_fact',
+        confidence_score=verified_result['confidence'],
+        session_id=request.session_id
+    )
+
+    # Generate suggested questions
+    suggested_questions = await _generate_suggested_questions(request.query)
+
+    # PRODUCTION: Remove citation tags
+    clean_verified_response = remove_citations(verified_result['answer'])
+
+    response_data = {
+        "response": clean_verified_response,
+        "source": 'verified_fact',
+        "confidence": verified_result['confidence'],
+        "response_time_ms": response_time,
+        "sources": [{"type": "verified_fact", "verified_by": verified_result.get('verified_by')}],
+        "suggested_questions": suggested_questions
+    }
+
+    # Cache the response
+    await response_cache.set_async(request.query, response_data)
+
+    return response_data
+
+async def _build_dual_source_response(request: ChatRequest, merged: Dict, llm_result: Dict, response_time: int) -> Dict:
+    """Log, cache and return the response payload for a dual-source generation."""
+    # Determine final source label
+    if merged['vector_count'] > 0 and merged['web_count'] > 0:
+        final_source = 'dual_source'
+    elif merged['web_count'] > 0:
+        final_source = 'web_only'
+    elif merged['vector_count'] > 0:
+        final_source = 'vector_only'
+    else:
+        final_source = 'no_sources'
+
+    # Log to database
+    await db_service.log_chat(
+        query=request.query,
+        response=llm_result['response'],
+        response_time_ms=response_time,
+        source=final_source,
+        confidence_score=merged['combined_confidence'],
+        session_id=request.session_id
+    )
+
+    # Prepare source information
+    sources_info = []
+    if merged['vector_count'] > 0:
+        sources_info.append({
+            "type": "vector_database",
+            "count": merged['vector_count'],
+            "confidence": merged['vector_confidence']
+        })
+    if merged['web_count'] > 0:
+        sources_info.append({
+            "type": "web_search",
+            "count": merged['web_count'],
+            "confidence": merged['web_confidence']
+        })
+
+    # Generate suggested questions
+    suggested_questions = await _generate_suggested_questions(request.query)
+
+    # PRODUCTION: Remove citation tags for clean user-facing responses
+    clean_response = remove_citations(llm_result['response'])
+
+    response_data = {
+        "response": clean_response,
+        "source": final_source,
+        "confidence": merged['combined_confidence'],
+        "response_time_ms": response_time,
+        "sources": sources_info,
+        "suggested_questions": suggested_questions
+    }
+
+    # Cache the response
+    await response_cache.set_async(request.query, response_data)
+
+    return response_data
+
+def _split_streamed_citations(buffer: str, started: bool = True, final: bool = False) -> Tuple[str, str]:
+    """
+    Strip [Local]/[Web] tags from streamed text and collapse whitespace the
+    way remove_citations() does for complete responses.
+    A trailing unclosed '[' may be the start of a tag split across tokens,
+    and trailing whitespace may merge with a gap left by the next tag, so
+    both are held back until the next token arrives.
+
+    Args:
+        buffer: Held-back text plus the new token
+        started: Whether text has already been emitted (leading whitespace is dropped if not)
+        final: End of stream - emit everything, without trailing whitespace
+
+    Returns:
+        Tuple of (text safe to emit, text to keep buffering)
+    """
+    import re
+    cut = buffer.rfind('[')
+    if not final and cut != -1 and ']' not in buffer[cut:] and len(buffer) - cut < len('[Local]'):
+        ready, pending = buffer[:cut], buffer[cut:]
+    else:
+        ready, pending = buffer, ''
+    ready = re.sub(r'\[Local\]|\[Web\]', '', ready, flags=re.IGNORECASE)
+    ready = re.sub(r'\s+', ' ', ready)
+    if not started:
+        ready = ready.lstrip()
+    text = ready.rstrip()
+    if not final:
+        pending = ready[len(text):] + pending
+    return text, pending
+
+def _sse_event(payload: Dict) -> str:
+    """Format a payload as a Server-Sent Events message."""
+    return f"data: {json.dumps(payload)}\n\n"
+
 # ============================================================================
 # DEPENDENCY: Verify Professor Token
 # ============================================================================
@@ -242,168 +460,164 @@ async def root():
     }
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request = None):
     """
     Main chat endpoint for students.
     Implements smart routing: verified_facts → RAG → web search
     """
-    start_time = time.time()
-
-    try:
-        # Check cache first (using original query)
-        cached_response = response_cache.get(request.query)
-        if cached_response:
-            print(f"[CACHE HIT] Query: {request.query[:50]}...")
-            return ChatResponse(**cached_response)
-
-        # Enhance query with SFSU context for better web search results
-        enhanced_query = enhance_query_with_sfsu_context(request.query)
-        print(f"[QUERY] Original: {request.query}")
-        print(f"[QUERY] Enhanced: {enhanced_query}")
-
-        # Step 1: Check verified facts (highest priority)
-        verified_result = await rag_service.search_verified_facts(enhanced_query)
-
-        if verified_result and verified_result['confidence'] > 0.75:
-            response_time = int((time.time() - start_time) * 1000)
+    return await _chat(request, http_request, priority=PRIORITY_STUDENT)
 
-            # Log the query
-            await db_service.log_chat(
-                query=request.query,
-                response=verified_result['answer'],
-                response_time_ms=response_time,
-                source='verified_fact',
-                confidence_score=verified_result['confidence'],
-                session_id=request.session_id
-            )
+async def _answer_query(
+    request: ChatRequest,
+    http_request: Optional[Request],
+    priority: int,
+    start_time: float
+) -> Dict:
+    """
+    Retrieval + generation for a /chat request that missed the cache.
 
-            # Generate suggested questions
-            suggested_questions = await _generate_suggested_questions(request.query)
+    Args:
+        request: Chat request
+        http_request: Incoming request for disconnect checks (None when the
+            execution is shared by coalesced callers)
+        priority: LLM admission lane
+        start_time: Request start (time.time())
 
-            # PRODUCTION: Remove citation tags
-            clean_verified_response = remove_citations(verified_result['answer'])
+    Returns:
+        ChatResponse fields (already logged and cached)
+    """
+    # Shed before retrieval if generation could not start in time anyway
+    llm_admission.check(priority)
 
-            response_data = {
-                "response": clean_verified_response,
-                "source": 'verified_fact',
-                "confidence": verified_result['confidence'],
-                "response_time_ms": response_time,
-                "sources": [{"type": "verified_fact", "verified_by": verified_result.get('verified_by')}],
-                "suggested_questions": suggested_questions
-            }
+    # Enhance query with SFSU context for better web search results
+    enhanced_query = enhance_query_with_sfsu_context(request.query)
+    print(f"[QUERY] Original: {request.query}")
+    print(f"[QUERY] Enhanced: {enhanced_query}")
 
-            # Cache the response
-            response_cache.set(request.query, response_data)
+    # Step 1: Check verified facts (highest priority)
+    verified_result = await rag_service.search_verified_facts(enhanced_query)
 
-            return ChatResponse(**response_data)
+    if verified_result and verified_result['confidence'] > 0.75:
+        return await _build_verified_fact_response(request, verified_result, start_time)
 
-        # Step 2: DUAL-SOURCE RETRIEVAL (MANDATORY - both Vector DB + Web Search)
-        print(f"\n[CHAT] Processing query: {enhanced_query}")
-        print(f"[CHAT] DUAL-SOURCE MODE: Retrieving from BOTH Vector DB AND Web Search in parallel")
+    # Step 2: DUAL-SOURCE RETRIEVAL (MANDATORY - both Vector DB + Web Search)
+    print(f"\n[CHAT] Processing query: {enhanced_query}")
+    print(f"[CHAT] DUAL-SOURCE MODE: Retrieving from BOTH Vector DB AND Web Search in parallel")
 
-        # CRITICAL: Retrieve from BOTH sources in parallel
-        dual_results = await dual_source_rag.retrieve_all_sources(enhanced_query)
+    # CRITICAL: Retrieve from BOTH sources in parallel
+    dual_results = await dual_source_rag.retrieve_all_sources(enhanced_query)
 
-        # Verify both sources were attempted
-        if not dual_results.get('both_sources_used'):
-            print(f"[CHAT] WARNING: Not all sources were used!")
+    # Verify both sources were attempted
+    if not dual_results.get('both_sources_used'):
+        print(f"[CHAT] WARNING: Not all sources were used!")
 
-        # Log retrieval summary
-        print(f"[CHAT] {dual_source_rag.get_source_summary(dual_results)}")
+    # Log retrieval summary
+    print(f"[CHAT] {dual_source_rag.get_source_summary(dual_results)}")
 
-        # Step 3: Intelligently merge contexts from both sources
-        merged = context_merger.merge_contexts(
-            vector_results=dual_results['vector_results'],
-            web_results=dual_results['web_results'],
-            query=enhanced_query
-        )
+    # Step 3: Intelligently merge contexts from both sources
+    # Tokenizes hundreds of sentences; keep it off the event loop
+    merged = await asyncio.to_thread(
+        context_merger.merge_contexts,
+        vector_results=dual_results['vector_results'],
+        web_results=dual_results['web_results'],
+        query=enhanced_query
+    )
 
-        print(f"[CHAT] Context merged: {merged['total_chars']} chars "
-              f"(Vector: {merged['vector_count']}, Web: {merged['web_count']})")
+    print(f"[CHAT] Context merged: {merged['total_chars']} chars "
+          f"(Vector: {merged['vector_count']}, Web: {merged['web_count']})")
 
-        # Check source diversity
-        has_both = context_merger.ensure_source_diversity(merged)
-        if not has_both:
-            print(f"[CHAT] WARNING: Only one source has results - dual-source requirement not fully met")
+    # Check source diversity
+    has_both = context_merger.ensure_source_diversity(merged)
+    if not has_both:
+        print(f"[CHAT] WARNING: Only one source has results - dual-source requirement not fully met")
 
-        # Step 4: Generate response with ZERO hallucination tolerance
-        print(f"[CHAT] Generating response with temperature 0.0 and mandatory citations...")
-        llm_result = await llm_service.generate_dual_source_response(
+    # Step 4: Generate response with ZERO hallucination tolerance
+    print(f"[CHAT] Generating response with temperature 0.0 and mandatory citations...")
+    llm_result = await run_until_disconnected(
+        http_request,
+        run_admitted(priority, llm_service.generate_dual_source_response(
             query=enhanced_query,
             combined_context=merged['combined_context'],
             conversation_history=request.conversation_history
-        )
+        ))
+    )
 
-        response_time = int((time.time() - start_time) * 1000)
+    response_time = int((time.time() - start_time) * 1000)
 
-        # Log validation results
-        if not llm_result.get('validated'):
-            print(f"[CHAT] WARNING: Response validation failed!")
-            print(f"[CHAT] Warnings: {llm_result.get('validation_warnings', [])}")
+    # Log validation results
+    if not llm_result.get('validated'):
+        print(f"[CHAT] WARNING: Response validation failed!")
+        print(f"[CHAT] Warnings: {llm_result.get('validation_warnings', [])}")
 
-        if not llm_result.get('has_citations'):
-            print(f"[CHAT] WARNING: Response has no source citations!")
+    if not llm_result.get('has_citations'):
+        print(f"[CHAT] WARNING: Response has no source citations!")
 
-        print(f"[CHAT] Citations found: {llm_result.get('citation_count', 0)}")
+    print(f"[CHAT] Citations found: {llm_result.get('citation_count', 0)}")
 
-        # Determine final source label
-        if merged['vector_count'] > 0 and merged['web_count'] > 0:
-            final_source = 'dual_source'
-        elif merged['web_count'] > 0:
-            final_source = 'web_only'
-        elif merged['vector_count'] > 0:
-            final_source = 'vector_only'
-        else:
-            final_source = 'no_sources'
+    response_data = await _build_dual_source_response(request, merged, llm_result, response_time)
 
-        # Log to database
-        await db_service.log_chat(
-            query=request.query,
-            response=llm_result['response'],
-            response_time_ms=response_time,
-            source=final_source,
-            confidence_score=merged['combined_confidence'],
-            session_id=request.session_id
-        )
+    print(f"[CHAT] [OK] Dual-source response generated in {response_time}ms")
+    print(f"[CHAT] Validation: {llm_result.get('validated')}, Citations: {llm_result.get('citation_count', 0)}\n")
 
-        # Prepare source information
-        sources_info = []
-        if merged['vector_count'] > 0:
-            sources_info.append({
-                "type": "vector_database",
-                "count": merged['vector_count'],
-                "confidence": merged['vector_confidence']
-            })
-        if merged['web_count'] > 0:
-            sources_info.append({
-                "type": "web_search",
-                "count": merged['web_count'],
-                "confidence": merged['web_confidence']
-            })
+    return response_data
 
-        # Generate suggested questions
-        suggested_questions = await _generate_suggested_questions(request.query)
+async def _log_coalesced_response(request: ChatRequest, response_data: Dict, start_time: float) -> Dict:
+    """Log a response that was shared from another caller's in-flight execution."""
+    response_data = {**response_data, "response_time_ms": int((time.time() - start_time) * 1000)}
 
-        # PRODUCTION: Remove citation tags for clean user-facing responses
-        clean_response = remove_citations(llm_result['response'])
+    await db_service.log_chat(
+        query=request.query,
+        response=response_data['response'],
+        response_time_ms=response_data['response_time_ms'],
+        source=response_data['source'],
+        confidence_score=response_data['confidence'],
+        session_id=request.session_id
+    )
 
-        response_data = {
-            "response": clean_response,
-            "source": final_source,
-            "confidence": merged['combined_confidence'],
-            "response_time_ms": response_time,
-            "sources": sources_info,
-            "suggested_questions": suggested_questions
-        }
+    print(f"[CHAT] Coalesced with in-flight request, answered in {response_data['response_time_ms']}ms")
+    return response_data
 
-        # Cache the response
-        response_cache.set(request.query, response_data)
+async def _chat(request: ChatRequest, http_request: Optional[Request], priority: int) -> ChatResponse:
+    """Shared /chat pipeline; priority selects the LLM admission lane."""
+    start_time = time.time()
 
-        print(f"[CHAT] [OK] Dual-source response generated in {response_time}ms")
-        print(f"[CHAT] Validation: {llm_result.get('validated')}, Citations: {llm_result.get('citation_count', 0)}\n")
+    try:
+        # Check cache first (using original query)
+        cached_response = await response_cache.lookup(request.query)
+        if cached_response:
+            print(f"[CACHE HIT] Query: {request.query[:50]}...")
+            return ChatResponse(**cached_response)
+
+        if request.conversation_history:
+            response_data = await _answer_query(request, http_request, priority, start_time)
+        else:
+            # Identical concurrent questions share one retrieval + generation (and then the cache)
+            response_data, shared = await run_until_disconnected(
+                http_request,
+                chat_flights.do(
+                    f"{priority}:{' '.join(request.query.lower().split())}",
+                    lambda: _answer_query(request, None, priority, start_time)
+                )
+            )
+            if shared:
+                response_data = await _log_coalesced_response(request, response_data, start_time)
 
         return ChatResponse(**response_data)
 
+    except ServerBusy as e:
+        print(f"[CHAT] Busy - request shed (estimated wait {e.estimated_wait:.1f}s)")
+        return ChatResponse(**_busy_response_data(start_time))
+
+    except ClientDisconnected:
+        print(f"[CHAT] Client disconnected - generation cancelled after {int((time.time() - start_time) * 1000)}ms")
+        return ChatResponse(
+            response="",
+            source='cancelled',
+            confidence=0.0,
+            response_time_ms=int((time.time() - start_time) * 1000),
+            sources=[]
+        )
+
     except Exception as e:
         error_msg = str(e)
 
@@ -447,6 +661,111 @@ async def chat(request: ChatRequest):
             sources=[]
         )
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming variant of /chat using Server-Sent Events.
+
+    Emits {"type": "token", "content": ...} events as the model generates
+    (with DeepSeek <think> spans suppressed), then a single
+    {"type": "done", ...} event carrying the same fields as ChatResponse.
+    The final response may differ from the streamed tokens if the
+    relevance check replaced it, so clients should render "done" as final.
+    """
+    async def event_stream():
+        start_time = time.time()
+
+        try:
+            # Check cache first (using original query)
+            cached_response = await response_cache.lookup(request.query)
+            if cached_response:
+                print(f"[CACHE HIT] Query: {request.query[:50]}...")
+                yield _sse_event({"type": "done", **cached_response})
+                return
+
+            llm_admission.check(PRIORITY_STUDENT)
+
+            enhanced_query = enhance_query_with_sfsu_context(request.query)
+            print(f"[STREAM] Original: {request.query}")
+            print(f"[STREAM] Enhanced: {enhanced_query}")
+
+            # Step 1: Check verified facts (highest priority)
+            verified_result = await rag_service.search_verified_facts(enhanced_query)
+
+            if verified_result and verified_result['confidence'] > 0.75:
+                response_data = await _build_verified_fact_response(request, verified_result, start_time)
+                yield _sse_event({"type": "done", **response_data})
+                return
+
+            # Step 2: Dual-source retrieval + merge
+            dual_results = await dual_source_rag.retrieve_all_sources(enhanced_query)
+            print(f"[STREAM] {dual_source_rag.get_source_summary(dual_results)}")
+
+            merged = await asyncio.to_thread(
+                context_merger.merge_contexts,
+                vector_results=dual_results['vector_results'],
+                web_results=dual_results['web_results'],
+                query=enhanced_query
+            )
+
+            # Step 3: Stream generation
+            llm_result = None
+            first_token_ms = None
+            pending = ''
+            streamed = False  # Whether any token has been sent yet
+            async with llm_admission.slot(PRIORITY_STUDENT):
+                async for event in llm_service.stream_dual_source_response(
+                    query=enhanced_query,
+                    combined_context=merged['combined_context'],
+                    conversation_history=request.conversation_history
+                ):
+                    if event['type'] == 'token':
+                        if first_token_ms is None:
+                            first_token_ms = int((time.time() - start_time) * 1000)
+                            print(f"[STREAM] First token after {first_token_ms}ms")
+                        ready, pending = _split_streamed_citations(pending + event['content'], started=streamed)
+                        if ready:
+                            streamed = True
+                            yield _sse_event({"type": "token", "content": ready})
+                    elif event['type'] == 'done':
+                        llm_result = event['result']
+
+            ready, _ = _split_streamed_citations(pending, started=streamed, final=True)
+            if ready:
+                yield _sse_event({"type": "token", "content": ready})
+
+            response_time = int((time.time() - start_time) * 1000)
+
+            # Step 4: Log + cache once the stream completes
+            response_data = await _build_dual_source_response(request, merged, llm_result, response_time)
+
+            print(f"[STREAM] [OK] Streamed response completed in {response_time}ms")
+            yield _sse_event({"type": "done", **response_data})
+
+        except ServerBusy as e:
+            print(f"[STREAM] Busy - request shed (estimated wait {e.estimated_wait:.1f}s)")
+            yield _sse_event({"type": "done", **_busy_response_data(start_time)})
+
+        except Exception as e:
+            print(f"[ERROR] Chat stream error: {e}")
+            yield _sse_event({
+                "type": "error",
+                "response": "I encountered an error while processing your question. Please try rephrasing your question or try again later.",
+                "source": "error",
+                "confidence": 0.0,
+                "response_time_ms": int((time.time() - start_time) * 1000),
+                "sources": []
+            })
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering (nginx)
+        }
+    )
+
 @app.post("/flag-incorrect")
 async def flag_incorrect(request: FlagIncorrectRequest):
     """Students can flag incorrect responses for professor review."""
@@ -876,6 +1195,21 @@ async def get_stats(professor: dict = Depends(verify_professor)):
         })
     }
 
+@app.get("/professor/performance")
+async def get_performance_stats(professor: dict = Depends(verify_professor)):
+    """Get cache and retrieval performance counters for this worker."""
+    return {
+        "response_cache": await asyncio.to_thread(response_cache.get_stats),  # SQLite backend does I/O
+        "embedding_cache": db_service.embeddings.get_stats(),
+        "web_search_cache": web_search_service.cache.get_stats(),
+        "page_cache": web_search_service.page_cache.get_stats(),
+        "retrieval": dual_source_rag.get_stats(),
+        "reranker": db_service.reranker.get_stats() if db_service.reranker else None,
+        "llm": llm_service.get_stats(),
+        "llm_admission": llm_admission.get_stats(),
+        "chat_coalescing": chat_flights.get_stats()
+    }
+
 @app.get("/professor/trending-questions")
 async def get_trending_questions(
     limit: int = 10,
@@ -941,14 +1275,15 @@ async def get_trending_questions(
 @app.post("/professor/chat", response_model=ChatResponse)
 async def professor_chat(
     request: ChatRequest,
+    http_request: Request,
     professor: dict = Depends(verify_professor)
 ):
     """
     Professors can also chat with the bot.
     Uses same endpoint as students but logs as professor.
     """
-    # Reuse the student chat endpoint but mark as professor
-    response = await chat(request)
+    # Reuse the student chat pipeline, in the professor admission lane
+    response = await _chat(request, http_request, priority=PRIORITY_PROFESSOR)
     return response
 
 # ============================================================================
@@ -1064,6 +1399,9 @@ async def _generate_suggested_questions(query: str, category: Optional[str] = No
 # STARTUP/SHUTDOWN EVENTS
 # ============================================================================
 
+background_tasks: List[asyncio.Task] = []  # Started at startup, cancelled at shutdown
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup."""
@@ -1072,11 +1410,27 @@ async def startup_event():
     print("="*70)
     print(f"[*] Starting SFSU CS Chatbot API (Alli)...")
     print(f"[OK] LLM Service (Ollama - LOCAL, NO RATE LIMITS): {llm_service.is_ready()}")
+    print(f"[OK] Ollama backends: {', '.join(b.url for b in llm_service.pool.backends)} "
+          f"(health check every {llm_service.pool.health_interval:.0f}s)")
+    background_tasks.append(asyncio.create_task(llm_service.run_health_checks()))
+    print(f"[OK] LLM keep_alive: {llm_service.keep_alive}, static prompt prefix: {len(llm_service.dual_source_prefix)} chars")
+    background_tasks.append(asyncio.create_task(llm_service.warmup()))
     print(f"[OK] Dual-Source RAG (MANDATORY both sources): {dual_source_rag.is_ready()}")
     print(f"[OK] Context Merger (Intelligent merging): Initialized")
+    background_tasks.append(asyncio.create_task(context_merger.token_counter.warmup()))
     print(f"[OK] Vector Database (28,541 docs): {db_service.is_ready()}")
     print(f"[OK] Web Search (SerpAPI): {web_search_service.is_ready()}")
     print(f"[OK] RAG Service (Verified facts): {rag_service.is_ready()}")
+    print(f"[OK] Query Embedding Cache: max {db_service.embeddings.max_size} entries")
+    print(f"[OK] Response Cache: {response_cache.backend.get_stats()['backend']} backend, semantic mode {'ON (threshold ' + str(response_cache.semantic_threshold) + ')' if response_cache.semantic_enabled else 'OFF'}")
+    if db_service.local_index_enabled:
+        print(f"[OK] Local Vector Index: {db_service.document_index.size} docs, "
+              f"refresh every {db_service.local_index_refresh_seconds}s")
+        background_tasks.append(asyncio.create_task(db_service.run_local_index_refresh()))
+    if db_service.reranker is not None:
+        print(f"[OK] Reranker: {db_service.reranker.model_name}, top {db_service.reranker.top_k}, "
+              f"{db_service.reranker.time_budget_ms:.0f}ms budget")
+        background_tasks.append(asyncio.create_task(db_service.reranker.warmup()))
 
     print("\n" + "="*70)
     print("ANTI-HALLUCINATION FEATURES ENABLED:")
@@ -1100,6 +1454,13 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown."""
     print("[*] Shutting down SFSU CS Chatbot API...")
+    # Stop background loops before the sessions they use are closed
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    await llm_service.close()
+    await web_search_service.close()
     print("[OK] Dual-source system shutdown complete")
 
 # ============================================================================
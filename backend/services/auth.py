@@ -6,7 +6,8 @@ import os
 from datetime import datetime, timedelta
 from typing import Optional, Dict
 from jose import JWTError, jwt
-from supabase import create_client, Client
+from supabase import Client
+from .resources import get_supabase_client
 
 # JWT settings
 SECRET_KEY = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
@@ -17,14 +18,8 @@ class AuthService:
     """Service for professor authentication - SIMPLIFIED."""
 
     def __init__(self):
-        """Initialize Supabase client."""
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_KEY")
-
-        if not supabase_url or not supabase_key:
-            raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set")
-
-        self.client: Client = create_client(supabase_url, supabase_key)
+        """Initialize with the process-wide Supabase client."""
+        self.client: Client = get_supabase_client()
 
     async def authenticate_professor(self, username_or_email: str, password: str) -> Optional[Dict]:
         """
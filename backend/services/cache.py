@@ -1,38 +1,324 @@
 """
 Response Cache Service - Reduce API calls and avoid rate limits
 Caches chatbot responses for frequently asked questions
+Optional semantic mode matches paraphrases by query-embedding similarity
+Pluggable storage: in-process memory or an on-disk SQLite store shared by
+every uvicorn worker on the host (survives restarts)
 """
 
+import os
+import json
+import asyncio
+import sqlite3
 import hashlib
+import threading
 import time
-from typing import Optional, Dict, Any
-from collections import OrderedDict
+import numpy as np
+from typing import Optional, Dict, Any, List, Tuple
+from collections import OrderedDict, deque
+
+
+class MemoryCacheBackend:
+    """In-process LRU store (per worker, lost on restart)."""
+
+    blocking = False  # Cheap dict operations, safe to call on the event loop
+
+    def __init__(self, max_size: int = 100):
+        """
+        Args:
+            max_size: Maximum number of cached entries
+        """
+        self.cache: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self.max_size = max_size
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return an entry and mark it most recently used."""
+        if key not in self.cache:
+            return None
+        self.cache.move_to_end(key)
+        return self.cache[key]
+
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        """Store an entry, evicting the least recently used one if full."""
+        if len(self.cache) >= self.max_size and key not in self.cache:
+            self.cache.popitem(last=False)
+        self.cache[key] = entry
+        self.cache.move_to_end(key)
+
+    def delete(self, key: str) -> None:
+        self.cache.pop(key, None)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def purge_expired(self, cutoff: float) -> None:
+        """Delete entries created before cutoff."""
+        for key in [key for key, entry in self.cache.items() if entry['timestamp'] < cutoff]:
+            del self.cache[key]
+
+    def embeddings(self, cutoff: float) -> List[Tuple[str, List[float], float]]:
+        """(key, query embedding, created) for semantic matching; expired entries are evicted first."""
+        self.purge_expired(cutoff)
+        return [
+            (key, entry['embedding'], entry['timestamp'])
+            for key, entry in self.cache.items() if entry.get('embedding') is not None
+        ]
+
+    def changed_externally(self) -> bool:
+        """Only this process writes to memory."""
+        return False
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'backend': 'memory', 'entries': len(self.cache), 'max_size': self.max_size}
+
+
+class SQLiteCacheBackend:
+    """
+    On-disk LRU store shared by all workers on a host.
+    WAL mode lets workers read concurrently while one writes.
+    Calls may wait on another worker's write lock, so ResponseCache runs
+    them in a thread (blocking = True).
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024, touch_interval: float = 60.0):
+        """
+        Args:
+            path: SQLite database file
+            max_bytes: Evict least recently used entries beyond this total size
+            touch_interval: Only rewrite an entry's last_access when it is older than this
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                query TEXT,
+                response TEXT NOT NULL,
+                embedding BLOB,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size_bytes INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS response_cache_last_access_idx ON response_cache(last_access)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS response_cache_created_at_idx ON response_cache(created_at)")
+        # Bumped only when entries are added or removed; last_access touches
+        # leave it alone so readers don't invalidate each other's matrices
+        self.conn.execute("CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.conn.execute("INSERT OR IGNORE INTO cache_meta (name, value) VALUES ('generation', 0)")
+
+        self._generation = self._read_generation()
+
+    def _read_generation(self) -> int:
+        return self.conn.execute("SELECT value FROM cache_meta WHERE name = 'generation'").fetchone()[0]
+
+    def _bump_generation(self) -> None:
+        self.conn.execute("UPDATE cache_meta SET value = value + 1 WHERE name = 'generation'")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return an entry and mark it most recently used."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT query, response, embedding, created_at, last_access FROM response_cache WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            # Throttled: a write per read would serialize workers on the WAL lock
+            now = time.time()
+            if now - row[4] >= self.touch_interval:
+                self.conn.execute("UPDATE response_cache SET last_access = ? WHERE key = ?", (now, key))
+
+        query, response, embedding, created_at, _ = row
+        return {
+            'response': json.loads(response),
+            'timestamp': created_at,
+            'query': query,
+            'embedding': np.frombuffer(embedding, dtype=np.float32).tolist() if embedding else None
+        }
+
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        """Store an entry, then evict least recently used entries over max_bytes."""
+        response = json.dumps(entry['response'])
+        embedding = np.asarray(entry['embedding'], dtype=np.float32).tobytes() if entry.get('embedding') is not None else None
+        size_bytes = len(response) + len(entry.get('query') or '') + (len(embedding) if embedding else 0)
+        now = time.time()
+
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, query, response, embedding, created_at, last_access, size_bytes) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, entry.get('query'), response, embedding, entry['timestamp'], now, size_bytes)
+            )
+            self.conn.execute("""
+                DELETE FROM response_cache WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size_bytes) OVER (ORDER BY last_access DESC) AS running_bytes
+                        FROM response_cache
+                    ) WHERE running_bytes > ?
+                )
+            """, (self.max_bytes,))
+            self._bump_generation()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if self.conn.execute("DELETE FROM response_cache WHERE key = ?", (key,)).rowcount:
+                self._bump_generation()
+
+    def clear(self) -> None:
+        with self._lock:
+            if self.conn.execute("DELETE FROM response_cache").rowcount:
+                self._bump_generation()
+
+    def purge_expired(self, cutoff: float) -> None:
+        """Delete entries created before cutoff."""
+        with self._lock:
+            if self.conn.execute("DELETE FROM response_cache WHERE created_at < ?", (cutoff,)).rowcount:
+                self._bump_generation()
+
+    def embeddings(self, cutoff: float) -> List[Tuple[str, List[float], float]]:
+        """(key, query embedding, created) for unexpired entries, for semantic matching."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT key, embedding, created_at FROM response_cache WHERE embedding IS NOT NULL AND created_at >= ?",
+                (cutoff,)
+            ).fetchall()
+        return [(key, np.frombuffer(blob, dtype=np.float32), created_at) for key, blob, created_at in rows]
+
+    def changed_externally(self) -> bool:
+        """Whether entries were added or removed since the last check."""
+        with self._lock:
+            generation = self._read_generation()
+        changed = generation != self._generation
+        self._generation = generation
+        return changed
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, total_bytes = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM response_cache"
+            ).fetchone()
+        return {
+            'backend': 'sqlite',
+            'path': self.path,
+            'entries': entries,
+            'bytes': total_bytes,
+            'max_bytes': self.max_bytes
+        }
 
 
 class ResponseCache:
-    """Simple in-memory cache for chatbot responses."""
+    """Cache for chatbot responses (LRU + TTL over a pluggable backend)."""
 
-    def __init__(self, max_size: int = 100, ttl_seconds: int = 3600):
+    def __init__(
+        self,
+        max_size: int = 100,
+        ttl_seconds: int = 3600,
+        embedder=None,
+        semantic_threshold: Optional[float] = None,
+        backend=None
+    ):
         """
         Initialize response cache.
 
         Args:
-            max_size: Maximum number of cached responses
+            max_size: Maximum number of cached responses (memory backend)
             ttl_seconds: Time-to-live for cached responses (default 1 hour)
+            embedder: EmbeddingService used for semantic matching
+            semantic_threshold: Minimum cosine similarity for a semantic hit
+                (None disables semantic mode)
+            backend: Storage backend (defaults to MemoryCacheBackend(max_size))
         """
-        self.cache: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self.backend = backend if backend is not None else MemoryCacheBackend(max_size)
         self.max_size = max_size
         self.ttl_seconds = ttl_seconds
 
+        # Semantic mode
+        self.embedder = embedder
+        self.semantic_threshold = semantic_threshold
+        self._matrix: Optional[np.ndarray] = None  # Normalized query embeddings, one row per key
+        self._matrix_keys: List[str] = []
+        self._matrix_dirty = True
+        self._matrix_expires_at = float('inf')  # When the oldest row in the matrix expires
+
+        # Stats for monitoring
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._similarities = deque(maxlen=1000)  # Best similarity seen per semantic lookup
+        self.backend_errors = 0  # Storage reads/writes that failed (e.g. SQLite locked)
+
+    @property
+    def semantic_enabled(self) -> bool:
+        """Whether semantic matching is active."""
+        return self.embedder is not None and self.semantic_threshold is not None
+
     def _get_key(self, query: str) -> str:
         """Generate cache key from query."""
         # Normalize query: lowercase, strip whitespace
         normalized = query.lower().strip()
         return hashlib.md5(normalized.encode()).hexdigest()
 
+    async def _run(self, fn, *args):
+        """Call a backend method, off the event loop if the backend does blocking I/O."""
+        if self.backend.blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    def _is_expired(self, cached_data: Dict[str, Any]) -> bool:
+        return time.time() - cached_data['timestamp'] > self.ttl_seconds
+
+    def _get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a live entry (dropping it if expired) and mark it recently used."""
+        cached_data = self.backend.get(key)  # Backend marks it recently used
+
+        if cached_data is None:
+            return None
+
+        # Check if expired
+        if self._is_expired(cached_data):
+            # Remove expired entry
+            self.backend.delete(key)
+            self._matrix_dirty = True
+            return None
+
+        return cached_data
+
+    async def _get_entry_async(self, key: str) -> Optional[Dict[str, Any]]:
+        """_get_entry without blocking the event loop on storage I/O."""
+        cached_data = await self._run(self.backend.get, key)
+
+        if cached_data is None:
+            return None
+
+        if self._is_expired(cached_data):
+            await self._run(self.backend.delete, key)
+            self._matrix_dirty = True
+            return None
+
+        return cached_data
+
     def get(self, query: str) -> Optional[Dict[str, Any]]:
         """
-        Get cached response for a query.
+        Get cached response for a query (exact match only).
 
         Args:
             query: User query
@@ -40,57 +326,190 @@ class ResponseCache:
         Returns:
             Cached response dict or None if not found/expired
         """
-        key = self._get_key(query)
+        cached_data = self._get_entry(self._get_key(query))
 
-        if key not in self.cache:
+        if cached_data is None:
+            self.misses += 1
             return None
 
-        cached_data = self.cache[key]
+        self.exact_hits += 1
+        return cached_data['response']
 
-        # Check if expired
-        if time.time() - cached_data['timestamp'] > self.ttl_seconds:
-            # Remove expired entry
-            del self.cache[key]
-            return None
+    async def lookup(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Get cached response for a query, falling back to the nearest
+        semantically similar cached query when semantic mode is on.
+        Storage errors (e.g. a locked SQLite file) count as a miss.
 
-        # Move to end (LRU)
-        self.cache.move_to_end(key)
+        Args:
+            query: User query
 
-        return cached_data['response']
+        Returns:
+            Cached response dict or None if nothing is close enough
+        """
+        try:
+            cached_data = await self._get_entry_async(self._get_key(query))
+            if cached_data is not None:
+                self.exact_hits += 1
+                return cached_data['response']
+
+            if not self.semantic_enabled:
+                self.misses += 1
+                return None
+
+            query_embedding = await self.embedder.encode_async(query)
+            key, similarity = await self._nearest(query_embedding)
+
+            if key is not None:
+                self._similarities.append(similarity)
+
+                if similarity >= self.semantic_threshold:
+                    cached_data = await self._get_entry_async(key)
+                    if cached_data is not None:
+                        self.semantic_hits += 1
+                        print(f"[CACHE] Semantic hit ({similarity:.3f}): '{query[:50]}' ~ '{cached_data['query'][:50]}'")
+                        return cached_data['response']
+
+        except sqlite3.Error as e:
+            self.backend_errors += 1
+            print(f"[WARNING] Response cache read failed: {e}")
+
+        self.misses += 1
+        return None
+
+    async def _nearest(self, query_embedding: List[float]):
+        """
+        Find the cached query most similar to the given embedding.
+
+        Returns:
+            Tuple of (cache key, cosine similarity), or (None, 0.0) if empty
+        """
+        if (
+            self._matrix_dirty
+            or time.time() >= self._matrix_expires_at
+            or await self._run(self.backend.changed_externally)
+        ):
+            rows = await self._run(self.backend.embeddings, time.time() - self.ttl_seconds)
+            self._rebuild_matrix(rows)
+
+        if self._matrix is None or len(self._matrix_keys) == 0:
+            return None, 0.0
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None, 0.0
+
+        # One vectorized dot product over every cached query
+        scores = self._matrix @ (query / norm)
+        best = int(np.argmax(scores))
+
+        return self._matrix_keys[best], float(scores[best])
+
+    def _rebuild_matrix(self, rows: List[Tuple[str, List[float], float]]) -> None:
+        """Rebuild the normalized embedding matrix from unexpired entries."""
+        keys = [key for key, _, _ in rows]
+
+        # Rebuild again once the oldest row expires, so it never wins a lookup
+        self._matrix_expires_at = min((created for _, _, created in rows), default=float('inf')) + self.ttl_seconds
+
+        if keys:
+            matrix = np.asarray([embedding for _, embedding, _ in rows], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self._matrix = matrix / norms
+        else:
+            self._matrix = None
+
+        self._matrix_keys = keys
+        self._matrix_dirty = False
+
+    def _store(self, key: str, entry: Dict[str, Any]) -> None:
+        # Add/update entry (backend evicts least recently used entries when full)
+        self.backend.set(key, entry)
+        self.backend.purge_expired(time.time() - self.ttl_seconds)
+
+    def _make_entry(self, query: str, response: Dict[str, Any], embedding) -> Dict[str, Any]:
+        return {
+            'response': response,
+            'timestamp': time.time(),
+            'query': query,
+            'embedding': embedding
+        }
 
     def set(self, query: str, response: Dict[str, Any]) -> None:
         """
-        Cache a response for a query.
+        Cache a response for a query (best effort: storage errors are logged).
 
         Args:
             query: User query
             response: Response dict to cache
         """
-        key = self._get_key(query)
+        # Query embedding is memoized by the embedder (computed during lookup)
+        embedding = self.embedder.encode(query) if self.semantic_enabled else None
 
-        # Remove oldest entry if cache is full
-        if len(self.cache) >= self.max_size and key not in self.cache:
-            # Remove oldest (first) entry
-            self.cache.popitem(last=False)
+        try:
+            self._store(self._get_key(query), self._make_entry(query, response, embedding))
+        except sqlite3.Error as e:
+            self.backend_errors += 1
+            print(f"[WARNING] Response cache write failed: {e}")
+            return
+        self._matrix_dirty = True
 
-        # Add/update entry
-        self.cache[key] = {
-            'response': response,
-            'timestamp': time.time()
-        }
+    async def set_async(self, query: str, response: Dict[str, Any]) -> None:
+        """
+        Cache a response without blocking the event loop on storage I/O.
+        Best effort: a failed write never fails the request.
 
-        # Move to end (most recent)
-        self.cache.move_to_end(key)
+        Args:
+            query: User query
+            response: Response dict to cache
+        """
+        embedding = await self.embedder.encode_async(query) if self.semantic_enabled else None
+
+        try:
+            await self._run(self._store, self._get_key(query), self._make_entry(query, response, embedding))
+        except sqlite3.Error as e:
+            self.backend_errors += 1
+            print(f"[WARNING] Response cache write failed: {e}")
+            return
+        self._matrix_dirty = True
 
     def clear(self) -> None:
         """Clear all cached responses."""
-        self.cache.clear()
+        self.backend.clear()
+        self._matrix_dirty = True
 
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
-        return {
-            'size': len(self.cache),
-            'max_size': self.max_size,
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+
+        stats = {
+            'size': len(self.backend),
             'ttl_seconds': self.ttl_seconds,
-            'hit_rate': getattr(self, '_hit_rate', 0.0)
+            'storage': self.backend.get_stats(),
+            'semantic_enabled': self.semantic_enabled,
+            'semantic_threshold': self.semantic_threshold,
+            'exact_hits': self.exact_hits,
+            'semantic_hits': self.semantic_hits,
+            'misses': self.misses,
+            'hit_rate': (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+            'backend_errors': self.backend_errors
         }
+
+        # The SQLite backend is bounded by max_bytes (in 'storage'), not entry count
+        if isinstance(self.backend, MemoryCacheBackend):
+            stats['max_size'] = self.backend.max_size
+
+        if self._similarities:
+            similarities = np.asarray(self._similarities)
+            counts, edges = np.histogram(similarities, bins=10, range=(0.0, 1.0))
+            stats['similarity_distribution'] = {
+                'count': len(similarities),
+                'p50': float(np.percentile(similarities, 50)),
+                'p90': float(np.percentile(similarities, 90)),
+                'max': float(similarities.max()),
+                'histogram': {f"{edges[i]:.1f}-{edges[i + 1]:.1f}": int(counts[i]) for i in range(len(counts))}
+            }
+
+        return stats
@@ -0,0 +1,114 @@
+"""
+Circuit Breaker - Stop calling a retrieval source that keeps failing
+closed -> open after N consecutive failures/timeouts
+open -> half_open after a cool-down; one probe decides whether to close again
+"""
+
+import time
+from typing import Dict, Any, Optional
+
+
+class CircuitBreaker:
+    """Per-source circuit breaker with half-open probing."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_seconds: float = 30.0):
+        """
+        Initialize circuit breaker.
+
+        Args:
+            name: Source name (for logs)
+            failure_threshold: Consecutive failures before the circuit opens
+            recovery_seconds: Time to stay open before allowing a probe
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_in_flight = False
+
+        # Stats for monitoring
+        self.successes = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may go through.
+
+        Returns:
+            True if closed, or if this call is the half-open probe
+        """
+        if self.state == self.OPEN:
+            if time.time() - self.opened_at >= self.recovery_seconds:
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+                print(f"[BREAKER] {self.name}: half-open, probing")
+            else:
+                self.rejected += 1
+                return False
+
+        if self.state == self.HALF_OPEN:
+            # Only one probe at a time
+            if self.probe_in_flight:
+                self.rejected += 1
+                return False
+            self.probe_in_flight = True
+
+        return True
+
+    def record_success(self):
+        """Record a successful call."""
+        self.successes += 1
+        self.consecutive_failures = 0
+
+        if self.state != self.CLOSED:
+            print(f"[BREAKER] {self.name}: closed (probe succeeded)")
+        self.state = self.CLOSED
+        self.probe_in_flight = False
+
+    def record_failure(self, timeout: bool = False):
+        """
+        Record a failed call.
+
+        Args:
+            timeout: True if the call hit its deadline
+        """
+        self.failures += 1
+        if timeout:
+            self.timeouts += 1
+        self.consecutive_failures += 1
+
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                print(f"[BREAKER] {self.name}: OPEN after {self.consecutive_failures} consecutive failure(s)")
+            self.state = self.OPEN
+            self.opened_at = time.time()
+            self.probe_in_flight = False
+
+    def record_cancelled(self):
+        """Record a call that was cancelled before finishing (no verdict)."""
+        self.probe_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get breaker state and counters."""
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'failure_threshold': self.failure_threshold,
+            'recovery_seconds': self.recovery_seconds,
+            'successes': self.successes,
+            'failures': self.failures,
+            'timeouts': self.timeouts,
+            'rejected': self.rejected,
+            'times_opened': self.times_opened
+        }
@@ -3,9 +3,42 @@ Context Merger - Intelligent Merging of Dual Sources
 Combines Vector DB and Web Search results intelligently
 """
 
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Optional
 import re
 
+from .token_counter import TokenCounter, get_token_counter
+
+
+# Queries mentioning these are likely answered better by live web data
+TIME_SENSITIVE_KEYWORDS = [
+    'current', 'latest', 'recent', 'new', 'upcoming',
+    'fall 2025', 'spring 2025', 'this semester', 'next semester'
+]
+
+
+# Fixed preamble of every combined context. It never varies per request,
+# so the LLM service can move it into its cached static prompt prefix.
+DUAL_SOURCE_HEADER = """=== INFORMATION FROM TWO SOURCES ===
+
+You have access to TWO independent information sources:
+1. LOCAL KNOWLEDGE BASE: Pre-scraped documents from SFSU (may be older)
+2. LIVE WEB SEARCH: Current information directly from SFSU websites (most recent)
+
+CRITICAL RULES:
+- ALWAYS cite which source you're using: [Local] or [Web]
+- If sources conflict, mention both perspectives
+- Prioritize Web Search for time-sensitive information
+- Use Local Knowledge Base for stable/established facts
+- If NEITHER source has the information, say: "I don't have that information in either source"
+- NEVER generate information not found in these sources
+"""
+
+
+def is_time_sensitive(query: str) -> bool:
+    """Check whether a query asks for time-sensitive information."""
+    query_lower = query.lower()
+    return any(kw in query_lower for kw in TIME_SENSITIVE_KEYWORDS)
+
 
 class ContextMerger:
     """
@@ -13,17 +46,26 @@ class ContextMerger:
     Handles deduplication, ranking, balancing, and formatting.
     """
 
-    def __init__(self):
-        """Initialize context merger with configuration."""
+    def __init__(self, token_counter: Optional[TokenCounter] = None):
+        """
+        Initialize context merger with configuration.
+
+        Args:
+            token_counter: Tokenizer-backed counter (the process-wide one is used if omitted)
+        """
         # Token limits for context
         self.max_total_tokens = 8000  # Total context size
         self.vector_ratio = 0.60  # 60% from vector DB
         self.web_ratio = 0.40  # 40% from web search
 
-        # Character estimates (rough: 1 token ≈ 4 characters)
-        self.max_total_chars = self.max_total_tokens * 4
-        self.max_vector_chars = int(self.max_total_chars * self.vector_ratio)
-        self.max_web_chars = int(self.max_total_chars * self.web_ratio)
+        # Contexts are packed by real token counts, not a chars/4 estimate
+        self.token_counter = token_counter or get_token_counter()
+        self.min_fragment_tokens = 40  # Don't bother including smaller partial documents
+
+        # Near-duplicate removal and MMR diversity for vector documents
+        self.shingle_size = 3  # Words per shingle
+        self.near_duplicate_threshold = 0.7  # Shingle containment above this = duplicate
+        self.mmr_lambda = 0.7  # 1.0 = pure relevance, 0.0 = pure diversity
 
     def merge_contexts(
         self,
@@ -44,20 +86,11 @@ class ContextMerger:
         """
         print(f"\n[CONTEXT MERGER] Merging contexts from both sources")
 
-        # Step 1: Extract and format vector DB context
-        vector_context = self._format_vector_context(
-            vector_results.get('documents', [])
-        )
-
-        # Step 2: Extract and format web search context
-        web_context = self._format_web_context(
-            web_results.get('content', '')
-        )
-
-        # Step 3: Balance context sizes
-        vector_context_balanced, web_context_balanced = self._balance_contexts(
-            vector_context,
-            web_context
+        # Steps 1-3: Pack both sources into the token budget by relevance
+        vector_context_balanced, web_context_balanced = self._pack_contexts(
+            vector_results.get('documents', []),
+            web_results.get('content', ''),
+            query
         )
 
         # Step 4: Detect conflicts/overlaps
@@ -106,7 +139,8 @@ class ContextMerger:
             'has_conflicts': has_conflicts,
             'vector_count': vector_results.get('count', 0),
             'web_count': web_results.get('count', 0),
-            'total_chars': len(combined_context)
+            'total_chars': len(combined_context),
+            'total_tokens': self.token_counter.count(combined_context)
         }
 
     def _format_vector_context(self, documents: List[Dict]) -> str:
@@ -161,44 +195,242 @@ class ContextMerger:
         # Just ensure it's properly marked
         return web_content
 
-    def _balance_contexts(
+    def _pack_contexts(
         self,
-        vector_context: str,
-        web_context: str
+        documents: List[Dict],
+        web_content: str,
+        query: str
     ) -> Tuple[str, str]:
         """
-        Balance context sizes according to configured ratios.
+        Fill the token budget greedily by relevance.
+
+        Each source gets its configured share; whatever one source does not
+        need is handed to the other. Units that don't fit whole are reduced
+        to their most query-relevant sentences instead of being cut mid-text.
 
         Args:
-            vector_context: Vector DB context
-            web_context: Web search context
+            documents: Vector DB documents
+            web_content: Formatted web search results
+            query: User query (for sentence relevance)
 
         Returns:
-            Tuple of (balanced_vector, balanced_web)
+            Tuple of (vector_context, web_context)
         """
-        # Check current sizes
-        vector_len = len(vector_context)
-        web_len = len(web_context)
-        total_len = vector_len + web_len
+        # Reserve room for the fixed header/section text
+        overhead = self.token_counter.count(self._format_combined_context("", "", 0, 0, True))
+        budget = max(0, self.max_total_tokens - overhead)
+        query_terms = self._query_terms(query)
 
-        # If total is under limit, return as-is
-        if total_len <= self.max_total_chars:
-            return vector_context, web_context
+        web_context = self._format_web_context(web_content)
+        web_units = self._split_web_results(web_context)
+        web_needed = sum(self.token_counter.count(unit) for unit in web_units)
 
-        print(f"[CONTEXT MERGER] Balancing: {total_len} chars -> {self.max_total_chars} chars")
+        # Vector gets its share plus whatever web won't use
+        vector_budget = budget - min(web_needed, int(budget * self.web_ratio))
+        diverse_docs = self._select_diverse(documents)
+        packed_docs, vector_used = self._pack_documents(diverse_docs, vector_budget, query_terms)
 
-        # Truncate each according to ratio
-        vector_balanced = vector_context[:self.max_vector_chars]
-        web_balanced = web_context[:self.max_web_chars]
+        # Web gets everything vector didn't use
+        packed_web, web_used = self._pack_units(web_units, budget - vector_used, query_terms)
 
-        # Add truncation notice if needed
-        if len(vector_context) > self.max_vector_chars:
-            vector_balanced += "\n\n[... Vector DB context truncated for token limit ...]"
+        print(f"[CONTEXT MERGER] Packed {len(packed_docs)}/{len(documents)} docs ({vector_used} tokens), "
+              f"{len(packed_web)}/{len(web_units)} web results ({web_used} tokens), "
+              f"budget {budget} tokens{'' if self.token_counter.exact else ' (estimated)'}")
 
-        if len(web_context) > self.max_web_chars:
-            web_balanced += "\n\n[... Web search context truncated for token limit ...]"
+        return self._format_vector_context(packed_docs), "\n".join(packed_web)
 
-        return vector_balanced, web_balanced
+    def _pack_documents(
+        self,
+        documents: List[Dict],
+        budget: int,
+        query_terms: set
+    ) -> Tuple[List[Dict], int]:
+        """
+        Select vector documents (in the given priority order) that fit the budget.
+
+        Returns:
+            Tuple of (documents to include, possibly with trimmed content; tokens used)
+        """
+        packed = []
+        used = 0
+        separator_tokens = self.token_counter.count("\n---\n")
+
+        for doc in documents:
+            remaining = budget - used - (separator_tokens if packed else 0)
+            if remaining < self.min_fragment_tokens:
+                break
+
+            # Header cost is the same whichever document number it gets
+            header_tokens = self.token_counter.count(self._format_vector_context([{**doc, 'content': '-'}]))
+            content = doc['content'].strip()
+            content_tokens = self.token_counter.count(content)
+
+            if header_tokens + content_tokens > remaining:
+                content = self._fit_sentences(content, remaining - header_tokens, query_terms)
+                if not content:
+                    continue
+                content_tokens = self.token_counter.count(content)
+
+            packed.append({**doc, 'content': content})
+            used += header_tokens + content_tokens + (separator_tokens if len(packed) > 1 else 0)
+
+        return packed, used
+
+    def _select_diverse(self, documents: List[Dict]) -> List[Dict]:
+        """
+        Drop near-duplicate documents and order the rest by MMR.
+
+        Two documents are near-duplicates when most of the shorter one's word
+        shingles appear in the other (e.g. the same bulletin page from two
+        scrapers); the more relevant copy is kept. The survivors are ordered
+        by Maximal Marginal Relevance so packing favours distinct information.
+
+        Args:
+            documents: Vector DB documents
+
+        Returns:
+            Deduplicated documents in MMR order
+        """
+        docs = sorted(
+            (d for d in documents if d.get('content', '').strip()),
+            key=self._relevance,
+            reverse=True
+        )
+        shingles = [self._shingles(d['content']) for d in docs]
+
+        # Step 1: Near-duplicate elimination (most relevant copy wins)
+        kept = []
+        for i in range(len(docs)):
+            if any(self._containment(shingles[i], shingles[j]) >= self.near_duplicate_threshold for j in kept):
+                continue
+            kept.append(i)
+
+        # Step 2: MMR ordering
+        selected = []
+        candidates = list(kept)
+        max_overlap = {i: 0.0 for i in candidates}
+
+        while candidates:
+            best = max(
+                candidates,
+                key=lambda i: self.mmr_lambda * self._relevance(docs[i]) - (1 - self.mmr_lambda) * max_overlap[i]
+            )
+            selected.append(best)
+            candidates.remove(best)
+
+            for i in candidates:
+                max_overlap[i] = max(max_overlap[i], self._jaccard(shingles[i], shingles[best]))
+
+        if len(kept) < len(docs):
+            print(f"[CONTEXT MERGER] Removed {len(docs) - len(kept)} near-duplicate document(s)")
+
+        return [docs[i] for i in selected]
+
+    def _relevance(self, doc: Dict) -> float:
+        """Cross-encoder score when the reranker ran, else retrieval similarity."""
+        return doc.get('rerank_score', doc.get('similarity', 0.0))
+
+    def _shingles(self, text: str) -> set:
+        """Set of hashed word n-grams for overlap comparisons."""
+        words = re.findall(r'\w+', text.lower())
+        if len(words) < self.shingle_size:
+            return {hash(' '.join(words))} if words else set()
+        return {
+            hash(' '.join(words[i:i + self.shingle_size]))
+            for i in range(len(words) - self.shingle_size + 1)
+        }
+
+    def _containment(self, a: set, b: set) -> float:
+        """Fraction of the smaller shingle set contained in the other."""
+        if not a or not b:
+            return 0.0
+        return len(a & b) / min(len(a), len(b))
+
+    def _jaccard(self, a: set, b: set) -> float:
+        """Jaccard similarity of two shingle sets."""
+        if not a or not b:
+            return 0.0
+        return len(a & b) / len(a | b)
+
+    def _pack_units(self, units: List[str], budget: int, query_terms: set) -> Tuple[List[str], int]:
+        """
+        Select text units (in rank order) that fit the budget.
+
+        Returns:
+            Tuple of (units to include, tokens used)
+        """
+        packed = []
+        used = 0
+
+        for unit in units:
+            remaining = budget - used
+            if remaining < self.min_fragment_tokens:
+                break
+
+            tokens = self.token_counter.count(unit)
+            if tokens > remaining:
+                # Keep the Title/URL lines, trim the content
+                header, _, body = unit.partition("Content: ")
+                if not body:
+                    header, body = "", unit
+                header_tokens = self.token_counter.count(header)
+                body = self._fit_sentences(body, remaining - header_tokens, query_terms)
+                if not body:
+                    continue
+                unit = f"{header}Content: {body}\n" if header else body
+                tokens = self.token_counter.count(unit)
+
+            packed.append(unit)
+            used += tokens
+
+        return packed, used
+
+    def _split_web_results(self, web_context: str) -> List[str]:
+        """Split formatted web results into one unit per result (rank order)."""
+        if not web_context:
+            return []
+        units = re.split(r'\n(?=\[(?:Web Result \d+|AI-Generated Summary)\])', web_context)
+        return [unit for unit in units if unit.strip()]
+
+    def _fit_sentences(self, text: str, budget: int, query_terms: set) -> str:
+        """
+        Keep the most query-relevant sentences of text that fit the budget.
+
+        Sentences are chosen by query-term overlap (earlier sentences win ties)
+        and emitted in their original order.
+
+        Returns:
+            Reduced text, or "" if less than min_fragment_tokens would fit
+        """
+        if budget < self.min_fragment_tokens:
+            return ""
+
+        sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+|\n+', text) if s.strip()]
+
+        def relevance(index: int) -> Tuple[int, int]:
+            words = set(re.findall(r'\w+', sentences[index].lower()))
+            return (-len(words & query_terms), index)
+
+        chosen = []
+        used = 0
+        for index in sorted(range(len(sentences)), key=relevance):
+            tokens = self.token_counter.count(sentences[index]) + 1  # joining space
+            if used + tokens <= budget:
+                chosen.append(index)
+                used += tokens
+
+        if used < self.min_fragment_tokens:
+            return ""
+
+        return " ".join(sentences[i] for i in sorted(chosen))
+
+    def _query_terms(self, query: str) -> set:
+        """Lowercased content words of the query."""
+        stop_words = {
+            'the', 'and', 'for', 'are', 'what', 'how', 'who', 'where', 'when',
+            'which', 'does', 'can', 'with', 'about', 'tell', 'from', 'this', 'that'
+        }
+        return {w for w in re.findall(r'\w+', query.lower()) if len(w) > 2 and w not in stop_words}
 
     def _detect_conflicts(
         self,
@@ -219,19 +451,13 @@ class ContextMerger:
         """
         # Simple heuristic: if query contains time-sensitive keywords
         # and both sources have content, there might be conflicts
-        time_keywords = [
-            'current', 'latest', 'recent', 'new', 'upcoming',
-            'fall 2025', 'spring 2025', 'this semester', 'next semester'
-        ]
-
-        query_lower = query.lower()
-        is_time_sensitive = any(kw in query_lower for kw in time_keywords)
+        time_sensitive = is_time_sensitive(query)
 
         has_both_sources = bool(vector_context) and bool(web_context)
 
         # If query is time-sensitive and we have both sources,
         # there's a higher chance of conflicts (web being more recent)
-        return is_time_sensitive and has_both_sources
+        return time_sensitive and has_both_sources
 
     def _format_combined_context(
         self,
@@ -257,21 +483,7 @@ class ContextMerger:
         parts = []
 
         # Header explaining both sources
-        header = """=== INFORMATION FROM TWO SOURCES ===
-
-You have access to TWO independent information sources:
-1. LOCAL KNOWLEDGE BASE: Pre-scraped documents from SFSU (may be older)
-2. LIVE WEB SEARCH: Current information directly from SFSU websites (most recent)
-
-CRITICAL RULES:
-- ALWAYS cite which source you're using: [Local] or [Web]
-- If sources conflict, mention both perspectives
-- Prioritize Web Search for time-sensitive information
-- Use Local Knowledge Base for stable/established facts
-- If NEITHER source has the information, say: "I don't have that information in either source"
-- NEVER generate information not found in these sources
-"""
-        parts.append(header)
+        parts.append(DUAL_SOURCE_HEADER)
 
         # Add vector DB context
         if vector_context:
@@ -4,30 +4,127 @@ Handles all database operations
 """
 
 import os
-from supabase import create_client, Client
+import asyncio
+from supabase import Client
 from typing import List, Dict, Optional, Any
-from sentence_transformers import SentenceTransformer
 from datetime import datetime
+from .resources import get_embedding_model, get_supabase_client
+from .embeddings import get_embedding_service
+from .local_index import LocalVectorIndex
+from .reranker import CrossEncoderReranker, create_reranker_from_env
+from .fusion import FusionStrategy, get_fusion_strategy
 
 class DatabaseService:
     """Service for database operations using Supabase."""
 
     def __init__(self):
-        """Initialize Supabase client and embedding model."""
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_KEY")
+        """Initialize with the process-wide Supabase client and embedding model."""
+        self.client: Client = get_supabase_client()
+        self.embedding_model = get_embedding_model()
+        self.embeddings = get_embedding_service()  # Memoized query encoding
+        self.hybrid_rpc_available = True  # Flipped off if hybrid_search() is not deployed
+        self.fusion: FusionStrategy = get_fusion_strategy()  # HYBRID_FUSION=legacy|rrf|zscore
 
-        if not supabase_url or not supabase_key:
-            raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set")
+        # Optional in-process retrieval (LOCAL_VECTOR_INDEX=true)
+        self.local_index_enabled = os.getenv("LOCAL_VECTOR_INDEX", "false").lower() == "true"
+        self.local_index_refresh_seconds = int(os.getenv("LOCAL_INDEX_REFRESH_SECONDS", "3600"))
+        self.document_index: Optional[LocalVectorIndex] = None
+        self.fact_index: Optional[LocalVectorIndex] = None
+
+        if self.local_index_enabled:
+            self._init_local_indexes()
+
+        # Optional cross-encoder reranking of search results (RERANKER_ENABLED=true)
+        self.reranker: Optional[CrossEncoderReranker] = create_reranker_from_env()
 
-        self.client: Client = create_client(supabase_url, supabase_key)
-        self.embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
         self.ready = True
 
     def is_ready(self) -> bool:
         """Check if service is ready."""
         return self.ready
 
+    # ========================================================================
+    # LOCAL VECTOR INDEX
+    # ========================================================================
+
+    def _init_local_indexes(self):
+        """Build the local document / verified-fact indexes (falls back to Supabase on failure)."""
+        cache_dir = os.getenv(
+            "LOCAL_INDEX_DIR",
+            os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".index_cache")
+        )
+
+        self.document_index = LocalVectorIndex(
+            self.client, "documents", "id, content, metadata, source",
+            cache_dir, max_age_seconds=self.local_index_refresh_seconds
+        )
+        self.fact_index = LocalVectorIndex(
+            self.client, "verified_facts", "id, question, answer, category, verified_by",
+            cache_dir, max_age_seconds=self.local_index_refresh_seconds
+        )
+
+        for index in (self.document_index, self.fact_index):
+            try:
+                index.load()
+            except Exception as e:
+                print(f"[LOCAL INDEX] Failed to load {index.table}: {e} - using Supabase RPCs")
+
+    async def run_local_index_refresh(self):
+        """
+        Background task: periodically reload the local indexes.
+
+        load() only pulls from Supabase when the shared snapshot is stale,
+        under a host-wide lock, so one worker refreshes per interval and the
+        rest read the snapshot it wrote.
+        """
+        if not self.local_index_enabled:
+            return
+
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.local_index_refresh_seconds)
+            for index in (self.document_index, self.fact_index):
+                try:
+                    await loop.run_in_executor(None, index.load)
+                except Exception as e:
+                    print(f"[LOCAL INDEX] Refresh of {index.table} failed: {e}")
+
+    async def _sync_local_index(self, index: LocalVectorIndex):
+        """Re-read the shared snapshot if another worker has rewritten it."""
+        if index.snapshot_changed():
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, index.load)
+
+    def _search_documents_local(
+        self,
+        query_embedding: List[float],
+        keywords: List[str],
+        limit: int,
+        threshold: float
+    ) -> List[Dict]:
+        """
+        Hybrid search against the in-process index.
+        Vector candidates are keyword-scored and fused with the configured
+        strategy (keyword-only hits are not available locally).
+        """
+        candidates = self.document_index.search(query_embedding, limit * 2, threshold)
+
+        for doc in candidates:
+            content_lower = doc.get('content', '').lower()
+            keyword_matches = sum(1 for kw in keywords if kw.lower() in content_lower)
+            doc['vector_score'] = doc['similarity']
+            doc['keyword_score'] = keyword_matches / len(keywords) if keywords else 0
+
+        keyword_hits = sorted(
+            (d for d in candidates if d['keyword_score'] > 0),
+            key=lambda x: x['keyword_score'],
+            reverse=True
+        )
+        ranked_docs = self.fusion.fuse(candidates, keyword_hits, limit)
+        print(f"[LOCAL SEARCH] {len(ranked_docs)} final docs from {self.document_index.size} indexed")
+
+        return ranked_docs
+
     # ========================================================================
     # VECTOR SEARCH
     # ========================================================================
@@ -37,96 +134,89 @@ class DatabaseService:
         query: str,
         limit: int = 5,
         threshold: float = 0.5
+    ) -> List[Dict]:
+        """
+        Search documents, then rerank with the cross-encoder if enabled.
+
+        With the reranker on, the `limit` hybrid-search hits are treated as
+        candidates and only the reranker's top-k are returned.
+
+        Args:
+            query: User query
+            limit: Number of hybrid-search candidates
+            threshold: Minimum vector similarity
+
+        Returns:
+            List of document dicts, best first
+        """
+        docs = await self._search_documents_hybrid(query, limit, threshold)
+
+        if self.reranker is not None and docs:
+            docs = await self.reranker.rerank(query, docs, top_k=min(limit, self.reranker.top_k))
+
+        return docs
+
+    async def _search_documents_hybrid(
+        self,
+        query: str,
+        limit: int = 5,
+        threshold: float = 0.5
     ) -> List[Dict]:
         """
         HYBRID SEARCH: Combines vector similarity + keyword matching for better results.
         This fixes the issue where vector search alone returns irrelevant documents.
+
+        Runs as a single `hybrid_search` RPC (vector + full-text + fusion in
+        Postgres). Falls back to the multi-query path if the function has not
+        been created in the database yet.
         """
         try:
-            # Step 1: Vector similarity search (semantic understanding)
-            query_embedding = self.embedding_model.encode(query).tolist()
-
-            vector_result = self.client.rpc(
-                "match_documents",
-                {
-                    "query_embedding": query_embedding,
-                    "match_threshold": threshold,
-                    "match_count": limit * 2  # Get more candidates for filtering
-                }
-            ).execute()
+            query_embedding = await self.embeddings.encode_async(query)
+            keywords = self._extract_keywords(query)
 
-            vector_docs = vector_result.data if vector_result.data else []
+            if self.document_index is not None and self.document_index.ready:
+                await self._sync_local_index(self.document_index)
+                return self._search_documents_local(query_embedding, keywords, limit, threshold)
 
-            # Step 2: Keyword search (exact matching)
-            # Extract important keywords from query
-            keywords = self._extract_keywords(query)
+            if not self.hybrid_rpc_available:
+                return await self._search_documents_multi_query(query_embedding, keywords, limit, threshold)
+
+            # Legacy fusion runs inside hybrid_search; other strategies need
+            # every candidate back (with both scores) and fuse here
+            fuse_in_python = self.fusion.name != "legacy"
+            vector_count = limit * 2  # Get more candidates for fusion
+            keyword_count = 50
 
-            if keywords:
-                print(f"[HYBRID SEARCH] Keywords: {keywords}")
-
-                # Search for documents containing these keywords
-                keyword_docs = []
-                for keyword in keywords[:5]:  # Use top 5 keywords
-                    try:
-                        keyword_result = self.client.table("documents")\
-                            .select("id, content, source, category, metadata")\
-                            .ilike("content", f"%{keyword}%")\
-                            .limit(20)\
-                            .execute()
-
-                        if keyword_result.data:
-                            keyword_docs.extend(keyword_result.data)
-                    except:
-                        pass
-
-                # Combine and deduplicate results
-                all_docs = {}
-
-                # Add vector results with their similarity scores
-                for doc in vector_docs:
-                    doc_id = doc.get('id')
-                    all_docs[doc_id] = {
-                        **doc,
-                        'vector_score': doc.get('similarity', 0),
-                        'keyword_score': 0
+            try:
+                result = self.client.rpc(
+                    "hybrid_search",
+                    {
+                        "query_embedding": query_embedding,
+                        "query_text": " ".join(keywords),
+                        "match_threshold": threshold,
+                        "match_count": vector_count + keyword_count if fuse_in_python else limit,
+                        "vector_count": vector_count,
+                        "keyword_count": keyword_count
                     }
+                ).execute()
+            except Exception as e:
+                print(f"[HYBRID SEARCH] hybrid_search RPC failed ({e}) - using multi-query fallback")
+                # Function not deployed yet: stop trying until restart
+                if 'PGRST202' in str(e) or 'does not exist' in str(e):
+                    self.hybrid_rpc_available = False
+                return await self._search_documents_multi_query(query_embedding, keywords, limit, threshold)
 
-                # Add keyword results and boost their scores
-                for doc in keyword_docs:
-                    doc_id = doc.get('id')
-
-                    # Calculate keyword score (how many keywords appear in content)
-                    content_lower = doc.get('content', '').lower()
-                    keyword_matches = sum(1 for kw in keywords if kw.lower() in content_lower)
-                    keyword_score = keyword_matches / len(keywords) if keywords else 0
-
-                    if doc_id in all_docs:
-                        # Document found by both methods - boost it!
-                        all_docs[doc_id]['keyword_score'] = keyword_score
-                        all_docs[doc_id]['similarity'] = (all_docs[doc_id]['vector_score'] + keyword_score) / 2
-                    else:
-                        # Document only found by keyword search
-                        all_docs[doc_id] = {
-                            **doc,
-                            'vector_score': 0,
-                            'keyword_score': keyword_score,
-                            'similarity': keyword_score * 0.7  # Give it a decent score
-                        }
-
-                # Sort by combined score
-                ranked_docs = sorted(
-                    all_docs.values(),
-                    key=lambda x: x.get('similarity', 0),
-                    reverse=True
-                )[:limit]
-
-                print(f"[HYBRID SEARCH] Found {len(vector_docs)} vector + {len(set(d['id'] for d in keyword_docs))} keyword = {len(ranked_docs)} final docs")
-
-                return ranked_docs
-            else:
-                # No keywords extracted, use vector search only
-                print(f"[VECTOR SEARCH ONLY] Found {len(vector_docs)} docs")
-                return vector_docs[:limit]
+            ranked_docs = result.data if result.data else []
+
+            if fuse_in_python:
+                ranked_docs = self._fuse_candidates(ranked_docs, limit)
+
+            vector_hits = sum(1 for d in ranked_docs if d.get('vector_score', 0) > 0)
+            keyword_hits = sum(1 for d in ranked_docs if d.get('keyword_score', 0) > 0)
+            print(f"[HYBRID SEARCH] Keywords: {keywords}")
+            print(f"[HYBRID SEARCH] {len(ranked_docs)} final docs ({vector_hits} vector, {keyword_hits} keyword) in 1 round trip")
+
+            return ranked_docs
 
         except Exception as e:
             print(f"[ERROR] Error searching documents: {e}")
@@ -134,7 +224,86 @@ class DatabaseService:
             traceback.print_exc()
             return []
 
-    def _extract_keywords(self, query: str) -> List[str]:
+    def _fuse_candidates(self, candidates: List[Dict], limit: int) -> List[Dict]:
+        """Re-fuse hybrid_search candidates (which carry both scores) with self.fusion."""
+        vector_hits = sorted(
+            (d for d in candidates if d.get('vector_score', 0) > 0),
+            key=lambda x: x['vector_score'],
+            reverse=True
+        )
+        keyword_hits = sorted(
+            (d for d in candidates if d.get('keyword_score', 0) > 0),
+            key=lambda x: x['keyword_score'],
+            reverse=True
+        )
+        return self.fusion.fuse(vector_hits, keyword_hits, limit)
+
+    async def _search_documents_multi_query(
+        self,
+        query_embedding: List[float],
+        keywords: List[str],
+        limit: int,
+        threshold: float
+    ) -> List[Dict]:
+        """
+        Legacy hybrid search: one match_documents RPC plus one ILIKE query per
+        keyword, fused in Python. Used only when hybrid_search is missing.
+        """
+        # Step 1: Vector similarity search (semantic understanding)
+        vector_result = self.client.rpc(
+            "match_documents",
+            {
+                "query_embedding": query_embedding,
+                "match_threshold": threshold,
+                "match_count": limit * 2  # Get more candidates for filtering
+            }
+        ).execute()
+
+        vector_docs = vector_result.data if vector_result.data else []
+
+        # Step 2: Keyword search (exact matching)
+        if keywords:
+            print(f"[HYBRID SEARCH] Keywords: {keywords}")
+
+            # Search for documents containing these keywords
+            keyword_docs = []
+            for keyword in keywords[:5]:  # Use top 5 keywords
+                try:
+                    keyword_result = self.client.table("documents")\
+                        .select("id, content, source, category, metadata")\
+                        .ilike("content", f"%{keyword}%")\
+                        .limit(20)\
+                        .execute()
+
+                    if keyword_result.data:
+                        keyword_docs.extend(keyword_result.data)
+                except:
+                    pass
+
+            # Score keyword results (how many keywords appear in content), deduplicated
+            keyword_hits = {}
+            for doc in keyword_docs:
+                content_lower = doc.get('content', '').lower()
+                keyword_matches = sum(1 for kw in keywords if kw.lower() in content_lower)
+                keyword_hits[doc.get('id')] = {**doc, 'keyword_score': keyword_matches / len(keywords)}
+
+            # Fuse with the configured strategy
+            ranked_docs = self.fusion.fuse(
+                [{**doc, 'vector_score': doc.get('similarity', 0)} for doc in vector_docs],
+                sorted(keyword_hits.values(), key=lambda x: x['keyword_score'], reverse=True),
+                limit
+            )
+
+            print(f"[HYBRID SEARCH] Found {len(vector_docs)} vector + {len(set(d['id'] for d in keyword_docs))} keyword = {len(ranked_docs)} final docs")
+
+            return ranked_docs
+        else:
+            # No keywords extracted, use vector search only
+            print(f"[VECTOR SEARCH ONLY] Found {len(vector_docs)} docs")
+            return vector_docs[:limit]
+
+    @staticmethod
+    def _extract_keywords(query: str) -> List[str]:
         """Extract important keywords from query for keyword search."""
         # Common stop words to ignore
         stop_words = {
@@ -172,19 +341,25 @@ class DatabaseService:
     ) -> Optional[Dict]:
         """Search verified facts (professor-approved answers)."""
         try:
-            query_embedding = self.embedding_model.encode(query).tolist()
-
-            result = self.client.rpc(
-                "match_verified_facts",
-                {
-                    "query_embedding": query_embedding,
-                    "match_threshold": threshold,
-                    "match_count": limit
-                }
-            ).execute()
+            query_embedding = await self.embeddings.encode_async(query)
+
+            if self.fact_index is not None and self.fact_index.ready:
+                # A fact added through another worker rewrites the shared snapshot
+                await self._sync_local_index(self.fact_index)
+                matches = self.fact_index.search(query_embedding, limit, threshold)
+            else:
+                result = self.client.rpc(
+                    "match_verified_facts",
+                    {
+                        "query_embedding": query_embedding,
+                        "match_threshold": threshold,
+                        "match_count": limit
+                    }
+                ).execute()
+                matches = result.data
 
-            if result.data and len(result.data) > 0:
-                top_match = result.data[0]
+            if matches and len(matches) > 0:
+                top_match = matches[0]
                 return {
                     "question": top_match["question"],
                     "answer": top_match["answer"],
@@ -293,7 +468,7 @@ class DatabaseService:
         """Add a verified fact (professor-approved answer)."""
         try:
             # Generate embedding for the question
-            embedding = self.embedding_model.encode(question).tolist()
+            embedding = await self.embeddings.encode_async(question)
 
             self.client.table("verified_facts").insert({
                 "question": question,
@@ -303,6 +478,11 @@ class DatabaseService:
                 "verified_by": verified_by
             }).execute()
 
+            # Rewrites the shared snapshot; other workers pick it up on their next fact search
+            if self.fact_index is not None:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, self.fact_index.load, True)
+
         except Exception as e:
             print(f"[ERROR] Error adding verified fact: {e}")
             raise
@@ -1,14 +1,18 @@
 """
 Dual-Source RAG Service
 CRITICAL: ALWAYS retrieves from BOTH Vector DB AND Web Search in parallel
+(unless the opt-in WEB_EARLY_EXIT policy finds the knowledge base sufficient)
 This is the core anti-hallucination system
 """
 
+import os
 import asyncio
 import time
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Callable, Awaitable
 from .database import DatabaseService
 from .web_search import WebSearchService
+from .circuit_breaker import CircuitBreaker
+from .context_merger import is_time_sensitive
 
 
 class DualSourceRAG:
@@ -17,10 +21,20 @@ class DualSourceRAG:
     MANDATORY: Every query uses BOTH sources - no exceptions.
     """
 
-    def __init__(self):
-        """Initialize both retrieval sources."""
-        self.db_service = DatabaseService()
-        self.web_search = WebSearchService()
+    def __init__(
+        self,
+        db_service: Optional[DatabaseService] = None,
+        web_search: Optional[WebSearchService] = None
+    ):
+        """
+        Initialize both retrieval sources.
+
+        Args:
+            db_service: Shared DatabaseService (a new one is created if omitted)
+            web_search: Shared WebSearchService (a new one is created if omitted)
+        """
+        self.db_service = db_service or DatabaseService()
+        self.web_search = web_search or WebSearchService()
         self.ready = True
 
         # Configuration
@@ -28,7 +42,34 @@ class DualSourceRAG:
         self.web_top_results = 3  # Number of web results
         self.min_vector_confidence = 0.15  # Lower threshold for inclusion
 
+        # Deadlines per leg: when one passes, merge proceeds with whatever arrived
+        self.vector_deadline_seconds = float(os.getenv("VECTOR_LEG_DEADLINE_SECONDS", "10"))
+        self.web_deadline_seconds = float(os.getenv("WEB_LEG_DEADLINE_SECONDS", "8"))
+
+        # Circuit breakers: stop waiting on a source that keeps failing
+        failure_threshold = int(os.getenv("SOURCE_BREAKER_FAILURES", "5"))
+        recovery_seconds = float(os.getenv("SOURCE_BREAKER_RECOVERY_SECONDS", "30"))
+        self.vector_breaker = CircuitBreaker("vector_db", failure_threshold, recovery_seconds)
+        self.web_breaker = CircuitBreaker("web_search", failure_threshold, recovery_seconds)
+
+        # Opt-in early exit: skip or cancel the web leg when the knowledge base
+        # already has confident hits and the query is not time-sensitive
+        self.early_exit_enabled = os.getenv("WEB_EARLY_EXIT", "false").lower() == "true"
+        self.early_exit_similarity = float(os.getenv("WEB_EARLY_EXIT_SIMILARITY", "0.8"))
+        self.early_exit_min_docs = int(os.getenv("WEB_EARLY_EXIT_MIN_DOCS", "3"))
+        self.early_exit_wait_seconds = float(os.getenv("WEB_EARLY_EXIT_WAIT_SECONDS", "0.3"))
+        self.early_exit_stats = {
+            'skipped': 0,  # Web never launched (no paid API call)
+            'cancelled': 0,  # Web launched, then cancelled when vector turned out confident
+            'launched': 0,  # Vector not confident enough
+            'time_sensitive': 0,  # Web always used
+            'est_seconds_saved': 0.0
+        }
+        self._web_latency_avg: Optional[float] = None
+
         print("[DUAL-SOURCE RAG] Initialized with MANDATORY dual-source retrieval")
+        if self.early_exit_enabled:
+            print(f"[DUAL-SOURCE RAG] Web early exit enabled (top similarity >= {self.early_exit_similarity})")
 
     def is_ready(self) -> bool:
         """Check if both sources are ready."""
@@ -38,6 +79,9 @@ class DualSourceRAG:
         """
         CRITICAL: Retrieve from BOTH sources in parallel.
         This is MANDATORY for every query - never skip either source.
+        Each leg has its own deadline and circuit breaker; a leg that is late,
+        fails or is short-circuited contributes empty results instead of
+        stalling the answer.
 
         Args:
             query: User's question
@@ -50,40 +94,26 @@ class DualSourceRAG:
         print(f"\n[DUAL-SOURCE] PARALLEL RETRIEVAL for: '{query[:60]}...'")
 
         # CRITICAL: Run BOTH retrievals in parallel - never skip either one
+        # (unless a source's circuit breaker is open)
         try:
-            # Create parallel tasks for both sources
-            vector_task = asyncio.create_task(
-                self._retrieve_from_vector_db(query)
-            )
-            web_task = asyncio.create_task(
-                self._retrieve_from_web_search(query)
-            )
-
-            # Wait for BOTH to complete (not just one)
-            vector_results, web_results = await asyncio.gather(
-                vector_task,
-                web_task,
-                return_exceptions=True  # Don't fail if one source has issues
-            )
-
-            # Handle exceptions from either source
-            if isinstance(vector_results, Exception):
-                print(f"[DUAL-SOURCE] WARNING: Vector DB error: {vector_results}")
-                vector_results = {"documents": [], "confidence": 0.0, "count": 0}
-
-            if isinstance(web_results, Exception):
-                print(f"[DUAL-SOURCE] WARNING: Web search error: {web_results}")
-                web_results = {"results": [], "content": "", "count": 0}
+            # Each leg is bounded by its own deadline and never raises
+            if self.early_exit_enabled:
+                (vector_results, vector_status), (web_results, web_status) = await self._retrieve_gated(query)
+            else:
+                (vector_results, vector_status), (web_results, web_status) = await asyncio.gather(
+                    self._vector_leg(query),
+                    self._web_leg(query)
+                )
 
             retrieval_time = time.time() - start_time
 
             # Log what we retrieved
-            print(f"[DUAL-SOURCE] ✓ Vector DB: {vector_results['count']} documents")
-            print(f"[DUAL-SOURCE] ✓ Web Search: {web_results['count']} results")
+            print(f"[DUAL-SOURCE] ✓ Vector DB: {vector_results['count']} documents ({vector_status})")
+            print(f"[DUAL-SOURCE] ✓ Web Search: {web_results['count']} results ({web_status})")
             print(f"[DUAL-SOURCE] ✓ Retrieval time: {retrieval_time:.2f}s")
 
-            # CRITICAL: Verify both sources were attempted
-            both_sources_used = True  # Always true in this architecture
+            # Both sources were used unless a breaker or early exit left one out
+            both_sources_used = not {vector_status, web_status} & {'circuit_open', 'skipped', 'cancelled'}
 
             return {
                 'vector_results': vector_results,
@@ -92,6 +122,7 @@ class DualSourceRAG:
                 'both_sources_used': both_sources_used,
                 'vector_count': vector_results['count'],
                 'web_count': web_results['count'],
+                'source_status': {'vector': vector_status, 'web': web_status},
                 'query': query
             }
 
@@ -112,6 +143,175 @@ class DualSourceRAG:
                 'error': str(e)
             }
 
+    def _empty_vector_results(self) -> Dict:
+        return {"documents": [], "confidence": 0.0, "count": 0}
+
+    def _empty_web_results(self) -> Dict:
+        return {"results": [], "content": "", "count": 0}
+
+    async def _vector_leg(self, query: str) -> Tuple[Dict, str]:
+        """Vector retrieval behind its breaker and deadline."""
+        return await self._run_leg(
+            self.vector_breaker,
+            lambda: self._retrieve_from_vector_db(query),
+            self.vector_deadline_seconds,
+            self._empty_vector_results()
+        )
+
+    async def _web_leg(self, query: str) -> Tuple[Dict, str]:
+        """Web retrieval behind its breaker and deadline (tracks average latency)."""
+        start = time.time()
+        results, status = await self._run_leg(
+            self.web_breaker,
+            lambda: self._retrieve_from_web_search(query),
+            self.web_deadline_seconds,
+            self._empty_web_results()
+        )
+
+        if status == 'ok':
+            elapsed = time.time() - start
+            if self._web_latency_avg is None:
+                self._web_latency_avg = elapsed
+            else:
+                self._web_latency_avg = 0.9 * self._web_latency_avg + 0.1 * elapsed
+
+        return results, status
+
+    def _vector_is_confident(self, vector_results: Dict) -> bool:
+        """Top hit is strong and there are enough documents to answer from."""
+        docs = vector_results.get('documents', [])
+        if len(docs) < self.early_exit_min_docs:
+            return False
+        return self._top_vector_score(docs) >= self.early_exit_similarity
+
+    @staticmethod
+    def _top_vector_score(docs: List[Dict]) -> float:
+        """Best raw cosine similarity (fused hits keep it in vector_score)."""
+        return max((d.get('vector_score', d.get('similarity', 0)) or 0 for d in docs), default=0.0)
+
+    def _log_early_exit(self, decision: str, query: str, vector_results: Optional[Dict], saved: float = 0.0):
+        """Count and log an early-exit decision."""
+        self.early_exit_stats[decision] += 1
+        self.early_exit_stats['est_seconds_saved'] += saved
+
+        docs = (vector_results or {}).get('documents', [])
+        top_similarity = self._top_vector_score(docs)
+        print(f"[EARLY EXIT] decision={decision} top_similarity={top_similarity:.2f} "
+              f"docs={len(docs)} est_saved={saved:.2f}s query='{query[:50]}'")
+
+    async def _retrieve_gated(self, query: str) -> Tuple[Tuple[Dict, str], Tuple[Dict, str]]:
+        """
+        Start vector retrieval first and decide whether the web leg is needed.
+
+        - Time-sensitive query: run both legs in parallel (web is authoritative)
+        - Vector confident within early_exit_wait_seconds: skip web entirely
+        - Otherwise: launch web; cancel it if vector later turns out confident
+
+        Args:
+            query: User's question
+
+        Returns:
+            Tuple of ((vector_results, status), (web_results, status))
+        """
+        if is_time_sensitive(query):
+            self._log_early_exit('time_sensitive', query, None)
+            return tuple(await asyncio.gather(self._vector_leg(query), self._web_leg(query)))
+
+        vector_task = asyncio.create_task(self._vector_leg(query))
+        done, _ = await asyncio.wait({vector_task}, timeout=self.early_exit_wait_seconds)
+
+        if done:
+            vector_results, vector_status = vector_task.result()
+            if self._vector_is_confident(vector_results):
+                saved = self._web_latency_avg or 0.0
+                self._log_early_exit('skipped', query, vector_results, saved)
+                return (vector_results, vector_status), (self._empty_web_results(), 'skipped')
+
+        web_start = time.time()
+        web_task = asyncio.create_task(self._web_leg(query))
+
+        try:
+            vector_results, vector_status = await vector_task
+        except asyncio.CancelledError:
+            web_task.cancel()
+            raise
+
+        if not web_task.done() and self._vector_is_confident(vector_results):
+            web_task.cancel()
+            try:
+                await web_task
+            except asyncio.CancelledError:
+                pass
+
+            saved = max(0.0, (self._web_latency_avg or 0.0) - (time.time() - web_start))
+            self._log_early_exit('cancelled', query, vector_results, saved)
+            return (vector_results, vector_status), (self._empty_web_results(), 'cancelled')
+
+        self._log_early_exit('launched', query, vector_results)
+        return (vector_results, vector_status), await web_task
+
+    async def _run_leg(
+        self,
+        breaker: CircuitBreaker,
+        retrieve: Callable[[], Awaitable[Dict]],
+        deadline: float,
+        empty_result: Dict
+    ) -> Tuple[Dict, str]:
+        """
+        Run one retrieval leg behind its circuit breaker and deadline.
+
+        Args:
+            breaker: Circuit breaker for this source
+            retrieve: Zero-argument coroutine factory for the retrieval
+            deadline: Seconds to wait before giving up on this leg
+            empty_result: Result to use when the leg is skipped or fails
+
+        Returns:
+            Tuple of (results, status) where status is one of
+            'ok', 'timeout', 'error', 'circuit_open'
+        """
+        if not breaker.allow_request():
+            print(f"[DUAL-SOURCE] Skipping {breaker.name}: circuit open")
+            return empty_result, 'circuit_open'
+
+        try:
+            results = await asyncio.wait_for(retrieve(), timeout=deadline)
+            breaker.record_success()
+            return results, 'ok'
+
+        except asyncio.TimeoutError:
+            breaker.record_failure(timeout=True)
+            print(f"[DUAL-SOURCE] WARNING: {breaker.name} missed its {deadline:.1f}s deadline")
+            return empty_result, 'timeout'
+
+        except asyncio.CancelledError:
+            breaker.record_cancelled()
+            raise
+
+        except Exception as e:
+            breaker.record_failure()
+            print(f"[DUAL-SOURCE] WARNING: {breaker.name} error: {e}")
+            return empty_result, 'error'
+
+    def get_stats(self) -> Dict:
+        """Breaker state, deadlines and early-exit decisions for monitoring."""
+        return {
+            'early_exit': {
+                'enabled': self.early_exit_enabled,
+                'similarity_threshold': self.early_exit_similarity,
+                'avg_web_latency_seconds': self._web_latency_avg,
+                **self.early_exit_stats
+            },
+            'vector': {
+                'deadline_seconds': self.vector_deadline_seconds,
+                'breaker': self.vector_breaker.get_stats()
+            },
+            'web': {
+                'deadline_seconds': self.web_deadline_seconds,
+                'breaker': self.web_breaker.get_stats()
+            }
+        }
+
     async def _retrieve_from_vector_db(self, query: str) -> Dict:
         """
         Retrieve documents from vector database.
@@ -148,7 +348,7 @@ class DualSourceRAG:
 
         except Exception as e:
             print(f"[VECTOR DB] Error: {e}")
-            raise  # Re-raise to be handled by gather()
+            raise  # Re-raise so the circuit breaker counts it
 
     async def _retrieve_from_web_search(self, query: str) -> Dict:
         """
@@ -172,7 +372,8 @@ class DualSourceRAG:
             # Fetch web search results with full page content
             web_content = await self.web_search.search(
                 query,
-                num_results=self.web_top_results
+                num_results=self.web_top_results,
+                raise_errors=True
             )
 
             if not web_content:
@@ -194,7 +395,7 @@ class DualSourceRAG:
 
         except Exception as e:
             print(f"[WEB SEARCH] Error: {e}")
-            raise  # Re-raise to be handled by gather()
+            raise  # Re-raise so the circuit breaker counts it
 
     def get_source_summary(self, dual_results: Dict) -> str:
         """
@@ -0,0 +1,202 @@
+"""
+Embedding Service - Query encoding with an LRU memo cache
+Each distinct (normalized) query is encoded once and reused by
+verified-fact search, document search and repeat questions.
+Async callers are micro-batched onto a worker thread so concurrent
+chats share one encode() call and the event loop stays free.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+
+
+class EmbeddingService:
+    """Encodes text with the shared embedding model, memoizing query vectors."""
+
+    def __init__(
+        self,
+        model=None,
+        max_size: int = 2048,
+        batch_window_ms: float = 5.0,
+        max_batch_size: int = 32
+    ):
+        """
+        Initialize embedding service.
+
+        Args:
+            model: SentenceTransformer to use (defaults to the process-wide model)
+            max_size: Maximum number of cached query embeddings
+            batch_window_ms: How long to collect async requests before encoding
+            max_batch_size: Flush immediately once this many distinct texts are queued
+        """
+        if model is None:
+            # Imported lazily so the cache can be used (and tested) without supabase installed
+            from .resources import get_embedding_model
+            model = get_embedding_model()
+        self.model = model
+        self.cache: OrderedDict[str, List[float]] = OrderedDict()
+        self.max_size = max_size
+        self._lock = threading.Lock()
+
+        # Micro-batching (async path)
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+        self._pending: Dict[str, List[asyncio.Future]] = {}  # normalized text -> waiting callers
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+        # Stats for monitoring
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+        self.batched_texts = 0
+
+    def _normalize(self, text: str) -> str:
+        """
+        Normalize text for cache lookup: lowercase and collapse whitespace.
+        MiniLM's tokenizer is uncased, so this does not change the embedding.
+        """
+        return ' '.join(text.lower().split())
+
+    def encode(self, text: str) -> List[float]:
+        """
+        Encode a query, returning a cached vector when available.
+
+        Args:
+            text: Query text
+
+        Returns:
+            Embedding as a list of floats
+        """
+        key = self._normalize(text)
+
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        embedding = self.model.encode(key).tolist()
+        self._store(key, embedding)
+        return embedding
+
+    async def encode_async(self, text: str) -> List[float]:
+        """
+        Encode a query without blocking the event loop.
+
+        Cache misses arriving within batch_window_ms of each other are
+        encoded together in a single batched call on a worker thread.
+
+        Args:
+            text: Query text
+
+        Returns:
+            Embedding as a list of floats
+        """
+        key = self._normalize(text)
+
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Hand the queued texts to the worker thread as one batch."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        pending, self._pending = self._pending, {}
+        if pending:
+            asyncio.ensure_future(self._run_batch(pending))
+
+    async def _run_batch(self, pending: Dict[str, List[asyncio.Future]]) -> None:
+        """Encode a batch on the worker thread and resolve every waiting caller."""
+        texts = list(pending)
+        loop = asyncio.get_running_loop()
+
+        try:
+            vectors = await loop.run_in_executor(self._executor, self._encode_batch, texts)
+        except Exception as e:
+            print(f"[EMBEDDINGS] Batch encode failed ({len(texts)} texts): {e}")
+            for waiters in pending.values():
+                for future in waiters:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.batched_texts += len(texts)
+
+        for text, vector in zip(texts, vectors):
+            self._store(text, vector)
+            for future in pending[text]:
+                if not future.done():  # Caller may have been cancelled
+                    future.set_result(vector)
+
+    def _encode_batch(self, texts: List[str]) -> List[List[float]]:
+        """Run one batched encode() call (executes on the worker thread)."""
+        return self.model.encode(texts, batch_size=len(texts)).tolist()
+
+    def _lookup(self, key: str) -> Optional[List[float]]:
+        """Return a cached embedding (updating LRU order and counters)."""
+        with self._lock:
+            if key in self.cache:
+                self.hits += 1
+                self.cache.move_to_end(key)
+                return self.cache[key]
+            self.misses += 1
+            return None
+
+    def _store(self, key: str, embedding: List[float]) -> None:
+        """Insert an embedding, evicting the least recently used entry if full."""
+        with self._lock:
+            if len(self.cache) >= self.max_size and key not in self.cache:
+                self.cache.popitem(last=False)
+            self.cache[key] = embedding
+            self.cache.move_to_end(key)
+
+    def clear(self) -> None:
+        """Clear all cached embeddings."""
+        with self._lock:
+            self.cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        total = self.hits + self.misses
+        return {
+            'size': len(self.cache),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'batches': self.batches,
+            'avg_batch_size': self.batched_texts / self.batches if self.batches else 0.0
+        }
+
+
+_embedding_service: Optional[EmbeddingService] = None
+_service_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Get the process-wide EmbeddingService, creating it on first use."""
+    global _embedding_service
+
+    if _embedding_service is None:
+        with _service_lock:
+            if _embedding_service is None:
+                _embedding_service = EmbeddingService()
+
+    return _embedding_service
@@ -0,0 +1,157 @@
+"""
+Hybrid Search Fusion - Pluggable strategies for combining vector and keyword hits
+legacy: the original formula (average when both, keyword-only * 0.7)
+rrf:    reciprocal-rank fusion (scale-free, uses ranks only)
+zscore: weighted sum of per-list z-normalized scores
+Selected per deployment with HYBRID_FUSION.
+"""
+
+import os
+import statistics
+from abc import ABC, abstractmethod
+from typing import List, Dict, Optional
+
+
+class FusionStrategy(ABC):
+    """Base class: fuse ranked vector hits and keyword hits into one ranking."""
+
+    name = "base"
+
+    def fuse(self, vector_hits: List[Dict], keyword_hits: List[Dict], limit: int) -> List[Dict]:
+        """
+        Fuse two ranked hit lists.
+
+        Args:
+            vector_hits: Docs ranked by vector similarity (must have 'vector_score')
+            keyword_hits: Docs ranked by keyword relevance (must have 'keyword_score')
+            limit: Number of results to return
+
+        Returns:
+            Fused docs, best first. Each doc has 'vector_score', 'keyword_score',
+            'similarity' (legacy-scale confidence) and 'fusion_score' (ranking key).
+        """
+        candidates = self._merge(vector_hits, keyword_hits)
+        scores = self._score(candidates, vector_hits, keyword_hits)
+
+        for doc_id, doc in candidates.items():
+            doc['fusion_score'] = scores[doc_id]
+
+        ranked = sorted(candidates.values(), key=lambda d: d['fusion_score'], reverse=True)
+        return ranked[:limit]
+
+    def _merge(self, vector_hits: List[Dict], keyword_hits: List[Dict]) -> Dict:
+        """Combine both lists by id, keeping both scores."""
+        candidates = {}
+
+        for doc in vector_hits:
+            candidates[doc['id']] = {**doc, 'vector_score': doc.get('vector_score', 0), 'keyword_score': 0}
+
+        for doc in keyword_hits:
+            if doc['id'] in candidates:
+                candidates[doc['id']]['keyword_score'] = doc.get('keyword_score', 0)
+            else:
+                candidates[doc['id']] = {**doc, 'vector_score': 0, 'keyword_score': doc.get('keyword_score', 0)}
+
+        for doc in candidates.values():
+            doc['similarity'] = legacy_similarity(doc['vector_score'], doc['keyword_score'])
+
+        return candidates
+
+    @abstractmethod
+    def _score(self, candidates: Dict, vector_hits: List[Dict], keyword_hits: List[Dict]) -> Dict:
+        """Return {doc id: fusion score} for every candidate (higher is better)."""
+
+
+def legacy_similarity(vector_score: float, keyword_score: float) -> float:
+    """Original fusion formula (also used as the confidence scale for every strategy)."""
+    if vector_score > 0 and keyword_score > 0:
+        return (vector_score + keyword_score) / 2
+    if vector_score > 0:
+        return vector_score
+    return keyword_score * 0.7
+
+
+class LegacyFusion(FusionStrategy):
+    """Rank by the original formula."""
+
+    name = "legacy"
+
+    def _score(self, candidates, vector_hits, keyword_hits):
+        return {doc_id: doc['similarity'] for doc_id, doc in candidates.items()}
+
+
+class RRFFusion(FusionStrategy):
+    """Reciprocal-rank fusion: sum of 1 / (k + rank) over the lists a doc appears in."""
+
+    name = "rrf"
+
+    def __init__(self, k: int = 60):
+        self.k = k
+
+    def _score(self, candidates, vector_hits, keyword_hits):
+        scores = {doc_id: 0.0 for doc_id in candidates}
+        for hits in (vector_hits, keyword_hits):
+            for rank, doc in enumerate(hits, start=1):
+                scores[doc['id']] += 1.0 / (self.k + rank)
+        return scores
+
+
+class WeightedZScoreFusion(FusionStrategy):
+    """Weighted sum of z-normalized scores; docs missing from a list get that list's minimum."""
+
+    name = "zscore"
+
+    def __init__(self, vector_weight: float = 0.6, keyword_weight: float = 0.4):
+        self.vector_weight = vector_weight
+        self.keyword_weight = keyword_weight
+
+    def _z_scores(self, hits: List[Dict], field: str) -> Dict:
+        values = [doc.get(field, 0) for doc in hits]
+        if not values:
+            return {}
+        mean = statistics.fmean(values)
+        std = statistics.pstdev(values)
+        return {doc['id']: (doc.get(field, 0) - mean) / std if std > 0 else 0.0 for doc in hits}
+
+    def _score(self, candidates, vector_hits, keyword_hits):
+        vector_z = self._z_scores(vector_hits, 'vector_score')
+        keyword_z = self._z_scores(keyword_hits, 'keyword_score')
+        vector_floor = min(vector_z.values(), default=0.0)
+        keyword_floor = min(keyword_z.values(), default=0.0)
+
+        return {
+            doc_id: self.vector_weight * vector_z.get(doc_id, vector_floor)
+            + self.keyword_weight * keyword_z.get(doc_id, keyword_floor)
+            for doc_id in candidates
+        }
+
+
+FUSION_STRATEGIES = {
+    "legacy": LegacyFusion,
+    "rrf": RRFFusion,
+    "zscore": WeightedZScoreFusion
+}
+
+
+def get_fusion_strategy(name: Optional[str] = None) -> FusionStrategy:
+    """
+    Build a fusion strategy by name (HYBRID_FUSION env var if omitted).
+
+    Args:
+        name: 'legacy', 'rrf' or 'zscore'
+
+    Returns:
+        FusionStrategy instance (legacy if the name is unknown)
+    """
+    name = (name or os.getenv("HYBRID_FUSION", "legacy")).lower()
+
+    if name == "rrf":
+        return RRFFusion(k=int(os.getenv("RRF_K", "60")))
+    if name == "zscore":
+        return WeightedZScoreFusion(
+            vector_weight=float(os.getenv("FUSION_VECTOR_WEIGHT", "0.6")),
+            keyword_weight=float(os.getenv("FUSION_KEYWORD_WEIGHT", "0.4"))
+        )
+    if name != "legacy":
+        print(f"[WARNING] Unknown HYBRID_FUSION '{name}', using legacy")
+    return LegacyFusion()
@@ -0,0 +1,144 @@
+"""
+HTML Text Extraction - Shared HTML-to-text for web search and data ingestion
+Uses lxml when installed, otherwise a streaming tag stripper (no tree is built).
+Output matches the old BeautifulSoup get_text(separator=' ', strip=True) +
+whitespace cleanup: text nodes joined by single spaces, entities decoded.
+"""
+
+import re
+from html import unescape
+from html.parser import HTMLParser
+from typing import Iterable, Union
+
+try:
+    import lxml.html
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+# Tags removed before extracting text from fetched web pages
+WEB_DROP_TAGS = ('script', 'style', 'nav', 'footer', 'header')
+
+# Tags removed before extracting text from ingested documents
+INGEST_DROP_TAGS = ('script', 'style', 'meta', 'link')
+
+# Elements that never have content (no end tag)
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr'
+}
+
+_XML_DECLARATION = re.compile(r'^\s*<\?xml[^>]*\?>')
+
+
+class _TextStripper(HTMLParser):
+    """Streaming tag stripper: collects text nodes outside dropped tags."""
+
+    def __init__(self, drop_tags: Iterable[str]):
+        super().__init__(convert_charrefs=True)
+        self.drop_tags = set(drop_tags) - VOID_TAGS
+        self.skip_depth = 0
+        self.parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.drop_tags:
+            self.skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.drop_tags and self.skip_depth > 0:
+            self.skip_depth -= 1
+
+    def handle_data(self, data):
+        if self.skip_depth == 0:
+            self.parts.append(data)
+
+
+def _decode(html: Union[str, bytes]) -> str:
+    if isinstance(html, bytes):
+        try:
+            return html.decode('utf-8')
+        except UnicodeDecodeError:
+            return html.decode('latin-1')
+    return html
+
+
+def _extract_lxml(html: str, drop_tags: Iterable[str]) -> Iterable[str]:
+    # lxml rejects str input that carries an encoding declaration
+    html = _XML_DECLARATION.sub('', html, count=1)
+
+    parser = lxml.html.HTMLParser(remove_comments=True, remove_pis=True)
+    try:
+        root = lxml.html.document_fromstring(html, parser=parser)
+    except etree.ParserError:
+        # Empty document
+        return []
+
+    # strip_elements merges each kept tail into the preceding text node;
+    # keep a separator so 'us<script/>today' does not become 'ustoday'
+    for element in root.iter(*drop_tags):
+        if element.tail:
+            element.tail = ' ' + element.tail
+
+    etree.strip_elements(root, *drop_tags, with_tail=False)
+    return root.itertext()
+
+
+def _extract_streaming(html: str, drop_tags: Iterable[str]) -> Iterable[str]:
+    stripper = _TextStripper(drop_tags)
+    stripper.feed(html)
+    stripper.close()
+    return stripper.parts
+
+
+def html_to_text(html: Union[str, bytes], drop_tags: Iterable[str] = WEB_DROP_TAGS) -> str:
+    """
+    Extract readable text from HTML.
+
+    Args:
+        html: HTML document (str, or raw bytes as fetched)
+        drop_tags: Tags whose content is removed entirely
+
+    Returns:
+        Text nodes joined by single spaces with whitespace collapsed
+    """
+    html = _decode(html)
+
+    # Plain text needs no parsing
+    if '<' not in html and '&' not in html:
+        return ' '.join(html.split())
+
+    if LXML_AVAILABLE:
+        parts = _extract_lxml(html, drop_tags)
+    else:
+        parts = _extract_streaming(html, drop_tags)
+
+    # str.split() collapses all whitespace (incl. &nbsp;) much faster than a regex
+    return ' '.join(' '.join(parts).split())
+
+
+def clean_document_html(html_content) -> str:
+    """
+    Ingestion contract used by the migration scripts' clean_html helpers.
+
+    Args:
+        html_content: Document content (non-strings yield "")
+
+    Returns:
+        Cleaned text (the raw content if extraction fails)
+    """
+    if not html_content or not isinstance(html_content, str):
+        return ""
+
+    try:
+        text = html_to_text(html_content, drop_tags=INGEST_DROP_TAGS)
+
+        # Legacy behaviour: entities are unescaped a second time
+        if '&' in text:
+            text = ' '.join(unescape(text).split())
+
+        return text
+    except Exception as e:
+        print(f"[WARNING] Error cleaning HTML: {e}")
+        return str(html_content)
@@ -3,21 +3,152 @@ LLM Service - Ollama DeepSeek Integration
 Uses DeepSeek-R1 for high-quality responses with NO rate limits
 """
 
+import os
 import re
-import requests
-from typing import Optional, List, Dict
+import json
+import time
+import random
+from collections import deque
+import asyncio
+import aiohttp
+from typing import Optional, List, Dict, Any, Tuple, AsyncIterator
 from .relevance_checker import RelevanceChecker
+from .context_merger import DUAL_SOURCE_HEADER
+from .ollama_pool import OllamaBackendPool, create_ollama_pool_from_env
+
+
+class ThinkTagFilter:
+    """
+    Incrementally strips DeepSeek-R1 <think>...</think> spans from streamed text.
+    Tags may be split across chunks, so a possible partial tag is held back
+    until the next chunk arrives.
+    """
+
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+
+    def __init__(self):
+        self.buffer = ""
+        self.in_think = False
+        self.started = False  # Whether any visible text has been emitted
+
+    @staticmethod
+    def _partial_tag_len(text: str, tag: str) -> int:
+        """Length of the longest suffix of text that is a prefix of tag."""
+        for size in range(min(len(tag) - 1, len(text)), 0, -1):
+            if text.endswith(tag[:size]):
+                return size
+        return 0
+
+    def feed(self, text: str) -> str:
+        """Add a chunk and return whatever is now safe to show."""
+        self.buffer += text
+        output = []
+
+        while self.buffer:
+            if self.in_think:
+                idx = self.buffer.find(self.CLOSE_TAG)
+                if idx == -1:
+                    keep = self._partial_tag_len(self.buffer, self.CLOSE_TAG)
+                    self.buffer = self.buffer[len(self.buffer) - keep:]
+                    break
+                self.buffer = self.buffer[idx + len(self.CLOSE_TAG):]
+                self.in_think = False
+            else:
+                idx = self.buffer.find(self.OPEN_TAG)
+                if idx == -1:
+                    keep = self._partial_tag_len(self.buffer, self.OPEN_TAG)
+                    output.append(self.buffer[:len(self.buffer) - keep])
+                    self.buffer = self.buffer[len(self.buffer) - keep:]
+                    break
+                output.append(self.buffer[:idx])
+                self.buffer = self.buffer[idx + len(self.OPEN_TAG):]
+                self.in_think = True
+
+        return self._emit(''.join(output))
+
+    def flush(self) -> str:
+        """Return any held-back text once the stream has ended."""
+        remaining = "" if self.in_think else self.buffer
+        self.buffer = ""
+        return self._emit(remaining)
+
+    def _emit(self, text: str) -> str:
+        # Drop the blank lines DeepSeek leaves after </think>
+        if not self.started:
+            text = text.lstrip()
+            self.started = bool(text)
+        return text
 
 class OllamaLLMService:
     """Service for interacting with Ollama (DeepSeek) API."""
 
+    FULL_NUM_PREDICT = 2000  # Reasoning + answer
+
+    # Per-question rules for dual-source answers (static; part of the cached prompt prefix)
+    DUAL_SOURCE_INSTRUCTIONS = """CRITICAL INSTRUCTIONS FOR EVERY QUESTION:
+1. Read the question carefully
+2. Search BOTH sources for the EXACT answer to that specific question
+3. If you find the exact answer → Provide it with [Local] or [Web] citation
+4. If the exact answer is NOT in either source → Say "I don't have that specific information in either my local knowledge base [Local] or current web results [Web]"
+5. DO NOT provide related/tangential information - answer THAT specific question only
+6. Cite EVERY fact as [Local] or [Web]
+7. If sources conflict, show both with citations
+
+EXAMPLE:
+Question: "Who is the department chair?"
+If NOT in sources → "I don't have information about the current department chair [Local][Web]. Please contact the department directly."
+If in sources → "Dr. Jane Smith is the department chair [Local]"
+
+The sources and the question follow."""
+
+    # Answer-only mode: num_predict by RelevanceChecker question type
+    ANSWER_TOKEN_BUDGETS = {
+        'who': 256,
+        'when': 192,
+        'where': 192,
+        'what specific': 320,
+        'what': 512,
+        'why': 640,
+        'how': 768,
+        'general': 512
+    }
+
     def __init__(self):
         """Initialize Ollama client."""
-        self.base_url = "http://localhost:11434"
         self.model = "Deepseek-R1:7b"  # DeepSeek R1 7B - Reasoning-optimized with anti-hallucination system
+        self.pool: OllamaBackendPool = create_ollama_pool_from_env(self.model)  # OLLAMA_BACKENDS
+        self.base_url = self.pool.primary_url
         self.ready = self._check_ollama_ready()
         self.relevance_checker = RelevanceChecker()  # NEW: Check if responses answer the question
 
+        # Async HTTP client (created lazily inside the running event loop)
+        self.request_timeout = 120  # Default per-call timeout in seconds
+        self.max_connections = 10  # Pooled keep-alive connections per Ollama backend
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # Keep the model resident between bursts (-1 = never unload)
+        keep_alive = os.getenv("OLLAMA_KEEP_ALIVE", "-1")
+        self.keep_alive = int(keep_alive) if keep_alive.lstrip('-').isdigit() else keep_alive
+
+        # Prefill (prompt evaluation) timing per call, from Ollama's response metrics
+        self.prefill_ms = deque(maxlen=500)
+        self.prefill_stats = {'calls': 0, 'prompt_tokens': 0, 'cold_loads': 0}
+
+        # Answer-only generation: skip DeepSeek's <think> phase and size num_predict to the question.
+        # A small sample of requests keeps full reasoning so tokens saved are measured, not guessed.
+        self.answer_only = os.getenv("LLM_ANSWER_ONLY", "false").lower() == "true"
+        self.baseline_sample_rate = float(os.getenv("LLM_ANSWER_ONLY_BASELINE_SAMPLE", "0.05"))
+        self.full_mode_tokens_ema: Optional[float] = None
+        self.generation_stats = {
+            'answer_only': 0,
+            'full': 0,
+            'fallbacks': 0,  # Answer-only runs that produced only reasoning and were retried in full
+            'tokens_generated': 0,
+            'reasoning_tokens': 0,  # Full-mode tokens spent inside <think>
+            'tokens_saved': 0
+        }
+
         # System prompt - Clean and simple
         self.system_prompt_rag = """You are Alli, an AI assistant for San Francisco State University.
 
@@ -79,22 +210,137 @@ FORBIDDEN:
 
 REMEMBER: Answer the EXACT question with EXACT information from sources, or admit you don't have it. No tangents."""
 
+        # Everything that never varies per request, sent byte-identical as the system
+        # message so Ollama reuses its KV cache for it instead of re-prefilling
+        self.dual_source_prefix = "\n\n".join([
+            self.system_prompt_dual_source,
+            DUAL_SOURCE_HEADER.strip(),
+            self.DUAL_SOURCE_INSTRUCTIONS
+        ])
+
     def _check_ollama_ready(self) -> bool:
-        """Check if Ollama is running and model is available."""
+        """Check if at least one Ollama backend is running with the model available."""
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            if response.status_code == 200:
-                models = response.json().get('models', [])
-                model_names = [m['name'] for m in models]
-                return self.model in model_names
-            return False
-        except:
+            return self.pool.check_health_sync()
+        except Exception:
             return False
 
     def is_ready(self) -> bool:
-        """Check if service is ready."""
+        """Check if service is ready (any backend passed its last health check)."""
+        self.ready = any(b.healthy for b in self.pool.backends)
         return self.ready
 
+    async def run_health_checks(self):
+        """Background loop that re-checks every Ollama backend."""
+        await self.pool.run_health_checks(self._get_session)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get Ollama backend pool and generation token stats."""
+        return {
+            'backends': self.pool.get_stats(),
+            'generation': {
+                **self.generation_stats,
+                'answer_only_enabled': self.answer_only,
+                'full_mode_tokens_ema': round(self.full_mode_tokens_ema) if self.full_mode_tokens_ema is not None else None
+            },
+            'prefill': self._prefill_summary()
+        }
+
+    def _prefill_summary(self) -> Dict[str, Any]:
+        """Summarize prompt-evaluation timings."""
+        timings = sorted(self.prefill_ms)
+        calls = self.prefill_stats['calls']
+
+        def percentile(p: float) -> Optional[float]:
+            if not timings:
+                return None
+            return round(timings[min(len(timings) - 1, int(p * len(timings)))], 1)
+
+        return {
+            **self.prefill_stats,
+            'avg_prompt_tokens': round(self.prefill_stats['prompt_tokens'] / calls) if calls else None,
+            'prefill_ms_p50': percentile(0.5),
+            'prefill_ms_p95': percentile(0.95),
+            'keep_alive': self.keep_alive,
+            'static_prefix_chars': len(self.dual_source_prefix)
+        }
+
+    async def warmup(self):
+        """Load the model on every backend and prefill the static dual-source prefix."""
+        session = self._get_session()
+
+        async def warm(backend):
+            start = time.perf_counter()
+            try:
+                async with session.post(
+                    f"{backend.url}/api/chat",
+                    json={
+                        "model": self.model,
+                        "messages": [
+                            {"role": "system", "content": self.dual_source_prefix},
+                            {"role": "user", "content": "Reply OK."}
+                        ],
+                        "stream": False,
+                        "keep_alive": self.keep_alive,
+                        "options": self._dual_source_options(num_predict=1)
+                    },
+                    timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+                ) as response:
+                    data = await response.json() if response.status == 200 else {}
+                print(f"[LLM] Warmed up {backend.url} in {(time.perf_counter() - start) * 1000:.0f}ms "
+                      f"(prefix prefill {data.get('prompt_eval_count', 0)} tokens, "
+                      f"{data.get('prompt_eval_duration', 0) / 1e6:.0f}ms)")
+            except Exception as e:
+                print(f"[WARNING] LLM warm-up failed for {backend.url}: {e}")
+
+        await asyncio.gather(*(warm(b) for b in self.pool.backends))
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared keep-alive session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections * len(self.pool.backends),
+                limit_per_host=self.max_connections,
+                keepalive_timeout=60
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def _post_json(self, path: str, payload: Dict, timeout: Optional[float] = None) -> Tuple[int, Any]:
+        """
+        POST to the least-loaded Ollama backend without blocking the event loop.
+
+        Args:
+            path: API path (e.g. "/api/chat")
+            payload: JSON request body
+            timeout: Per-call timeout in seconds (defaults to self.request_timeout)
+
+        Returns:
+            Tuple of (status code, parsed JSON on 200 or raw text otherwise)
+
+        Raises:
+            asyncio.TimeoutError: If the call exceeds the timeout
+            asyncio.CancelledError: If the caller is cancelled (e.g. client disconnected)
+        """
+        session = self._get_session()
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self.request_timeout)
+
+        async with self.pool.lease() as backend:
+            start = time.perf_counter()
+            async with session.post(f"{backend.url}{path}", json=payload, timeout=client_timeout) as response:
+                if response.status == 200:
+                    data = await response.json()
+                else:
+                    data = await response.text()
+            self.pool.record_response(backend, response.status, time.perf_counter() - start)
+            return response.status, data
+
+    async def close(self):
+        """Close the pooled HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
     def _remove_emojis(self, text: str) -> str:
         """Remove emojis from text to avoid encoding issues."""
         emoji_pattern = re.compile(
@@ -116,7 +362,8 @@ REMEMBER: Answer the EXACT question with EXACT information from sources, or admi
         query: str,
         context: str,
         use_web_context: bool = False,
-        conversation_history: Optional[List[Dict[str, str]]] = None
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        timeout: Optional[float] = None
     ) -> str:
         """
         Generate a response using Ollama DeepSeek.
@@ -126,6 +373,7 @@ REMEMBER: Answer the EXACT question with EXACT information from sources, or admi
             context: Retrieved context (from RAG or web search)
             use_web_context: Whether context includes web search results
             conversation_history: Previous conversation turns
+            timeout: Per-call timeout in seconds (defaults to self.request_timeout)
 
         Returns:
             Generated response text
@@ -167,13 +415,14 @@ YOUR RESPONSE (answer the question "{query}" or admit you don't have it):"""
 
             messages.append({"role": "user", "content": user_prompt})
 
-            # Call Ollama API
-            response = requests.post(
-                f"{self.base_url}/api/chat",
-                json={
+            # Call Ollama API (non-blocking)
+            status_code, data = await self._post_json(
+                "/api/chat",
+                {
                     "model": self.model,
                     "messages": messages,
                     "stream": False,
+                    "keep_alive": self.keep_alive,
                     "options": {
                         "temperature": 0.0,  # ZERO hallucination tolerance - deterministic responses only
                         "num_predict": 2000,  # Max tokens
@@ -181,11 +430,10 @@ YOUR RESPONSE (answer the question "{query}" or admit you don't have it):"""
                         "repeat_penalty": 1.1  # Slight penalty for repetition
                     }
                 },
-                timeout=120  # 2 minute timeout
+                timeout=timeout
             )
 
-            if response.status_code == 200:
-                data = response.json()
+            if status_code == 200:
                 answer = data.get('message', {}).get('content', '').strip()
 
                 # Clean up any thinking tags (DeepSeek-R1 uses these)
@@ -211,136 +459,269 @@ YOUR RESPONSE (answer the question "{query}" or admit you don't have it):"""
 
                 return answer
             else:
-                print(f"[ERROR] Ollama API error: {response.status_code} - {response.text}")
+                print(f"[ERROR] Ollama API error: {status_code} - {data}")
                 return "I'm having trouble generating a response. Please try again."
 
-        except requests.Timeout:
+        except asyncio.TimeoutError:
             return "The request took too long to process. Please try asking in a simpler way."
         except Exception as e:
             print(f"[ERROR] Error generating response: {e}")
             return "I'm sorry, I'm having trouble generating a response right now. Please try again."
 
-    async def generate_dual_source_response(
+    def _build_dual_source_messages(
         self,
         query: str,
         combined_context: str,
         conversation_history: Optional[List[Dict[str, str]]] = None
-    ) -> Dict:
+    ) -> List[Dict[str, str]]:
         """
-        Generate response using dual-source context with ZERO hallucination tolerance.
+        Build the chat messages for a dual-source generation.
+
+        The static prefix (system prompt, source header, instructions) comes
+        first and is identical on every call; history, the per-request
+        context and the question follow it.
+        """
+        messages = [{"role": "system", "content": self.dual_source_prefix}]
+
+        # Add conversation history (last 3 exchanges)
+        if conversation_history:
+            messages.extend(conversation_history[-6:])
+
+        # The source header is already part of the static prefix
+        if combined_context.startswith(DUAL_SOURCE_HEADER):
+            combined_context = combined_context[len(DUAL_SOURCE_HEADER):].lstrip("\n")
+
+        # ContextMerger already packs to its token budget; this is only a safety net
+        max_context_length = 48000
+        if len(combined_context) > max_context_length:
+            combined_context = combined_context[:max_context_length] + "\n\n[Context truncated]"
+
+        # Dual-source prompt - STRICT
+        user_prompt = f"""{combined_context}
+
+QUESTION TO ANSWER: {query}
+
+YOUR RESPONSE (answer "{query}" exactly, with [Local]/[Web] citations, or admit you don't have it):"""
+
+        messages.append({"role": "user", "content": user_prompt})
+        return messages
+
+    def _dual_source_options(self, num_predict: int = FULL_NUM_PREDICT) -> Dict[str, Any]:
+        """Ollama sampling options for dual-source generation."""
+        return {
+            "temperature": 0.0,  # ZERO hallucination tolerance
+            "num_predict": num_predict,
+            "top_p": 0.9,
+            "repeat_penalty": 1.1
+        }
+
+    def _generation_plan(self, query: str, force_full: bool = False) -> Dict[str, Any]:
+        """
+        Decide how to generate an answer for this query.
 
         Args:
             query: User's question
-            combined_context: Merged context from both sources (formatted by ContextMerger)
-            conversation_history: Previous conversation turns
+            force_full: Skip answer-only mode (fallback after an empty answer)
 
         Returns:
-            Dict with response, validation results, and metadata
+            Dict with mode ('answer_only' or 'full'), question_type and num_predict
         """
-        try:
-            # Use dual-source system prompt
-            system_prompt = self.system_prompt_dual_source
+        question_type = self.relevance_checker._extract_question_type(query)
 
-            # Build messages
-            messages = [{"role": "system", "content": system_prompt}]
+        if self.answer_only and not force_full and random.random() >= self.baseline_sample_rate:
+            return {
+                'mode': 'answer_only',
+                'question_type': question_type,
+                'num_predict': self.ANSWER_TOKEN_BUDGETS.get(question_type, self.ANSWER_TOKEN_BUDGETS['general'])
+            }
 
-            # Add conversation history (last 3 exchanges)
-            if conversation_history:
-                messages.extend(conversation_history[-6:])
+        return {'mode': 'full', 'question_type': question_type, 'num_predict': self.FULL_NUM_PREDICT}
+
+    def _dual_source_payload(self, messages: List[Dict[str, str]], plan: Dict[str, Any], stream: bool) -> Dict[str, Any]:
+        """Build the /api/chat request body for a generation plan."""
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": self._dual_source_options(plan['num_predict'])
+        }
+        if plan['mode'] == 'answer_only':
+            payload["think"] = False  # Ollama skips the reasoning phase for thinking models
+        return payload
+
+    def _record_generation(self, plan: Dict[str, Any], eval_count: int, raw_chars: int, visible_chars: int) -> Dict[str, Any]:
+        """
+        Account for the tokens one generation used (and saved).
 
-            # Truncate context if too long
-            max_context_length = 30000
-            if len(combined_context) > max_context_length:
-                combined_context = combined_context[:max_context_length] + "\n\n[Context truncated]"
+        Args:
+            plan: Generation plan from _generation_plan
+            eval_count: Tokens generated (Ollama eval_count)
+            raw_chars: Characters generated, including any <think> span
+            visible_chars: Characters left after removing <think>
 
-            # Dual-source prompt - STRICT
-            user_prompt = f"""QUESTION TO ANSWER: {query}
+        Returns:
+            Per-request generation report
+        """
+        report = {**plan, 'eval_count': eval_count, 'reasoning_tokens': 0, 'tokens_saved': None}
+        self.generation_stats[plan['mode']] += 1
+        self.generation_stats['tokens_generated'] += eval_count
+
+        if plan['mode'] == 'full':
+            # Apportion tokens to the <think> span by its share of the output
+            if raw_chars:
+                report['reasoning_tokens'] = round(eval_count * (raw_chars - visible_chars) / raw_chars)
+            self.generation_stats['reasoning_tokens'] += report['reasoning_tokens']
+            if eval_count:
+                if self.full_mode_tokens_ema is None:
+                    self.full_mode_tokens_ema = float(eval_count)
+                else:
+                    self.full_mode_tokens_ema += 0.1 * (eval_count - self.full_mode_tokens_ema)
+        elif self.full_mode_tokens_ema is not None:
+            report['tokens_saved'] = max(0, round(self.full_mode_tokens_ema - eval_count))
+            self.generation_stats['tokens_saved'] += report['tokens_saved']
+
+        saved = f", ~{report['tokens_saved']} saved" if report['tokens_saved'] is not None else ""
+        print(f"[LLM] {plan['mode']} ({plan['question_type']}, cap {plan['num_predict']}): "
+              f"{eval_count} tokens, {report['reasoning_tokens']} reasoning{saved}")
+        return report
+
+    def _record_prefill(self, metrics: Dict[str, Any], first_chunk_ms: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Record prompt-evaluation (prefill) timing for one call.
 
-{combined_context}
+        Ollama only evaluates prompt tokens it has no KV cache for, so a
+        reused static prefix shows up as a smaller prompt_eval_count.
 
-CRITICAL INSTRUCTIONS:
-1. Read the question carefully: "{query}"
-2. Search BOTH sources above for the EXACT answer to this specific question
-3. If you find the exact answer → Provide it with [Local] or [Web] citation
-4. If the exact answer is NOT in either source → Say "I don't have that specific information in either my local knowledge base [Local] or current web results [Web]"
-5. DO NOT provide related/tangential information - answer THIS specific question only
-6. Cite EVERY fact as [Local] or [Web]
-7. If sources conflict, show both with citations
+        Args:
+            metrics: Final Ollama response object (durations in nanoseconds)
+            first_chunk_ms: Time to the first streamed chunk, if streaming
 
-EXAMPLE:
-Question: "Who is the department chair?"
-If NOT in sources → "I don't have information about the current department chair [Local][Web]. Please contact the department directly."
-If in sources → "Dr. Jane Smith is the department chair [Local]"
+        Returns:
+            Per-call prefill report
+        """
+        prompt_tokens = metrics.get('prompt_eval_count', 0)
+        prefill_ms = metrics.get('prompt_eval_duration', 0) / 1e6
+        load_ms = metrics.get('load_duration', 0) / 1e6
+
+        self.prefill_stats['calls'] += 1
+        self.prefill_stats['prompt_tokens'] += prompt_tokens
+        if load_ms > 1000:
+            self.prefill_stats['cold_loads'] += 1  # Model had to be (re)loaded
+        self.prefill_ms.append(prefill_ms)
+
+        first_chunk = f", first chunk {first_chunk_ms:.0f}ms" if first_chunk_ms is not None else ""
+        print(f"[LLM] Prefill: {prompt_tokens} prompt tokens in {prefill_ms:.0f}ms (load {load_ms:.0f}ms{first_chunk})")
+
+        return {
+            'prompt_eval_count': prompt_tokens,
+            'prompt_eval_ms': round(prefill_ms, 1),
+            'load_ms': round(load_ms, 1),
+            'first_chunk_ms': round(first_chunk_ms, 1) if first_chunk_ms is not None else None
+        }
+
+    def _finalize_dual_source_answer(self, query: str, answer: str, combined_context: str) -> Dict:
+        """
+        Run emoji cleanup, relevance check and citation validation on a
+        completed (think-stripped) dual-source answer.
+        """
+        # Remove emojis
+        answer = self._remove_emojis(answer)
+
+        # CRITICAL: Check if response is relevant to the question
+        relevance = self.relevance_checker.check_relevance(query, answer, combined_context)
+
+        if not relevance['is_relevant'] and not relevance['admits_missing']:
+            print(f"[RELEVANCE CHECK FAILED] Response doesn't answer the question!")
+            print(f"  Question: {query}")
+            print(f"  Issues: {relevance['issues']}")
+            print(f"  Replacing with admission of missing info...")
+
+            # Replace with honest "don't know" response
+            answer = "I don't have that specific information in either my local knowledge base [Local] or current web results [Web]. Please contact the relevant SFSU office or visit sfsu.edu for accurate details."
+
+        # Basic validation
+        has_local = '[Local]' in answer or '[local]' in answer
+        has_web = '[Web]' in answer or '[web]' in answer
+        citation_count = answer.count('[Local]') + answer.count('[local]') + answer.count('[Web]') + answer.count('[web]')
+
+        return {
+            'response': answer,
+            'validated': has_local or has_web,
+            'has_citations': has_local or has_web,
+            'citation_count': citation_count,
+            'validation_warnings': [] if (has_local or has_web) else ['No source citations found'],
+            'relevance_check': relevance
+        }
 
-YOUR RESPONSE (answer "{query}" exactly, with [Local]/[Web] citations, or admit you don't have it):"""
+    async def generate_dual_source_response(
+        self,
+        query: str,
+        combined_context: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        timeout: Optional[float] = None
+    ) -> Dict:
+        """
+        Generate response using dual-source context with ZERO hallucination tolerance.
 
-            messages.append({"role": "user", "content": user_prompt})
+        Args:
+            query: User's question
+            combined_context: Merged context from both sources (formatted by ContextMerger)
+            conversation_history: Previous conversation turns
+            timeout: Per-call timeout in seconds (defaults to self.request_timeout)
 
-            # Call Ollama API with temperature 0.0
-            response = requests.post(
-                f"{self.base_url}/api/chat",
-                json={
-                    "model": self.model,
-                    "messages": messages,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.0,  # ZERO hallucination tolerance
-                        "num_predict": 2000,
-                        "top_p": 0.9,
-                        "repeat_penalty": 1.1
-                    }
-                },
-                timeout=120
+        Returns:
+            Dict with response, validation results, and metadata
+        """
+        try:
+            messages = self._build_dual_source_messages(query, combined_context, conversation_history)
+            plan = self._generation_plan(query)
+
+            # Call Ollama API with temperature 0.0 (non-blocking)
+            status_code, data = await self._post_json(
+                "/api/chat",
+                self._dual_source_payload(messages, plan, stream=False),
+                timeout=timeout
             )
 
-            if response.status_code == 200:
-                data = response.json()
+            if status_code == 200 and plan['mode'] == 'answer_only':
+                raw_answer = data.get('message', {}).get('content', '').strip()
+                if not re.sub(r'<think>.*?(</think>|$)', '', raw_answer, flags=re.DOTALL).strip():
+                    # Server ignored think=False and the capped budget ran out mid-reasoning
+                    print(f"[LLM] Answer-only produced no answer, retrying with full reasoning")
+                    self.generation_stats['tokens_generated'] += data.get('eval_count', 0)
+                    self.generation_stats['fallbacks'] += 1
+                    plan = self._generation_plan(query, force_full=True)
+                    status_code, data = await self._post_json(
+                        "/api/chat",
+                        self._dual_source_payload(messages, plan, stream=False),
+                        timeout=timeout
+                    )
+
+            if status_code == 200:
                 answer = data.get('message', {}).get('content', '').strip()
+                raw_chars = len(answer)
 
                 # Clean up thinking tags
                 if "<think>" in answer and "</think>" in answer:
-                    import re
                     answer = re.sub(r'<think>.*?</think>', '', answer, flags=re.DOTALL).strip()
 
-                # Remove emojis
-                answer = self._remove_emojis(answer)
-
-                # CRITICAL: Check if response is relevant to the question
-                relevance = self.relevance_checker.check_relevance(query, answer, combined_context)
-
-                if not relevance['is_relevant'] and not relevance['admits_missing']:
-                    print(f"[RELEVANCE CHECK FAILED] Response doesn't answer the question!")
-                    print(f"  Question: {query}")
-                    print(f"  Issues: {relevance['issues']}")
-                    print(f"  Replacing with admission of missing info...")
-
-                    # Replace with honest "don't know" response
-                    answer = "I don't have that specific information in either my local knowledge base [Local] or current web results [Web]. Please contact the relevant SFSU office or visit sfsu.edu for accurate details."
-
-                # Basic validation
-                has_local = '[Local]' in answer or '[local]' in answer
-                has_web = '[Web]' in answer or '[web]' in answer
-                citation_count = answer.count('[Local]') + answer.count('[local]') + answer.count('[Web]') + answer.count('[web]')
-
-                return {
-                    'response': answer,
-                    'validated': has_local or has_web,
-                    'has_citations': has_local or has_web,
-                    'citation_count': citation_count,
-                    'validation_warnings': [] if (has_local or has_web) else ['No source citations found'],
-                    'relevance_check': relevance
-                }
+                generation = self._record_generation(plan, data.get('eval_count', 0), raw_chars, len(answer))
+                result = self._finalize_dual_source_answer(query, answer, combined_context)
+                result['generation'] = generation
+                result['prefill'] = self._record_prefill(data)
+                return result
             else:
-                print(f"[ERROR] Ollama API error: {response.status_code}")
+                print(f"[ERROR] Ollama API error: {status_code}")
                 return {
                     'response': "I'm having trouble generating a response. Please try again.",
                     'validated': False,
                     'has_citations': False,
                     'citation_count': 0,
-                    'error': f'API error: {response.status_code}'
+                    'error': f'API error: {status_code}'
                 }
 
-        except requests.Timeout:
+        except asyncio.TimeoutError:
             return {
                 'response': "The request took too long to process. Please try asking in a simpler way.",
                 'validated': False,
@@ -358,33 +739,156 @@ YOUR RESPONSE (answer "{query}" exactly, with [Local]/[Web] citations, or admit
                 'error': str(e)
             }
 
-    async def generate_simple_response(self, prompt: str) -> str:
+    async def stream_dual_source_response(
+        self,
+        query: str,
+        combined_context: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        timeout: Optional[float] = None,
+        force_full_reasoning: bool = False
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream a dual-source response token by token.
+
+        DeepSeek's <think>...</think> span is suppressed on the fly. Once the
+        stream completes, the full answer goes through the same relevance
+        check and citation validation as generate_dual_source_response.
+
+        Args:
+            query: User's question
+            combined_context: Merged context from both sources (formatted by ContextMerger)
+            conversation_history: Previous conversation turns
+            timeout: Overall timeout in seconds (defaults to self.request_timeout)
+            force_full_reasoning: Bypass answer-only mode (used for its fallback)
+
+        Yields:
+            {'type': 'token', 'content': str} for each visible chunk, then
+            {'type': 'done', 'result': Dict} with the validated final result
+        """
+        messages = self._build_dual_source_messages(query, combined_context, conversation_history)
+        plan = self._generation_plan(query, force_full=force_full_reasoning)
+        think_filter = ThinkTagFilter()
+        visible_parts = []
+        raw_chars = 0
+        eval_count = 0
+        final_chunk: Dict[str, Any] = {}
+        first_chunk_ms = None
+
+        try:
+            session = self._get_session()
+            client_timeout = aiohttp.ClientTimeout(total=timeout or self.request_timeout)
+
+            async with self.pool.lease() as backend:
+                started = time.perf_counter()
+                async with session.post(
+                    f"{backend.url}/api/chat",
+                    json=self._dual_source_payload(messages, plan, stream=True),
+                    timeout=client_timeout
+                ) as response:
+                    if response.status != 200:
+                        print(f"[ERROR] Ollama API error: {response.status}")
+                        self.pool.record_response(backend, response.status, time.perf_counter() - started)
+                        yield {'type': 'done', 'result': {
+                            'response': "I'm having trouble generating a response. Please try again.",
+                            'validated': False,
+                            'has_citations': False,
+                            'citation_count': 0,
+                            'error': f'API error: {response.status}'
+                        }}
+                        return
+
+                    # Ollama streams newline-delimited JSON objects
+                    async for line in response.content:
+                        if not line.strip():
+                            continue
+
+                        chunk = json.loads(line)
+                        if first_chunk_ms is None:
+                            first_chunk_ms = (time.perf_counter() - started) * 1000
+                        content = chunk.get('message', {}).get('content', '')
+                        raw_chars += len(content)
+                        visible = think_filter.feed(content)
+                        if visible:
+                            visible = self._remove_emojis(visible)
+                            visible_parts.append(visible)
+                            yield {'type': 'token', 'content': visible}
+
+                        if chunk.get('done'):
+                            final_chunk = chunk
+                            eval_count = chunk.get('eval_count', 0)
+                            break
+
+                self.pool.record_response(backend, 200, time.perf_counter() - started)
+
+            tail = think_filter.flush()
+            if tail:
+                visible_parts.append(tail)
+                yield {'type': 'token', 'content': tail}
+
+            answer = ''.join(visible_parts).strip()
+
+            if not answer and plan['mode'] == 'answer_only':
+                # Server ignored think=False and the capped budget ran out mid-reasoning
+                print(f"[LLM] Answer-only produced no answer, retrying with full reasoning")
+                self.generation_stats['tokens_generated'] += eval_count
+                self.generation_stats['fallbacks'] += 1
+                async for event in self.stream_dual_source_response(
+                    query, combined_context, conversation_history, timeout, force_full_reasoning=True
+                ):
+                    yield event
+                return
+
+            result = self._finalize_dual_source_answer(query, answer, combined_context)
+            result['generation'] = self._record_generation(plan, eval_count, raw_chars, len(answer))
+            result['prefill'] = self._record_prefill(final_chunk, first_chunk_ms)
+            yield {'type': 'done', 'result': result}
+
+        except asyncio.TimeoutError:
+            yield {'type': 'done', 'result': {
+                'response': "The request took too long to process. Please try asking in a simpler way.",
+                'validated': False,
+                'has_citations': False,
+                'citation_count': 0,
+                'error': 'timeout'
+            }}
+        except Exception as e:
+            print(f"[ERROR] Error streaming dual-source response: {e}")
+            yield {'type': 'done', 'result': {
+                'response': "I'm sorry, I'm having trouble generating a response right now. Please try again.",
+                'validated': False,
+                'has_citations': False,
+                'citation_count': 0,
+                'error': str(e)
+            }}
+
+    async def generate_simple_response(self, prompt: str, timeout: Optional[float] = 60) -> str:
         """
         Generate a simple response without context (for direct queries).
 
         Args:
             prompt: Direct prompt to the model
+            timeout: Per-call timeout in seconds
 
         Returns:
             Generated response
         """
         try:
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={
+            status_code, data = await self._post_json(
+                "/api/generate",
+                {
                     "model": self.model,
                     "prompt": prompt,
                     "stream": False,
+                    "keep_alive": self.keep_alive,
                     "options": {
                         "temperature": 0.5,
                         "num_predict": 512
                     }
                 },
-                timeout=60
+                timeout=timeout
             )
 
-            if response.status_code == 200:
-                data = response.json()
+            if status_code == 200:
                 answer = data.get('response', '').strip()
 
                 # Clean up thinking tags
@@ -396,6 +900,8 @@ YOUR RESPONSE (answer "{query}" exactly, with [Local]/[Web] citations, or admit
             else:
                 return "I'm sorry, I encountered an error processing your request."
 
+        except asyncio.TimeoutError:
+            return "The request took too long to process. Please try asking in a simpler way."
         except Exception as e:
             print(f"[ERROR] Error generating simple response: {e}")
             return "I'm sorry, I encountered an error processing your request."
@@ -0,0 +1,241 @@
+"""
+Local Vector Index - In-process retrieval without a Supabase round trip
+Loads table embeddings into a normalized float32 NumPy matrix, persisted as
+a memory-mapped .npy file so every uvicorn worker on a host shares the pages
+"""
+
+import os
+import json
+import time
+import threading
+import numpy as np
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Tuple
+from supabase import Client
+
+try:
+    import fcntl  # Cross-process refresh lock (POSIX only)
+except ImportError:
+    fcntl = None
+
+
+class LocalVectorIndex:
+    """
+    Brute-force cosine index over one table's `embedding` column.
+    ~28.5k x 384 float32 is ~44 MB and a full scan is a single matrix-vector product.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        table: str,
+        columns: str,
+        cache_dir: str,
+        max_age_seconds: int = 3600
+    ):
+        """
+        Initialize local index.
+
+        Args:
+            client: Supabase client used to (re)load rows
+            table: Table to index (must have an `embedding` column)
+            columns: Columns to keep for results (besides embedding)
+            cache_dir: Directory for the memory-mapped matrix + row metadata
+            max_age_seconds: On-disk snapshot older than this is reloaded from Supabase
+        """
+        self.client = client
+        self.table = table
+        self.columns = columns
+        self.cache_dir = cache_dir
+        self.max_age_seconds = max_age_seconds
+
+        self.matrix_path = os.path.join(cache_dir, f"{table}_embeddings.npy")
+        self.rows_path = os.path.join(cache_dir, f"{table}_rows.json")
+        self.lock_path = os.path.join(cache_dir, f"{table}.lock")
+
+        # (matrix, rows) swapped atomically on refresh
+        self._data: Optional[Tuple[np.ndarray, List[Dict]]] = None
+        self._refresh_lock = threading.Lock()
+        self.loaded_at = 0.0
+        self._loaded_mtime_ns = 0  # mtime of the snapshot currently in memory
+
+    @property
+    def ready(self) -> bool:
+        """Whether the index has data to search."""
+        return self._data is not None
+
+    @property
+    def size(self) -> int:
+        """Number of indexed rows."""
+        return len(self._data[1]) if self._data else 0
+
+    def load(self, force_refresh: bool = False) -> None:
+        """
+        Load the index, preferring a fresh on-disk snapshot over Supabase.
+
+        Only one worker on the host pulls from Supabase at a time; workers
+        that waited for it find a fresh snapshot and read that instead.
+
+        Args:
+            force_refresh: Always pull rows from Supabase and rewrite the snapshot
+        """
+        with self._refresh_lock:
+            start = time.time()
+
+            if not force_refresh and self._snapshot_is_fresh():
+                source = "snapshot"
+            else:
+                with self._host_lock():
+                    if not force_refresh and self._snapshot_is_fresh():
+                        source = "snapshot"
+                    else:
+                        self._write_snapshot(*self._fetch_from_supabase())
+                        source = "supabase"
+
+            mtime_ns = self._snapshot_mtime_ns()
+            matrix, rows = self._read_snapshot()
+
+            # Another worker may have swapped one file but not yet the other
+            if matrix.shape[0] != len(rows):
+                time.sleep(0.5)
+                matrix, rows = self._read_snapshot()
+            if matrix.shape[0] != len(rows):
+                self._write_snapshot(*self._fetch_from_supabase())
+                mtime_ns = self._snapshot_mtime_ns()
+                matrix, rows = self._read_snapshot()
+                source = "supabase"
+
+            self._data = (matrix, rows)
+            self.loaded_at = time.time()
+            self._loaded_mtime_ns = mtime_ns
+
+            print(f"[LOCAL INDEX] {self.table}: {len(rows)} rows loaded from {source} "
+                  f"in {time.time() - start:.1f}s")
+
+    def snapshot_changed(self) -> bool:
+        """Whether another worker has rewritten the on-disk snapshot since it was loaded."""
+        try:
+            return self._snapshot_mtime_ns() != self._loaded_mtime_ns
+        except OSError:
+            return False
+
+    def search(self, query_embedding: List[float], limit: int, threshold: float) -> List[Dict]:
+        """
+        Cosine-similarity search.
+
+        Args:
+            query_embedding: Query vector
+            limit: Maximum number of rows to return
+            threshold: Minimum cosine similarity
+
+        Returns:
+            Row dicts (same columns as the table RPCs) with a `similarity` key,
+            best match first
+        """
+        if self._data is None:
+            return []
+
+        matrix, rows = self._data
+        if not rows:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+
+        scores = matrix @ (query / norm)
+
+        k = min(limit, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            {**rows[i], 'similarity': float(scores[i])}
+            for i in top
+            if scores[i] > threshold
+        ]
+
+    def _snapshot_is_fresh(self) -> bool:
+        """Check whether an on-disk snapshot exists and is recent enough."""
+        if not (os.path.exists(self.matrix_path) and os.path.exists(self.rows_path)):
+            return False
+        return time.time() - os.path.getmtime(self.matrix_path) < self.max_age_seconds
+
+    @contextmanager
+    def _host_lock(self):
+        """Exclusive lock shared by every worker on the host (no-op without fcntl)."""
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self.lock_path, 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _snapshot_mtime_ns(self) -> int:
+        # The matrix file is replaced last, so its mtime marks a complete snapshot
+        return os.stat(self.matrix_path).st_mtime_ns
+
+    def _fetch_from_supabase(self, page_size: int = 1000) -> Tuple[np.ndarray, List[Dict]]:
+        """Page through the table and build a row-normalized embedding matrix."""
+        vectors = []
+        rows = []
+        offset = 0
+
+        while True:
+            result = self.client.table(self.table)\
+                .select(f"{self.columns}, embedding")\
+                .order("id")\
+                .range(offset, offset + page_size - 1)\
+                .execute()
+
+            batch = result.data or []
+
+            for row in batch:
+                embedding = row.pop('embedding', None)
+                if embedding is None:
+                    continue
+                # PostgREST returns pgvector columns as a string like "[0.1,0.2,...]"
+                if isinstance(embedding, str):
+                    embedding = json.loads(embedding)
+                vectors.append(embedding)
+                rows.append(row)
+
+            if len(batch) < page_size:
+                break
+            offset += page_size
+
+        if not vectors:
+            return np.zeros((0, 384), dtype=np.float32), rows
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+
+        return matrix / norms, rows
+
+    def _read_snapshot(self) -> Tuple[np.ndarray, List[Dict]]:
+        """Memory-map the matrix and read row metadata from disk."""
+        matrix = np.load(self.matrix_path, mmap_mode='r')
+        with open(self.rows_path, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+        return matrix, rows
+
+    def _write_snapshot(self, matrix: np.ndarray, rows: List[Dict]) -> None:
+        """Atomically replace the on-disk snapshot (safe for concurrent readers)."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        matrix_tmp = f"{self.matrix_path}.{os.getpid()}.tmp"
+        rows_tmp = f"{self.rows_path}.{os.getpid()}.tmp"
+
+        with open(matrix_tmp, 'wb') as f:
+            np.save(f, matrix)
+        with open(rows_tmp, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, default=str)
+
+        os.replace(rows_tmp, self.rows_path)
+        os.replace(matrix_tmp, self.matrix_path)
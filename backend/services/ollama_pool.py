@@ -0,0 +1,329 @@
+"""
+Ollama Backend Pool - Spread generations across several Ollama servers
+Each request goes to the healthy backend with the fewest in-flight generations
+Backends are health-checked through /api/tags and ejected when dead or slow
+"""
+
+import os
+import time
+import asyncio
+import aiohttp
+import requests
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable
+
+
+class OllamaBackend:
+    """One Ollama server and its load/health counters."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip('/')
+        self.in_flight = 0
+        self.healthy = True
+        self.ejected_until = 0.0
+        self.consecutive_failures = 0
+        self.latency_ema: Optional[float] = None  # Seconds per successful call
+        self.samples = 0
+        self.last_error: Optional[str] = None
+        self.last_check_ms: Optional[float] = None
+
+        # Stats for monitoring
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.ejections = 0
+
+    def is_available(self, now: float) -> bool:
+        """Healthy and not inside an ejection window."""
+        return self.healthy and now >= self.ejected_until
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'url': self.url,
+            'available': self.is_available(time.time()),
+            'healthy': self.healthy,
+            'ejected_for_seconds': round(max(0.0, self.ejected_until - time.time()), 1),
+            'in_flight': self.in_flight,
+            'requests': self.requests,
+            'successes': self.successes,
+            'failures': self.failures,
+            'ejections': self.ejections,
+            'latency_ema_seconds': round(self.latency_ema, 2) if self.latency_ema is not None else None,
+            'last_health_check_ms': self.last_check_ms,
+            'last_error': self.last_error
+        }
+
+
+class OllamaBackendPool:
+    """Least-outstanding-requests router over a set of Ollama servers."""
+
+    def __init__(
+        self,
+        urls: List[str],
+        model: str,
+        failure_threshold: int = 2,
+        eject_seconds: float = 30.0,
+        health_interval: float = 15.0,
+        health_timeout: float = 3.0,
+        slow_factor: float = 3.0
+    ):
+        """
+        Initialize backend pool.
+
+        Args:
+            urls: Ollama base URLs (e.g. http://localhost:11434)
+            model: Model every backend must serve (checked via /api/tags)
+            failure_threshold: Consecutive failed calls before a backend is ejected
+            eject_seconds: How long an ejected backend sits out before it may rejoin
+            health_interval: Seconds between background /api/tags checks
+            health_timeout: /api/tags slower than this counts as unhealthy
+            slow_factor: Eject a backend whose latency EMA exceeds this multiple of the fastest one
+        """
+        if not urls:
+            raise ValueError("At least one Ollama backend URL is required")
+
+        self.backends = [OllamaBackend(url) for url in dict.fromkeys(urls)]
+        self.model = model
+        self.failure_threshold = failure_threshold
+        self.eject_seconds = eject_seconds
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.slow_factor = slow_factor
+        self.min_samples_for_slow = 5
+        self.ema_alpha = 0.2
+
+        self._next = 0  # Rotates ties so idle backends share load evenly
+        self.no_backend_available = 0
+
+    @property
+    def primary_url(self) -> str:
+        return self.backends[0].url
+
+    def pick(self) -> OllamaBackend:
+        """
+        Choose the available backend with the fewest in-flight requests.
+
+        Falls back to the whole pool if every backend is ejected/unhealthy,
+        so a flapping health check never takes generation fully offline.
+        """
+        now = time.time()
+        candidates = [b for b in self.backends if b.is_available(now)]
+        if not candidates:
+            self.no_backend_available += 1
+            candidates = self.backends
+
+        start = self._next % len(candidates)
+        self._next += 1
+
+        best = min(
+            range(len(candidates)),
+            key=lambda i: (candidates[i].in_flight, (i - start) % len(candidates))
+        )
+        return candidates[best]
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[OllamaBackend]:
+        """
+        Reserve a backend for one call.
+
+        Connection errors raised inside the block count as failures;
+        callers report HTTP outcomes (5xx) with record_response(). A
+        timeout only means the backend is slow (long generations hit it
+        too), so it is recorded as a latency sample, not a failure.
+        Cancellation (client went away) is not held against the backend.
+        """
+        backend = self.pick()
+        backend.in_flight += 1
+        backend.requests += 1
+        start = time.perf_counter()
+
+        try:
+            yield backend
+        except asyncio.TimeoutError:
+            # Checked first: TimeoutError is an OSError subclass on Python 3.11+
+            self._record_latency(backend, time.perf_counter() - start)
+            raise
+        except (aiohttp.ClientConnectionError, OSError) as e:
+            self.record_failure(backend, f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            backend.in_flight -= 1
+
+    def record_response(self, backend: OllamaBackend, status: int, elapsed: float):
+        """
+        Record a completed HTTP call.
+
+        Args:
+            backend: Backend that served the call
+            status: HTTP status code (5xx counts as a backend failure)
+            elapsed: Call duration in seconds
+        """
+        if status >= 500:
+            self.record_failure(backend, f"HTTP {status}")
+        else:
+            self.record_success(backend, elapsed)
+
+    def record_success(self, backend: OllamaBackend, elapsed: float):
+        backend.successes += 1
+        backend.consecutive_failures = 0
+        self._record_latency(backend, elapsed)
+
+    def _record_latency(self, backend: OllamaBackend, elapsed: float):
+        backend.samples += 1
+        if backend.latency_ema is None:
+            backend.latency_ema = elapsed
+        else:
+            backend.latency_ema += self.ema_alpha * (elapsed - backend.latency_ema)
+
+        self._eject_if_slow(backend)
+
+    def record_failure(self, backend: OllamaBackend, reason: str):
+        backend.failures += 1
+        backend.consecutive_failures += 1
+        backend.last_error = reason
+
+        if backend.consecutive_failures >= self.failure_threshold:
+            self._eject(backend, f"{backend.consecutive_failures} consecutive failure(s): {reason}")
+
+    def _eject_if_slow(self, backend: OllamaBackend):
+        """Eject a backend that is consistently much slower than the fastest peer."""
+        if len(self.backends) < 2 or backend.samples < self.min_samples_for_slow:
+            return
+
+        now = time.time()
+        peer_latencies = [
+            b.latency_ema for b in self.backends
+            if b is not backend and b.is_available(now)
+            and b.latency_ema is not None and b.samples >= self.min_samples_for_slow
+        ]
+        if peer_latencies and backend.latency_ema > self.slow_factor * min(peer_latencies):
+            self._eject(backend, f"slow ({backend.latency_ema:.1f}s vs {min(peer_latencies):.1f}s)")
+
+    def _eject(self, backend: OllamaBackend, reason: str):
+        if time.time() < backend.ejected_until:
+            return
+        backend.ejected_until = time.time() + self.eject_seconds
+        backend.ejections += 1
+        print(f"[OLLAMA POOL] Ejected {backend.url} for {self.eject_seconds:.0f}s: {reason}")
+
+    def _apply_health(self, backend: OllamaBackend, healthy: bool, elapsed_ms: float, error: Optional[str]):
+        """Update a backend from a health check result."""
+        backend.last_check_ms = round(elapsed_ms, 1)
+
+        if healthy and not backend.healthy:
+            print(f"[OLLAMA POOL] {backend.url} is healthy again")
+        elif not healthy and backend.healthy:
+            print(f"[OLLAMA POOL] {backend.url} failed health check: {error}")
+
+        backend.healthy = healthy
+        if error:
+            backend.last_error = error
+
+        # Ejection window over and the backend answers: start it with a clean slate
+        if healthy and backend.ejected_until and time.time() >= backend.ejected_until:
+            backend.ejected_until = 0.0
+            backend.consecutive_failures = 0
+            backend.latency_ema = None
+            backend.samples = 0
+
+    def _tags_verdict(self, status: int, body: Any, elapsed_ms: float) -> Optional[str]:
+        """Return None if an /api/tags response means healthy, else the reason."""
+        if status != 200:
+            return f"/api/tags returned {status}"
+        model_names = [m.get('name') for m in body.get('models', [])]
+        if self.model not in model_names:
+            return f"model {self.model} not loaded"
+        if elapsed_ms > self.health_timeout * 1000:
+            return f"/api/tags took {elapsed_ms:.0f}ms"
+        return None
+
+    def check_health_sync(self) -> bool:
+        """
+        Blocking health check of every backend (used once at startup).
+
+        Returns:
+            True if at least one backend is healthy
+        """
+        for backend in self.backends:
+            start = time.perf_counter()
+            try:
+                response = requests.get(f"{backend.url}/api/tags", timeout=self.health_timeout)
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                body = response.json() if response.status_code == 200 else None
+                error = self._tags_verdict(response.status_code, body, elapsed_ms)
+            except Exception as e:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                error = f"{type(e).__name__}: {e}"
+            self._apply_health(backend, error is None, elapsed_ms, error)
+
+        return any(b.healthy for b in self.backends)
+
+    async def _check_backend(self, session: aiohttp.ClientSession, backend: OllamaBackend):
+        start = time.perf_counter()
+        try:
+            timeout = aiohttp.ClientTimeout(total=self.health_timeout)
+            async with session.get(f"{backend.url}/api/tags", timeout=timeout) as response:
+                body = await response.json() if response.status == 200 else None
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                error = self._tags_verdict(response.status, body, elapsed_ms)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+        self._apply_health(backend, error is None, elapsed_ms, error)
+
+    async def check_health(self, session: aiohttp.ClientSession) -> bool:
+        """
+        Health-check every backend concurrently.
+
+        Returns:
+            True if at least one backend is healthy
+        """
+        await asyncio.gather(*(self._check_backend(session, b) for b in self.backends))
+        return any(b.healthy for b in self.backends)
+
+    async def run_health_checks(self, get_session: Callable[[], aiohttp.ClientSession]):
+        """Background loop: re-check backends every health_interval seconds."""
+        while True:
+            try:
+                await self.check_health(get_session())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[ERROR] Ollama health check failed: {e}")
+            await asyncio.sleep(self.health_interval)
+
+    def available_count(self) -> int:
+        """Number of backends currently eligible for routing."""
+        now = time.time()
+        return sum(1 for b in self.backends if b.is_available(now))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-backend load and health."""
+        return {
+            'backends': [b.get_stats() for b in self.backends],
+            'available': self.available_count(),
+            'total': len(self.backends),
+            'in_flight': sum(b.in_flight for b in self.backends),
+            'no_backend_available': self.no_backend_available,
+            'health_interval_seconds': self.health_interval
+        }
+
+
+def create_ollama_pool_from_env(model: str) -> OllamaBackendPool:
+    """
+    Build the backend pool from OLLAMA_BACKENDS (comma-separated base URLs).
+
+    Defaults to the single local server.
+    """
+    urls = [u.strip() for u in os.getenv("OLLAMA_BACKENDS", "http://localhost:11434").split(",") if u.strip()]
+    return OllamaBackendPool(
+        urls,
+        model=model,
+        failure_threshold=int(os.getenv("OLLAMA_EJECT_AFTER_FAILURES", "2")),
+        eject_seconds=float(os.getenv("OLLAMA_EJECT_SECONDS", "30")),
+        health_interval=float(os.getenv("OLLAMA_HEALTH_INTERVAL_SECONDS", "15")),
+        health_timeout=float(os.getenv("OLLAMA_HEALTH_TIMEOUT_SECONDS", "3")),
+        slow_factor=float(os.getenv("OLLAMA_SLOW_FACTOR", "3.0"))
+    )
@@ -0,0 +1,168 @@
+"""
+Page Cache - URL-keyed cache of extracted webpage text
+Stores ETag/Last-Modified so stale entries are revalidated with a
+conditional GET and served without re-parsing when the server replies 304
+"""
+
+import os
+import time
+import threading
+from typing import Optional, Dict, Any
+from collections import OrderedDict
+
+
+class PageCache:
+    """LRU cache of extracted page text with HTTP validators."""
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 16 * 1024 * 1024,
+        fresh_seconds: int = 600
+    ):
+        """
+        Initialize page cache.
+
+        Args:
+            max_entries: Maximum number of cached pages
+            max_bytes: Maximum total size of cached text (UTF-8 bytes)
+            fresh_seconds: Serve entries without revalidation for this long
+        """
+        self.pages: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.fresh_seconds = fresh_seconds
+        self.total_bytes = 0
+        self._lock = threading.Lock()
+
+        # Stats for monitoring
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.refreshed = 0
+        self.evictions = 0
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a page.
+
+        Args:
+            url: Page URL
+
+        Returns:
+            Entry dict (text, etag, last_modified, fresh) or None if not cached.
+            When fresh is False the caller should revalidate with
+            conditional_headers() before using the text.
+        """
+        with self._lock:
+            entry = self.pages.get(url)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.pages.move_to_end(url)
+            fresh = time.time() - entry['validated_at'] < self.fresh_seconds
+            if fresh:
+                self.hits += 1
+
+            return {**entry, 'fresh': fresh}
+
+    def conditional_headers(self, entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers for a cached entry."""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def mark_revalidated(self, url: str) -> Optional[str]:
+        """
+        Record a 304 Not Modified response.
+
+        Returns:
+            Cached text for the URL (None if it was evicted meanwhile)
+        """
+        with self._lock:
+            entry = self.pages.get(url)
+            if entry is None:
+                return None
+
+            entry['validated_at'] = time.time()
+            self.revalidated += 1
+            return entry['text']
+
+    def store(self, url: str, text: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """
+        Store freshly extracted page text.
+
+        Args:
+            url: Page URL
+            text: Extracted text (untruncated)
+            etag: ETag response header
+            last_modified: Last-Modified response header
+        """
+        size = len(text.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self.pages.pop(url, None)
+            if old is not None:
+                self.total_bytes -= old['size']
+                self.refreshed += 1
+
+            self.pages[url] = {
+                'text': text,
+                'etag': etag,
+                'last_modified': last_modified,
+                'validated_at': time.time(),
+                'size': size
+            }
+            self.total_bytes += size
+
+            # Evict least recently used pages
+            while len(self.pages) > self.max_entries or self.total_bytes > self.max_bytes:
+                _, evicted = self.pages.popitem(last=False)
+                self.total_bytes -= evicted['size']
+                self.evictions += 1
+
+    def clear(self):
+        """Clear all cached pages."""
+        with self._lock:
+            self.pages.clear()
+            self.total_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        lookups = self.hits + self.misses + self.revalidated + self.refreshed
+        return {
+            'size': len(self.pages),
+            'bytes': self.total_bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidated': self.revalidated,
+            'refreshed': self.refreshed,
+            'evictions': self.evictions,
+            'hit_rate': (self.hits + self.revalidated) / lookups if lookups else 0.0
+        }
+
+
+_shared_cache: Optional[PageCache] = None
+
+
+def get_page_cache() -> PageCache:
+    """Return the process-wide page cache (configured from environment)."""
+    global _shared_cache
+
+    if _shared_cache is None:
+        _shared_cache = PageCache(
+            max_entries=int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "256")),
+            max_bytes=int(os.getenv("PAGE_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+            fresh_seconds=int(os.getenv("PAGE_CACHE_FRESH_SECONDS", "600"))
+        )
+
+    return _shared_cache
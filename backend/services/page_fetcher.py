@@ -0,0 +1,150 @@
+"""
+Page Fetcher - Concurrent webpage fetching for web search results
+Pooled keep-alive aiohttp session, per-page timeout and an overall deadline;
+extracted text goes through the shared PageCache (conditional GET on stale pages)
+"""
+
+import os
+import asyncio
+import aiohttp
+from typing import Optional, List, Dict
+
+from .page_cache import PageCache, get_page_cache
+from .html_text import html_to_text, WEB_DROP_TAGS
+
+
+class PageFetcher:
+    """Fetches result pages in parallel, bounded by a deadline."""
+
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    }
+
+    def __init__(self, page_cache: Optional[PageCache] = None):
+        """
+        Initialize page fetcher.
+
+        Args:
+            page_cache: Shared PageCache for fetched page text (process-wide if omitted)
+        """
+        self.page_timeout = float(os.getenv("WEB_PAGE_TIMEOUT_SECONDS", "5"))
+        self.fetch_deadline = float(os.getenv("WEB_FETCH_DEADLINE_SECONDS", "6"))
+        self.max_connections_per_host = 4
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.page_cache = page_cache or get_page_cache()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared keep-alive session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=20,
+                limit_per_host=self.max_connections_per_host,
+                keepalive_timeout=60
+            )
+            self._session = aiohttp.ClientSession(connector=connector, headers=self.HEADERS)
+        return self._session
+
+    async def close(self):
+        """Close the pooled HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _extract_text(self, html: bytes) -> str:
+        """
+        Extract readable text from an HTML document.
+
+        Args:
+            html: Raw page bytes
+
+        Returns:
+            Cleaned text content (untruncated, so it can be cached)
+        """
+        return html_to_text(html, drop_tags=WEB_DROP_TAGS)
+
+    def _truncate(self, text: str, max_length: int) -> str:
+        """Limit page text to max_length characters."""
+        if len(text) > max_length:
+            return text[:max_length] + "..."
+        return text
+
+    async def fetch(self, url: str, max_length: int = 3000) -> str:
+        """
+        Fetch and extract text content from a webpage without blocking the event loop.
+
+        Fresh cached pages are returned immediately; stale ones are revalidated
+        with a conditional GET and reused without re-parsing on 304.
+
+        Args:
+            url: URL to fetch
+            max_length: Maximum characters to return
+
+        Returns:
+            Cleaned text content from webpage ("" on failure)
+        """
+        entry = self.page_cache.lookup(url)
+        if entry and entry['fresh']:
+            return self._truncate(entry['text'], max_length)
+
+        try:
+            session = self._get_session()
+            timeout = aiohttp.ClientTimeout(total=self.page_timeout)
+            headers = self.page_cache.conditional_headers(entry)
+
+            async with session.get(url, headers=headers, timeout=timeout) as response:
+                if response.status == 304 and entry:
+                    text = self.page_cache.mark_revalidated(url) or entry['text']
+                    return self._truncate(text, max_length)
+
+                response.raise_for_status()
+                html = await response.read()
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+
+            # Parsing is CPU-bound; keep it off the event loop
+            text = await asyncio.to_thread(self._extract_text, html)
+            self.page_cache.store(url, text, etag=etag, last_modified=last_modified)
+            return self._truncate(text, max_length)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[ERROR] Failed to fetch {url}: {e}")
+            # A stale copy beats no content
+            return self._truncate(entry['text'], max_length) if entry else ""
+
+    async def fetch_many(self, urls: List[str], max_length: int) -> Dict[str, str]:
+        """
+        Fetch several pages in parallel, bounded by self.fetch_deadline.
+
+        Pages that have not finished by the deadline are cancelled and
+        map to "" so the caller falls back to the search snippet.
+
+        Args:
+            urls: Page URLs to fetch
+            max_length: Maximum characters per page
+
+        Returns:
+            Dict of url -> extracted text
+        """
+        tasks = {
+            url: asyncio.create_task(self.fetch(url, max_length))
+            for url in dict.fromkeys(urls) if url
+        }
+        if not tasks:
+            return {}
+
+        try:
+            done, pending = await asyncio.wait(tasks.values(), timeout=self.fetch_deadline)
+        finally:
+            # Also runs if the caller is cancelled (e.g. web leg deadline)
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+        if pending:
+            print(f"[INFO] Page fetch deadline ({self.fetch_deadline}s) hit, using snippets for {len(pending)} page(s)")
+
+        return {
+            url: task.result() if task in done else ""
+            for url, task in tasks.items()
+        }
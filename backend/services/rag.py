@@ -9,9 +9,14 @@ from .database import DatabaseService
 class RAGService:
     """Service for RAG operations."""
 
-    def __init__(self):
-        """Initialize RAG service."""
-        self.db_service = DatabaseService()
+    def __init__(self, db_service: Optional[DatabaseService] = None):
+        """
+        Initialize RAG service.
+
+        Args:
+            db_service: Shared DatabaseService (a new one is created if omitted)
+        """
+        self.db_service = db_service or DatabaseService()
         self.ready = True
 
     def is_ready(self) -> bool:
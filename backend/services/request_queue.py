@@ -1,14 +1,241 @@
 """
 Request Queue Service for Multi-User LLM Rate Limiting
 Handles concurrent requests from multiple users while respecting API rate limits
+
+AdmissionController: concurrency gate for local Ollama generation
+(in-flight cap per backend, professor priority lane, fast load shedding)
+RequestQueueService: legacy Groq requests-per-minute pacing
 """
 
 import asyncio
+import heapq
+import itertools
+import math
 import time
-from typing import Dict, Any, Optional
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, Callable, List, AsyncIterator
 from dataclasses import dataclass
 from uuid import uuid4
 
+
+PRIORITY_PROFESSOR = 0
+PRIORITY_STUDENT = 1
+PRIORITY_LANES = {PRIORITY_PROFESSOR: 'professor', PRIORITY_STUDENT: 'student'}
+
+
+class ServerBusy(Exception):
+    """Raised when a generation would wait longer than the admission deadline."""
+
+    def __init__(self, estimated_wait: float):
+        super().__init__(f"Estimated wait {estimated_wait:.1f}s exceeds admission deadline")
+        self.estimated_wait = estimated_wait
+
+
+class AdmissionController:
+    """
+    Bounded concurrency gate in front of LLM generation.
+
+    The cap is pool-wide: max_in_flight_per_backend x the number of
+    available Ollama backends. It does not pin a slot to a backend; the
+    pool's least-outstanding routing spreads admitted generations, so each
+    backend ends up near max_in_flight_per_backend. Further requests wait
+    in priority order (professors before students, FIFO within a lane). A
+    request whose estimated wait exceeds max_wait_seconds is rejected
+    immediately with ServerBusy instead of piling up behind generations it
+    cannot outlast.
+    """
+
+    def __init__(
+        self,
+        max_in_flight_per_backend: int = 2,
+        backend_count: Optional[Callable[[], int]] = None,
+        max_wait_seconds: float = 20.0,
+        initial_service_seconds: float = 20.0,
+        capacity_poll_seconds: float = 1.0
+    ):
+        """
+        Initialize admission controller.
+
+        Args:
+            max_in_flight_per_backend: Concurrent generations one Ollama backend can run
+                (match OLLAMA_NUM_PARALLEL on the server)
+            backend_count: Returns the number of usable backends (defaults to 1)
+            max_wait_seconds: Shed requests whose estimated queue wait exceeds this
+            initial_service_seconds: Generation time assumed before any are measured
+            capacity_poll_seconds: How often queued requests re-check for a backend rejoining
+        """
+        self.max_in_flight_per_backend = max_in_flight_per_backend
+        self.backend_count = backend_count or (lambda: 1)
+        self.max_wait_seconds = max_wait_seconds
+        self.capacity_poll_seconds = capacity_poll_seconds
+
+        self.in_flight = 0
+        self._waiters: List = []  # Heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self.service_time_ema = initial_service_seconds
+        self.ema_alpha = 0.2
+        self._last_capacity = self._current_capacity()
+
+        # Stats for monitoring
+        self.admitted = {lane: 0 for lane in PRIORITY_LANES.values()}
+        self.shed = {lane: 0 for lane in PRIORITY_LANES.values()}
+        self.queued = 0
+        self.wait_times = deque(maxlen=500)  # Seconds spent queued, admitted requests only
+
+        print(f"[ADMISSION] LLM admission: {max_in_flight_per_backend} in-flight per backend, "
+              f"shed when estimated wait > {max_wait_seconds:.0f}s")
+
+    def _current_capacity(self) -> int:
+        return self.max_in_flight_per_backend * max(1, self.backend_count())
+
+    @property
+    def capacity(self) -> int:
+        """Pool-wide slot count (max_in_flight_per_backend x available backends)."""
+        return self._refresh_capacity()
+
+    def _refresh_capacity(self) -> int:
+        """Read the current capacity and admit queued requests if it grew."""
+        capacity = self._current_capacity()
+        grew = capacity > self._last_capacity
+        self._last_capacity = capacity
+        if grew:
+            self._wake_waiters(capacity)
+        return capacity
+
+    def _waiting_ahead(self, priority: int) -> int:
+        """Queued requests that would be served before a new one at this priority."""
+        return sum(1 for p, _, future in self._waiters if p <= priority and not future.done())
+
+    def estimate_wait(self, priority: int = PRIORITY_STUDENT) -> float:
+        """
+        Estimate how long a new request at this priority would queue.
+
+        Returns:
+            Seconds (0.0 if a slot is free and nobody is ahead)
+        """
+        ahead = self._waiting_ahead(priority)
+        free = self.capacity - self.in_flight
+        if free > 0 and ahead == 0:
+            return 0.0
+        # Slots turn over every service_time; we need (ahead + 1) of them
+        rounds = math.ceil((ahead + 1 - max(free, 0)) / self.capacity)
+        return rounds * self.service_time_ema
+
+    def check(self, priority: int = PRIORITY_STUDENT):
+        """
+        Fail fast before doing any work for a request that would be shed.
+
+        Raises:
+            ServerBusy: If the estimated wait exceeds max_wait_seconds
+        """
+        estimated_wait = self.estimate_wait(priority)
+        if estimated_wait > self.max_wait_seconds:
+            self.shed[PRIORITY_LANES[priority]] += 1
+            print(f"[ADMISSION] Shedding {PRIORITY_LANES[priority]} request: "
+                  f"estimated wait {estimated_wait:.1f}s (in flight {self.in_flight}/{self.capacity}, "
+                  f"queued {len(self._waiters)})")
+            raise ServerBusy(estimated_wait)
+
+    def _wake_waiters(self, capacity: Optional[int] = None):
+        """Hand free slots to the highest-priority waiters."""
+        capacity = capacity if capacity is not None else self._current_capacity()
+        while self._waiters and self.in_flight < capacity:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(True)
+
+    async def _acquire(self, priority: int):
+        self.check(priority)
+        lane = PRIORITY_LANES[priority]
+
+        if self.in_flight < self.capacity and self._waiting_ahead(priority) == 0:
+            self.in_flight += 1
+            self.admitted[lane] += 1
+            self.wait_times.append(0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self.queued += 1
+        start = time.perf_counter()
+
+        deadline = start + self.max_wait_seconds
+
+        try:
+            # asyncio.wait never cancels the future, so a granted slot is not lost
+            while not future.done():
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                await asyncio.wait({future}, timeout=min(remaining, self.capacity_poll_seconds))
+                self._refresh_capacity()  # A backend may have rejoined meanwhile
+
+            if not future.done():
+                future.cancel()
+                self.shed[lane] += 1
+                raise ServerBusy(time.perf_counter() - start)
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was granted as we were cancelled; pass it on
+                self._release_slot()
+            else:
+                future.cancel()
+            raise
+
+        self.admitted[lane] += 1
+        self.wait_times.append(time.perf_counter() - start)
+
+    def _release_slot(self):
+        self.in_flight -= 1
+        self._wake_waiters()
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_STUDENT) -> AsyncIterator[None]:
+        """
+        Hold one generation slot for the duration of the block.
+
+        Args:
+            priority: PRIORITY_PROFESSOR or PRIORITY_STUDENT
+
+        Raises:
+            ServerBusy: If the request is shed (before entering the block)
+        """
+        await self._acquire(priority)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.service_time_ema += self.ema_alpha * ((time.perf_counter() - start) - self.service_time_ema)
+            self._release_slot()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, wait times and shedding counters."""
+        waits = sorted(self.wait_times)
+
+        def percentile(p: float) -> Optional[float]:
+            if not waits:
+                return None
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 1)
+
+        live = [(p, f) for p, _, f in self._waiters if not f.done()]
+        return {
+            'in_flight': self.in_flight,
+            'capacity': self.capacity,
+            'max_in_flight_per_backend': self.max_in_flight_per_backend,
+            'queue_depth': {lane: sum(1 for p, _ in live if p == prio) for prio, lane in PRIORITY_LANES.items()},
+            'estimated_wait_seconds': round(self.estimate_wait(PRIORITY_STUDENT), 1),
+            'max_wait_seconds': self.max_wait_seconds,
+            'service_time_ema_seconds': round(self.service_time_ema, 2),
+            'admitted': dict(self.admitted),
+            'queued': self.queued,
+            'shed': dict(self.shed),
+            'wait_ms_p50': percentile(0.5),
+            'wait_ms_p95': percentile(0.95)
+        }
+
+
 @dataclass
 class QueuedRequest:
     """Represents a queued request"""
@@ -0,0 +1,210 @@
+"""
+Reranker - Optional cross-encoder rescoring of retrieved documents
+Scores (query, document) pairs in one batch on CPU under a hard time budget;
+if the budget is exceeded the original retrieval order is kept.
+Scores are cached per (query, document) so repeated questions cost nothing.
+"""
+
+import os
+import math
+import time
+import asyncio
+import hashlib
+import threading
+from typing import List, Dict, Optional, Any
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+class CrossEncoderReranker:
+    """Rescores the top-N retrieval candidates with a small cross-encoder."""
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        top_k: int = 6,
+        time_budget_ms: float = 400,
+        max_doc_chars: int = 1500,
+        cache_size: int = 2048
+    ):
+        """
+        Initialize reranker (the model is loaded lazily or via warmup()).
+
+        Args:
+            model_name: sentence-transformers CrossEncoder id
+            top_k: Documents to keep after reranking
+            time_budget_ms: Hard limit for one rerank call
+            max_doc_chars: Characters of each document sent to the model
+            cache_size: Maximum cached (query, document) scores
+        """
+        self.model_name = model_name or DEFAULT_RERANKER_MODEL
+        self.top_k = top_k
+        self.time_budget_ms = time_budget_ms
+        self.max_doc_chars = max_doc_chars
+
+        self._model = None
+        self._model_lock = threading.Lock()
+        # One worker: a timed-out batch finishes in the background instead of piling up
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reranker")
+        self._busy = False  # Worker is still running a batch (or the model load)
+
+        self.cache: OrderedDict[str, float] = OrderedDict()
+        self.cache_size = cache_size
+        self._cache_lock = threading.Lock()
+
+        # Stats for monitoring
+        self.calls = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.skips = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.total_ms = 0.0
+
+    def _get_model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    print(f"[RERANKER] Loading cross-encoder: {self.model_name}")
+                    self._model = CrossEncoder(self.model_name, max_length=512)
+        return self._model
+
+    def _submit(self, fn, *args) -> asyncio.Future:
+        """Run fn on the worker, marking it busy until it finishes."""
+        self._busy = True
+        future = asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        future.add_done_callback(self._batch_done)
+        return future
+
+    def _batch_done(self, future: asyncio.Future) -> None:
+        self._busy = False
+
+    async def warmup(self):
+        """Load the model off the event loop so the first query isn't charged for it."""
+        await self._submit(self._get_model)
+
+    def _cache_key(self, query: str, doc: Dict) -> str:
+        normalized = ' '.join(query.lower().split())
+        doc_key = doc.get('id') or hashlib.md5(doc.get('content', '')[:self.max_doc_chars].encode()).hexdigest()
+        return f"{normalized}\x00{doc_key}"
+
+    def _score_batch(self, query: str, docs: List[Dict], keys: List[str]) -> Dict[str, float]:
+        """Score uncached pairs in one batch and cache them (runs in the worker thread)."""
+        model = self._get_model()
+        pairs = [(query, d.get('content', '')[:self.max_doc_chars]) for d in docs]
+        logits = model.predict(pairs, batch_size=len(pairs), show_progress_bar=False)
+
+        scores = {}
+        with self._cache_lock:
+            for key, logit in zip(keys, logits):
+                score = 1.0 / (1.0 + math.exp(-float(logit)))
+                scores[key] = score
+                self.cache[key] = score
+                self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+        return scores
+
+    async def rerank(self, query: str, documents: List[Dict], top_k: Optional[int] = None) -> List[Dict]:
+        """
+        Rerank documents by cross-encoder relevance.
+
+        Args:
+            query: User query
+            documents: Retrieval candidates (any order)
+            top_k: Documents to keep (defaults to self.top_k)
+
+        Returns:
+            Top-k documents with a 'rerank_score' field, best first.
+            On timeout/error, or while an earlier batch is still running:
+            the first top_k documents in their original order.
+        """
+        top_k = top_k or self.top_k
+        if len(documents) <= 1:
+            return documents[:top_k]
+
+        start = time.time()
+        self.calls += 1
+
+        keys = [self._cache_key(query, d) for d in documents]
+        scores = {}
+        with self._cache_lock:
+            for key in keys:
+                if key in self.cache:
+                    scores[key] = self.cache[key]
+                    self.cache.move_to_end(key)
+
+        missing = [(key, doc) for key, doc in zip(keys, documents) if key not in scores]
+        self.cache_hits += len(documents) - len(missing)
+        self.cache_misses += len(missing)
+
+        if missing:
+            # Queueing behind a late batch would spend the budget waiting; skip instead
+            if self._busy:
+                self.skips += 1
+                print("[RERANKER] Previous batch still running - keeping retrieval order")
+                return documents[:top_k]
+
+            future = self._submit(
+                self._score_batch,
+                query,
+                [doc for _, doc in missing],
+                [key for key, _ in missing]
+            )
+            try:
+                # shield: a late batch still completes and fills the cache
+                scores.update(await asyncio.wait_for(asyncio.shield(future), timeout=self.time_budget_ms / 1000))
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                print(f"[RERANKER] Time budget ({self.time_budget_ms:.0f}ms) exceeded - keeping retrieval order")
+                return documents[:top_k]
+            except Exception as e:
+                self.errors += 1
+                print(f"[RERANKER] Error: {e} - keeping retrieval order")
+                return documents[:top_k]
+
+        reranked = sorted(
+            ({**doc, 'rerank_score': scores[key]} for key, doc in zip(keys, documents)),
+            key=lambda d: d['rerank_score'],
+            reverse=True
+        )[:top_k]
+
+        elapsed_ms = (time.time() - start) * 1000
+        self.total_ms += elapsed_ms
+        print(f"[RERANKER] {len(documents)} -> {len(reranked)} docs in {elapsed_ms:.0f}ms "
+              f"({len(documents) - len(missing)} cached)")
+
+        return reranked
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get reranker statistics."""
+        lookups = self.cache_hits + self.cache_misses
+        completed = self.calls - self.timeouts - self.errors - self.skips
+        return {
+            'model': self.model_name,
+            'top_k': self.top_k,
+            'time_budget_ms': self.time_budget_ms,
+            'calls': self.calls,
+            'timeouts': self.timeouts,
+            'errors': self.errors,
+            'skips': self.skips,
+            'avg_ms': self.total_ms / completed if completed else 0.0,
+            'cache_size': len(self.cache),
+            'cache_hit_rate': self.cache_hits / lookups if lookups else 0.0
+        }
+
+
+def create_reranker_from_env() -> Optional[CrossEncoderReranker]:
+    """Build a reranker if RERANKER_ENABLED=true, else None."""
+    if os.getenv("RERANKER_ENABLED", "false").lower() != "true":
+        return None
+
+    return CrossEncoderReranker(
+        model_name=os.getenv("RERANKER_MODEL", DEFAULT_RERANKER_MODEL),
+        top_k=int(os.getenv("RERANKER_TOP_K", "6")),
+        time_budget_ms=float(os.getenv("RERANKER_TIME_BUDGET_MS", "400"))
+    )
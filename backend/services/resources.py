@@ -0,0 +1,49 @@
+"""
+Shared Resources - Process-wide embedding model and Supabase client
+Every service in a worker draws from the same instances instead of
+loading its own copy of the model / opening its own client
+"""
+
+import os
+import threading
+from typing import Optional
+from supabase import create_client, Client
+from sentence_transformers import SentenceTransformer
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+_lock = threading.Lock()
+_embedding_model: Optional[SentenceTransformer] = None
+_supabase_client: Optional[Client] = None
+
+
+def get_embedding_model() -> SentenceTransformer:
+    """Get the shared SentenceTransformer, loading it on first use."""
+    global _embedding_model
+
+    if _embedding_model is None:
+        with _lock:
+            if _embedding_model is None:
+                print(f"[RESOURCES] Loading embedding model: {EMBEDDING_MODEL_NAME}")
+                _embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+    return _embedding_model
+
+
+def get_supabase_client() -> Client:
+    """Get the shared Supabase client, creating it on first use."""
+    global _supabase_client
+
+    if _supabase_client is None:
+        with _lock:
+            if _supabase_client is None:
+                supabase_url = os.getenv("SUPABASE_URL")
+                supabase_key = os.getenv("SUPABASE_KEY")
+
+                if not supabase_url or not supabase_key:
+                    raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set")
+
+                print("[RESOURCES] Creating Supabase client")
+                _supabase_client = create_client(supabase_url, supabase_key)
+
+    return _supabase_client
@@ -0,0 +1,91 @@
+"""
+Single-Flight - Coalesce identical concurrent requests into one execution
+The first caller for a key runs the work; callers arriving while it is
+in flight await the same result instead of repeating it
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class _Flight:
+    """One in-flight execution and the number of callers awaiting it."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Per-key deduplication of concurrent async work."""
+
+    def __init__(self, name: str = "single_flight"):
+        """
+        Initialize single-flight group.
+
+        Args:
+            name: Group name (for logs)
+        """
+        self.name = name
+        self._flights: Dict[str, _Flight] = {}
+
+        # Stats for monitoring
+        self.executions = 0
+        self.coalesced = 0
+        self.abandoned = 0  # Executions cancelled because every caller went away
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run fn once per key at a time; concurrent callers share the result.
+
+        The shared execution runs as its own task, so one caller being
+        cancelled (e.g. its client disconnected) does not cancel it for
+        the others. It is only cancelled once no caller is left waiting.
+
+        Args:
+            key: Deduplication key
+            fn: Zero-argument coroutine function doing the work
+
+        Returns:
+            Tuple of (result, shared) where shared is True if this caller
+            joined an execution started by another caller
+
+        Raises:
+            Whatever fn raised (re-raised to every caller)
+        """
+        flight = self._flights.get(key)
+        shared = flight is not None
+
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+            print(f"[{self.name.upper()}] Joined in-flight request ({flight.waiters} already waiting)")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), shared
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody left to read the result
+                self._forget(key, flight)
+                flight.task.cancel()
+                self.abandoned += 1
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get execution and coalescing counters."""
+        return {
+            'in_flight': len(self._flights),
+            'waiting': sum(f.waiters for f in self._flights.values()),
+            'executions': self.executions,
+            'coalesced': self.coalesced,
+            'abandoned': self.abandoned
+        }
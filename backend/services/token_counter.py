@@ -0,0 +1,89 @@
+"""
+Token Counter - Count prompt tokens with the LLM's own tokenizer
+Falls back to the chars/4 estimate if the tokenizer cannot be loaded
+(transformers missing, no network for the first download, etc.)
+"""
+
+import os
+import asyncio
+import threading
+from typing import Optional
+
+# Hugging Face tokenizer matching the Ollama model (Deepseek-R1:7b is a Qwen2 distill)
+DEFAULT_TOKENIZER = "deepseek-ai/DeepSeek-R1-Distill-Qwen-7B"
+
+
+class TokenCounter:
+    """Counts tokens with a Hugging Face tokenizer, loaded on first use."""
+
+    def __init__(self, tokenizer_name: Optional[str] = None, chars_per_token: float = 4.0):
+        """
+        Initialize token counter.
+
+        Args:
+            tokenizer_name: Hugging Face tokenizer id (CONTEXT_TOKENIZER env, or the default)
+            chars_per_token: Estimate used when the tokenizer is unavailable
+        """
+        self.tokenizer_name = tokenizer_name or os.getenv("CONTEXT_TOKENIZER", DEFAULT_TOKENIZER)
+        self.chars_per_token = chars_per_token
+        self._tokenizer = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                from transformers import AutoTokenizer
+                self._tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_name)
+                print(f"[TOKENS] Loaded tokenizer: {self.tokenizer_name}")
+            except Exception as e:
+                print(f"[WARNING] Tokenizer unavailable ({e}); estimating 1 token per {self.chars_per_token:.0f} chars")
+                self._tokenizer = None
+            self._loaded = True
+
+    async def warmup(self):
+        """Load the tokenizer off the event loop (the first load may download it)."""
+        if not self._loaded:
+            await asyncio.to_thread(self._load)
+
+    @property
+    def exact(self) -> bool:
+        """True if counts come from the real tokenizer."""
+        if not self._loaded:
+            self._load()
+        return self._tokenizer is not None
+
+    def count(self, text: str) -> int:
+        """
+        Count tokens in text.
+
+        Args:
+            text: Text to count
+
+        Returns:
+            Number of tokens (estimated if the tokenizer is unavailable)
+        """
+        if not text:
+            return 0
+        if not self._loaded:
+            self._load()
+
+        if self._tokenizer is None:
+            return int(len(text) / self.chars_per_token) + 1
+
+        return len(self._tokenizer.encode(text, add_special_tokens=False))
+
+
+_shared_counter: Optional[TokenCounter] = None
+
+
+def get_token_counter() -> TokenCounter:
+    """Return the process-wide token counter."""
+    global _shared_counter
+
+    if _shared_counter is None:
+        _shared_counter = TokenCounter()
+
+    return _shared_counter
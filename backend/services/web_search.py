@@ -5,16 +5,25 @@ Fetches full webpage content for detailed answers
 """
 
 import os
-import requests
-from bs4 import BeautifulSoup
+import asyncio
 from serpapi import GoogleSearch
-from typing import Optional, List, Dict
+from typing import Optional
+
+from .web_search_cache import WebSearchCache, get_web_search_cache
+from .page_cache import PageCache, get_page_cache
+from .page_fetcher import PageFetcher
 
 class WebSearchService:
     """Service for web search using SerpAPI."""
 
-    def __init__(self):
-        """Initialize SerpAPI client."""
+    def __init__(self, cache: Optional[WebSearchCache] = None, page_cache: Optional[PageCache] = None):
+        """
+        Initialize SerpAPI client.
+
+        Args:
+            cache: Shared WebSearchCache (the process-wide one is used if omitted)
+            page_cache: Shared PageCache for fetched page text (process-wide if omitted)
+        """
         api_key = os.getenv("SERPAPI_KEY")
 
         if not api_key:
@@ -24,64 +33,29 @@ class WebSearchService:
             self.api_key = api_key
             self.enabled = True
 
+        self.cache = cache or get_web_search_cache()
+
+        self.page_cache = page_cache or get_page_cache()
+        self.fetcher = PageFetcher(self.page_cache)  # Pooled session, bounded by an overall deadline
+
         self.ready = True
 
     def is_ready(self) -> bool:
         """Check if service is ready."""
         return self.ready
 
-    def _fetch_webpage_content(self, url: str, max_length: int = 3000) -> str:
-        """
-        Fetch and extract text content from a webpage.
-
-        Args:
-            url: URL to fetch
-            max_length: Maximum characters to return
-
-        Returns:
-            Cleaned text content from webpage
-        """
-        try:
-            # Set timeout and headers
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-
-            response = requests.get(url, headers=headers, timeout=5)
-            response.raise_for_status()
-
-            # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            # Remove script and style elements
-            for script in soup(['script', 'style', 'nav', 'footer', 'header']):
-                script.decompose()
-
-            # Get text
-            text = soup.get_text(separator=' ', strip=True)
-
-            # Clean up whitespace
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
-
-            # Limit length
-            if len(text) > max_length:
-                text = text[:max_length] + "..."
+    async def close(self):
+        """Close the pooled HTTP session."""
+        await self.fetcher.close()
 
-            return text
-
-        except Exception as e:
-            print(f"[ERROR] Failed to fetch {url}: {e}")
-            return ""
-
-    async def search(self, query: str, num_results: int = 3) -> str:
+    async def search(self, query: str, num_results: int = 3, raise_errors: bool = False) -> str:
         """
         Search the web, fetch full page content, and return formatted results.
 
         Args:
             query: Search query
             num_results: Number of results to return
+            raise_errors: Re-raise search errors instead of returning "" (for circuit breakers)
 
         Returns:
             Formatted search results with full page content
@@ -89,6 +63,12 @@ class WebSearchService:
         if not self.enabled:
             return ""
 
+        cache_key = self.cache.make_key("serpapi", query, num_results)
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            print(f"[WEB CACHE] Hit for: {query[:50]}")
+            return cached
+
         try:
             # Enhance query with SFSU context
             enhanced_query = f"San Francisco State University {query}"
@@ -100,20 +80,25 @@ class WebSearchService:
                 "num": num_results
             })
 
-            results = search.get_dict()
+            # SerpAPI client is blocking; run it in a worker thread
+            results = await asyncio.to_thread(search.get_dict)
 
             # Format results with full content
             if "organic_results" in results:
                 formatted_results = []
+                organic_results = results["organic_results"][:num_results]
+
+                # Fetch all pages concurrently (5000 chars each for more detail)
+                links = [result.get("link", "") for result in organic_results]
+                print(f"[INFO] Fetching content from {len(links)} page(s)")
+                page_contents = await self.fetcher.fetch_many(links, max_length=5000)
 
-                for i, result in enumerate(results["organic_results"][:num_results]):
+                for i, result in enumerate(organic_results):
                     title = result.get("title", "")
                     snippet = result.get("snippet", "")
                     link = result.get("link", "")
 
-                    # Fetch full webpage content (increased to 5000 chars for more detail)
-                    print(f"[INFO] Fetching content from: {link}")
-                    full_content = self._fetch_webpage_content(link, max_length=5000)
+                    full_content = page_contents.get(link, "")
 
                     if full_content:
                         # Use full content if available
@@ -132,10 +117,14 @@ class WebSearchService:
                             f"URL: {link}\n"
                         )
 
-                return "\n".join(formatted_results)
+                content = "\n".join(formatted_results)
+                self.cache.set(cache_key, content, query)
+                return content
 
             return ""
 
         except Exception as e:
             print(f"[ERROR] Web search error: {e}")
+            if raise_errors:
+                raise
             return ""
@@ -0,0 +1,225 @@
+"""
+Web Search Cache - Two-level cache in front of paid search providers
+L1: in-process LRU (per worker)
+L2: Supabase `web_search_cache` table (shared by every worker and deploy)
+TTL is chosen per query: short for time-sensitive questions, long for evergreen ones
+"""
+
+import asyncio
+import re
+import time
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Set
+from collections import OrderedDict
+
+
+class WebSearchCache:
+    """L1 memory + L2 database cache for formatted web search results."""
+
+    # Questions whose answers change often (deadlines, events, schedules)
+    SHORT_TTL_KEYWORDS = [
+        'deadline', 'due', 'today', 'tomorrow', 'this week', 'next week',
+        'event', 'schedule', 'open', 'closed', 'hours', 'current', 'latest',
+        'recent', 'upcoming', 'new', 'this semester', 'next semester', 'registration'
+    ]
+
+    # Questions about stable facts (definitions, requirements, locations)
+    LONG_TTL_KEYWORDS = [
+        'what is', 'what are', 'requirements', 'prerequisite', 'where is',
+        'located', 'location', 'contact', 'history', 'about', 'degree', 'major'
+    ]
+
+    @staticmethod
+    def _keyword_pattern(keywords: List[str]) -> re.Pattern:
+        """Match any keyword as whole words ('new' must not match 'renewal')."""
+        return re.compile(r'\b(?:' + '|'.join(re.escape(kw) for kw in keywords) + r')\b')
+
+    def __init__(
+        self,
+        client=None,
+        max_size: int = 500,
+        short_ttl_seconds: int = 3600,
+        default_ttl_seconds: int = 86400,
+        long_ttl_seconds: int = 7 * 86400
+    ):
+        """
+        Initialize web search cache.
+
+        Args:
+            client: Supabase client for the L2 table (None = L1 only)
+            max_size: Maximum L1 entries
+            short_ttl_seconds: TTL for time-sensitive queries (default 1 hour)
+            default_ttl_seconds: TTL for everything else (default 1 day)
+            long_ttl_seconds: TTL for evergreen queries (default 7 days)
+        """
+        self.client = client
+        self.l1: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self.max_size = max_size
+
+        self.short_ttl_seconds = short_ttl_seconds
+        self.default_ttl_seconds = default_ttl_seconds
+        self.long_ttl_seconds = long_ttl_seconds
+        self._short_ttl_pattern = self._keyword_pattern(self.SHORT_TTL_KEYWORDS)
+        self._long_ttl_pattern = self._keyword_pattern(self.LONG_TTL_KEYWORDS)
+
+        self._pending_writes: Set[asyncio.Task] = set()  # Strong refs so L2 writes aren't garbage collected
+
+        # Stats for monitoring
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.write_errors = 0
+
+    def make_key(self, provider: str, query: str, num_results: int) -> str:
+        """Build a cache key (provider and result count change the payload)."""
+        normalized = ' '.join(query.lower().split())
+        return f"{provider}:{num_results}:{normalized}"
+
+    def ttl_for_query(self, query: str) -> int:
+        """Pick a TTL based on how time-sensitive the query looks."""
+        query_lower = query.lower()
+
+        if self._short_ttl_pattern.search(query_lower):
+            return self.short_ttl_seconds
+        if self._long_ttl_pattern.search(query_lower):
+            return self.long_ttl_seconds
+        return self.default_ttl_seconds
+
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Look up formatted results: L1 first, then the database.
+
+        Args:
+            key: Cache key from make_key()
+
+        Returns:
+            Cached results string or None
+        """
+        entry = self.l1.get(key)
+        if entry is not None:
+            if entry['expires_at'] > time.time():
+                self.l1.move_to_end(key)
+                self.l1_hits += 1
+                return entry['content']
+            del self.l1[key]
+
+        if self.client is not None:
+            try:
+                row = await asyncio.to_thread(self._read_l2, key)
+            except Exception as e:
+                print(f"[WEB CACHE] L2 read failed: {e}")
+                row = None
+
+            if row is not None:
+                content, expires_at = row
+                self._set_l1(key, content, expires_at)
+                self.l2_hits += 1
+                return content
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, content: str, query: str) -> None:
+        """
+        Store results in L1 now and write L2 in the background.
+
+        Args:
+            key: Cache key from make_key()
+            content: Formatted results string
+            query: Original query (used to choose the TTL)
+        """
+        if not content:
+            return
+
+        ttl = self.ttl_for_query(query)
+        expires_at = time.time() + ttl
+        self._set_l1(key, content, expires_at)
+
+        if self.client is not None:
+            task = asyncio.create_task(self._write_l2(key, content, expires_at))
+            self._pending_writes.add(task)
+            task.add_done_callback(self._write_done)
+
+    def _write_done(self, task: asyncio.Task) -> None:
+        self._pending_writes.discard(task)
+
+    def _set_l1(self, key: str, content: str, expires_at: float) -> None:
+        if len(self.l1) >= self.max_size and key not in self.l1:
+            self.l1.popitem(last=False)
+        self.l1[key] = {'content': content, 'expires_at': expires_at}
+        self.l1.move_to_end(key)
+
+    def _read_l2(self, key: str) -> Optional[tuple]:
+        """Fetch the newest unexpired row for a key (runs in a worker thread)."""
+        now = datetime.now(timezone.utc).isoformat()
+        result = self.client.table("web_search_cache")\
+            .select("results, expires_at")\
+            .eq("query", key)\
+            .gt("expires_at", now)\
+            .order("created_at", desc=True)\
+            .limit(1)\
+            .execute()
+
+        if not result.data:
+            return None
+
+        row = result.data[0]
+        expires_at = datetime.fromisoformat(row['expires_at'].replace('Z', '+00:00')).timestamp()
+        return row['results'].get('content', ''), expires_at
+
+    async def _write_l2(self, key: str, content: str, expires_at: float) -> None:
+        """Insert a row into web_search_cache without blocking the request."""
+        try:
+            await asyncio.to_thread(
+                lambda: self.client.table("web_search_cache").insert({
+                    "query": key,
+                    "results": {"content": content},
+                    "expires_at": datetime.fromtimestamp(expires_at, timezone.utc).isoformat()
+                }).execute()
+            )
+            self.writes += 1
+
+            # Let the database drop stale rows now and then
+            if self.writes % 100 == 0:
+                await asyncio.to_thread(lambda: self.client.rpc("cleanup_expired_cache", {}).execute())
+
+        except Exception as e:
+            self.write_errors += 1
+            print(f"[WEB CACHE] L2 write failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        lookups = self.l1_hits + self.l2_hits + self.misses
+        return {
+            'l1_size': len(self.l1),
+            'l1_hits': self.l1_hits,
+            'l2_hits': self.l2_hits,
+            'misses': self.misses,
+            'hit_rate': (self.l1_hits + self.l2_hits) / lookups if lookups else 0.0,
+            'l2_writes': self.writes,
+            'l2_write_errors': self.write_errors,
+            'l2_writes_pending': len(self._pending_writes),
+            'l2_enabled': self.client is not None
+        }
+
+
+_shared_cache: Optional[WebSearchCache] = None
+
+
+def get_web_search_cache() -> WebSearchCache:
+    """Return the process-wide web search cache (L2 disabled if Supabase is not configured)."""
+    global _shared_cache
+
+    if _shared_cache is None:
+        from .resources import get_supabase_client
+
+        try:
+            client = get_supabase_client()
+        except Exception as e:
+            print(f"[WEB CACHE] Supabase unavailable, using memory cache only: {e}")
+            client = None
+
+        _shared_cache = WebSearchCache(client=client)
+
+    return _shared_cache
@@ -5,10 +5,70 @@ Optimized for LLM consumption with clean, structured data
 """
 
 import os
+import time
+import asyncio
+import threading
 import requests
-from typing import Optional, List, Dict
+import numpy as np
+from collections import deque
+from typing import Optional, List, Dict, Any, Tuple
 from serpapi import GoogleSearch
-from bs4 import BeautifulSoup
+
+from .web_search_cache import WebSearchCache, get_web_search_cache
+from .page_cache import PageCache, get_page_cache
+from .page_fetcher import PageFetcher
+
+
+class WebSearchError(Exception):
+    """Raised when every attempted search provider failed."""
+    pass
+
+
+class ProviderStats:
+    """Rolling latency and error statistics for one search provider."""
+
+    def __init__(self, window: int = 100):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.hedges = 0
+        self.wins = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool):
+        """Record one completed call (called from worker threads)."""
+        with self._lock:
+            self.calls += 1
+            self.outcomes.append(ok)
+            if ok:
+                self.latencies.append(latency)
+            else:
+                self.errors += 1
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Latency percentile over successful calls in the window (None if no samples)."""
+        with self._lock:
+            samples = list(self.latencies)
+        return float(np.percentile(samples, p)) if samples else None
+
+    @property
+    def error_rate(self) -> float:
+        """Error rate over the recent window."""
+        with self._lock:
+            outcomes = list(self.outcomes)
+        return outcomes.count(False) / len(outcomes) if outcomes else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'error_rate': self.error_rate,
+            'p50_seconds': self.percentile(50),
+            'p95_seconds': self.percentile(95),
+            'hedges_fired': self.hedges,
+            'wins': self.wins
+        }
 
 
 class ImprovedWebSearchService:
@@ -17,12 +77,32 @@ class ImprovedWebSearchService:
     Automatically selects best available API based on environment variables.
     """
 
-    def __init__(self):
-        """Initialize with best available search provider."""
+    def __init__(self, cache: Optional[WebSearchCache] = None, page_cache: Optional[PageCache] = None):
+        """
+        Initialize with best available search provider.
+
+        Args:
+            cache: Shared WebSearchCache (the process-wide one is used if omitted)
+            page_cache: Shared PageCache for fetched page text (process-wide if omitted)
+        """
         self.provider = self._detect_best_provider()
+        self.providers = self._detect_available_providers()
+        self.cache = cache or get_web_search_cache()
+        self.page_cache = page_cache or get_page_cache()
+        self.fetcher = PageFetcher(self.page_cache)
         self.ready = True
 
+        # Hedged requests: if the primary has not answered within its p95
+        # latency, fire the next provider and take whichever returns first
+        self.hedging_enabled = os.getenv("WEB_SEARCH_HEDGING", "false").lower() == "true"
+        self.default_hedge_delay = float(os.getenv("WEB_SEARCH_HEDGE_DELAY_SECONDS", "2.0"))
+        self.min_hedge_delay = 0.5
+        self.max_error_rate = 0.5
+        self.stats = {name: ProviderStats() for name in self.providers}
+
         print(f"[WEB SEARCH] Initialized with provider: {self.provider}")
+        if self.hedging_enabled and len(self.providers) > 1:
+            print(f"[WEB SEARCH] Hedging enabled across: {', '.join(self.providers)}")
 
     def _detect_best_provider(self) -> str:
         """
@@ -41,11 +121,169 @@ class ImprovedWebSearchService:
             print("[WARNING] No web search API key found. Web search will be disabled.")
             return "none"
 
+    def _detect_available_providers(self) -> List[str]:
+        """All providers with API keys, in priority order."""
+        keys = [
+            ("tavily", "TAVILY_API_KEY"),
+            ("perplexity", "PERPLEXITY_API_KEY"),
+            ("brave", "BRAVE_API_KEY"),
+            ("serpapi", "SERPAPI_KEY")
+        ]
+        return [name for name, key in keys if os.getenv(key)]
+
     def is_ready(self) -> bool:
         """Check if service is ready."""
         return self.ready and self.provider != "none"
 
-    async def search(self, query: str, num_results: int = 3) -> str:
+    async def close(self):
+        """Close the pooled HTTP session used for page fetching."""
+        await self.fetcher.close()
+
+    def _rank_providers(self) -> List[str]:
+        """
+        Order providers for the next request.
+
+        The primary is the highest-priority provider whose recent error rate
+        is acceptable; the rest are ordered by observed p50 latency.
+        """
+        healthy = [p for p in self.providers if self.stats[p].error_rate < self.max_error_rate]
+        unhealthy = [p for p in self.providers if p not in healthy]
+
+        if not healthy:
+            return list(self.providers)
+
+        primary = healthy[0]
+        backups = sorted(
+            healthy[1:],
+            key=lambda p: self.stats[p].percentile(50) or self.default_hedge_delay
+        )
+        return [primary] + backups + unhealthy
+
+    def _hedge_delay(self, provider: str) -> float:
+        """How long to wait for a provider before firing the backup."""
+        p95 = self.stats[provider].percentile(95)
+        if p95 is None:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, p95)
+
+    def _run_provider(self, provider: str, query: str, num_results: int):
+        """
+        Call one provider's API synchronously and record its latency/outcome.
+
+        Only the API call is timed (pages are fetched later, for the winner
+        only), so the stats and the hedge delay reflect the provider itself.
+
+        Returns:
+            Formatted text (tavily, perplexity) or a list of result dicts
+            whose pages still need fetching (brave, serpapi)
+
+        Raises:
+            WebSearchError: If the provider failed (provider methods return empty on failure)
+        """
+        search_methods = {
+            "tavily": self._search_tavily,
+            "perplexity": self._search_perplexity,
+            "brave": self._search_brave,
+            "serpapi": self._search_serpapi
+        }
+
+        start = time.time()
+        try:
+            results = search_methods[provider](query, num_results)
+        except Exception as e:
+            print(f"[ERROR] Web search error ({provider}): {e}")
+            results = ""
+
+        # Provider methods return ""/[] on failure
+        self.stats[provider].record(time.time() - start, ok=bool(results))
+        if not results:
+            raise WebSearchError(f"{provider} returned no results")
+        return results
+
+    async def _call_provider(self, provider: str, query: str, num_results: int):
+        """Call a provider in a worker thread so slow APIs do not block the event loop."""
+        return await asyncio.to_thread(self._run_provider, provider, query, num_results)
+
+    async def _render(self, provider: str, results) -> str:
+        """
+        Turn a provider's results into LLM-ready text.
+
+        Brave and SerpAPI results get their pages fetched concurrently under
+        the page fetcher's deadline; other providers are already formatted.
+        """
+        formatters = {
+            "brave": (self._format_brave, 3000),
+            "serpapi": (self._format_serpapi, 5000)
+        }
+        if provider not in formatters:
+            return results
+
+        format_results, max_length = formatters[provider]
+        urls = [result.get("url", "") for result in results]
+        print(f"[INFO] Fetching content from {len(urls)} page(s)")
+        pages = await self.fetcher.fetch_many(urls, max_length=max_length)
+        return format_results(results, pages)
+
+    async def _hedged_search(self, query: str, num_results: int) -> Tuple[str, Any]:
+        """
+        Fire the primary provider, then a backup if the primary is slow or fails.
+        Only the provider API calls are hedged; pages are fetched afterwards.
+
+        Args:
+            query: Enhanced search query
+            num_results: Number of results to return
+
+        Returns:
+            Tuple of (winning provider, its raw results)
+
+        Raises:
+            WebSearchError: If every attempted provider failed
+        """
+        ranked = self._rank_providers()
+        primary = ranked[0]
+        delay = self._hedge_delay(primary)
+        errors = []
+
+        tasks = {asyncio.create_task(self._call_provider(primary, query, num_results)): primary}
+        done, _ = await asyncio.wait(tasks.keys(), timeout=delay)
+
+        # Primary answered in time
+        for task in done:
+            if task.exception() is None:
+                self.stats[primary].wins += 1
+                return primary, task.result()
+            errors.append(str(task.exception()))
+
+        if len(ranked) > 1:
+            backup = ranked[1]
+            self.stats[backup].hedges += 1
+            reason = "failed" if done else f"no answer after {delay:.2f}s"
+            print(f"[WEB SEARCH] Hedging {primary} -> {backup} ({reason})")
+            tasks[asyncio.create_task(self._call_provider(backup, query, num_results))] = backup
+
+        pending = {task for task in tasks if not task.done()}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    # The loser's API call finishes in its thread; its result is discarded
+                    for other in pending:
+                        other.cancel()
+                    self.stats[tasks[task]].wins += 1
+                    return tasks[task], task.result()
+                errors.append(str(task.exception()))
+
+        raise WebSearchError("; ".join(errors) or "no provider answered")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-provider latency/error statistics."""
+        return {
+            'hedging_enabled': self.hedging_enabled,
+            'provider_order': self._rank_providers(),
+            'providers': {name: stats.to_dict() for name, stats in self.stats.items()}
+        }
+
+    async def search(self, query: str, num_results: int = 3, raise_errors: bool = False) -> str:
         """
         Search the web using best available provider.
         Returns formatted, LLM-optimized results.
@@ -53,6 +291,7 @@ class ImprovedWebSearchService:
         Args:
             query: Search query
             num_results: Number of results to return
+            raise_errors: Re-raise search errors instead of returning "" (for circuit breakers)
 
         Returns:
             Formatted search results ready for LLM consumption
@@ -60,28 +299,40 @@ class ImprovedWebSearchService:
         if self.provider == "none":
             return ""
 
+        # Keyed by query alone: with hedging, any provider may answer
+        cache_key = self.cache.make_key("improved", query, num_results)
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            print(f"[WEB CACHE] Hit for: {query[:50]}")
+            return cached
+
         # Enhance query with SFSU context
         enhanced_query = f"San Francisco State University {query}"
 
         try:
-            if self.provider == "tavily":
-                return await self._search_tavily(enhanced_query, num_results)
-            elif self.provider == "perplexity":
-                return await self._search_perplexity(enhanced_query, num_results)
-            elif self.provider == "brave":
-                return await self._search_brave(enhanced_query, num_results)
-            else:  # serpapi fallback
-                return await self._search_serpapi(enhanced_query, num_results)
+            if self.hedging_enabled and len(self.providers) > 1:
+                provider, results = await self._hedged_search(enhanced_query, num_results)
+            else:
+                provider = self.provider
+                results = await self._call_provider(provider, enhanced_query, num_results)
+
+            content = await self._render(provider, results)
+
+            self.cache.set(cache_key, content, query)
+            return content
 
         except Exception as e:
-            print(f"[ERROR] Web search error ({self.provider}): {e}")
+            # Failures are not cached, so the next request retries
+            print(f"[ERROR] Web search error: {e}")
+            if raise_errors:
+                raise
             return ""
 
     # ========================================================================
     # TAVILY SEARCH (Best for LLMs - returns clean, structured data)
     # ========================================================================
 
-    async def _search_tavily(self, query: str, num_results: int) -> str:
+    def _search_tavily(self, query: str, num_results: int) -> str:
         """
         Search using Tavily API - optimized for AI/LLM consumption.
         Free tier: 1000 requests/month
@@ -131,7 +382,7 @@ class ImprovedWebSearchService:
     # PERPLEXITY SEARCH (AI-native search with built-in citations)
     # ========================================================================
 
-    async def _search_perplexity(self, query: str, num_results: int) -> str:
+    def _search_perplexity(self, query: str, num_results: int) -> str:
         """
         Search using Perplexity API - AI-native search with citations.
         Check if free with student account (Comet browser enrollment).
@@ -190,9 +441,12 @@ class ImprovedWebSearchService:
     # BRAVE SEARCH (Free tier: 2000 requests/month, no CC required)
     # ========================================================================
 
-    async def _search_brave(self, query: str, num_results: int) -> str:
+    def _search_brave(self, query: str, num_results: int) -> List[Dict]:
         """
         Search using Brave Search API - generous free tier.
+
+        Returns:
+            Result dicts (title, url, description); [] on failure
         """
         try:
             api_key = os.getenv("BRAVE_API_KEY")
@@ -212,39 +466,51 @@ class ImprovedWebSearchService:
 
             if response.status_code == 200:
                 data = response.json()
-                formatted_results = []
-
-                for i, result in enumerate(data.get("web", {}).get("results", [])[:num_results], 1):
-                    formatted_results.append(
-                        f"[Web Result {i}]\n"
-                        f"Title: {result.get('title', '')}\n"
-                        f"URL: {result.get('url', '')}\n"
-                        f"Description: {result.get('description', '')}\n"
-                    )
-
-                    # Fetch full content if URL is available
-                    if result.get("url"):
-                        full_content = self._fetch_webpage_content(result["url"])
-                        if full_content:
-                            formatted_results[-1] += f"Full Content: {full_content}\n"
-
-                return "\n".join(formatted_results)
+                return [
+                    {
+                        "title": result.get("title", ""),
+                        "url": result.get("url", ""),
+                        "description": result.get("description", "")
+                    }
+                    for result in data.get("web", {}).get("results", [])[:num_results]
+                ]
             else:
                 print(f"[ERROR] Brave API error: {response.status_code}")
-                return ""
+                return []
 
         except Exception as e:
             print(f"[ERROR] Brave search failed: {e}")
-            return ""
+            return []
+
+    def _format_brave(self, results: List[Dict], pages: Dict[str, str]) -> str:
+        """Format Brave results, appending full page content where it was fetched."""
+        formatted_results = []
+
+        for i, result in enumerate(results, 1):
+            formatted_results.append(
+                f"[Web Result {i}]\n"
+                f"Title: {result['title']}\n"
+                f"URL: {result['url']}\n"
+                f"Description: {result['description']}\n"
+            )
+
+            full_content = pages.get(result['url'], "")
+            if full_content:
+                formatted_results[-1] += f"Full Content: {full_content}\n"
+
+        return "\n".join(formatted_results)
 
     # ========================================================================
     # SERPAPI (Fallback - requires existing key)
     # ========================================================================
 
-    async def _search_serpapi(self, query: str, num_results: int) -> str:
+    def _search_serpapi(self, query: str, num_results: int) -> List[Dict]:
         """
         Search using SerpAPI (fallback option).
         Uses existing web_search.py logic.
+
+        Returns:
+            Result dicts (title, url, snippet); [] on failure
         """
         try:
             search = GoogleSearch({
@@ -254,82 +520,43 @@ class ImprovedWebSearchService:
             })
 
             results = search.get_dict()
-            formatted_results = []
-
-            if "organic_results" in results:
-                for i, result in enumerate(results["organic_results"][:num_results], 1):
-                    title = result.get("title", "")
-                    snippet = result.get("snippet", "")
-                    link = result.get("link", "")
-
-                    # Fetch full content
-                    print(f"[INFO] Fetching content from: {link}")
-                    full_content = self._fetch_webpage_content(link, max_length=5000)
-
-                    if full_content:
-                        formatted_results.append(
-                            f"[Web Result {i}]\n"
-                            f"Title: {title}\n"
-                            f"URL: {link}\n"
-                            f"Content: {full_content}\n"
-                        )
-                    else:
-                        formatted_results.append(
-                            f"[Web Result {i}]\n"
-                            f"Title: {title}\n"
-                            f"Snippet: {snippet}\n"
-                            f"URL: {link}\n"
-                        )
-
-                return "\n".join(formatted_results)
 
-            return ""
+            return [
+                {
+                    "title": result.get("title", ""),
+                    "url": result.get("link", ""),
+                    "snippet": result.get("snippet", "")
+                }
+                for result in results.get("organic_results", [])[:num_results]
+            ]
 
         except Exception as e:
             print(f"[ERROR] SerpAPI search failed: {e}")
-            return ""
+            return []
 
-    # ========================================================================
-    # UTILITY METHODS
-    # ========================================================================
-
-    def _fetch_webpage_content(self, url: str, max_length: int = 3000) -> str:
-        """
-        Fetch and extract text content from a webpage.
-        Used when search API doesn't provide full content.
-        """
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-
-            response = requests.get(url, headers=headers, timeout=5)
-            response.raise_for_status()
-
-            # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            # Remove script and style elements
-            for script in soup(['script', 'style', 'nav', 'footer', 'header']):
-                script.decompose()
+    def _format_serpapi(self, results: List[Dict], pages: Dict[str, str]) -> str:
+        """Format SerpAPI results with full page content, or the snippet if the fetch failed."""
+        formatted_results = []
 
-            # Get text
-            text = soup.get_text(separator=' ', strip=True)
+        for i, result in enumerate(results, 1):
+            full_content = pages.get(result['url'], "")
 
-            # Clean up whitespace
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
-
-            # Limit length
-            if len(text) > max_length:
-                text = text[:max_length] + "..."
-
-            return text
+            if full_content:
+                formatted_results.append(
+                    f"[Web Result {i}]\n"
+                    f"Title: {result['title']}\n"
+                    f"URL: {result['url']}\n"
+                    f"Content: {full_content}\n"
+                )
+            else:
+                formatted_results.append(
+                    f"[Web Result {i}]\n"
+                    f"Title: {result['title']}\n"
+                    f"Snippet: {result['snippet']}\n"
+                    f"URL: {result['url']}\n"
+                )
 
-        except Exception as e:
-            print(f"[ERROR] Failed to fetch {url}: {e}")
-            return ""
+        return "\n".join(formatted_results)
 
 
 # ============================================================================
@@ -9,13 +9,15 @@ import sys
 from pathlib import Path
 from typing import List, Dict, Any
 import re
-from bs4 import BeautifulSoup
-from html import unescape
 from sentence_transformers import SentenceTransformer
 from supabase import create_client, Client
 from dotenv import load_dotenv
 import time
 
+# Add project root to path to import backend modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from backend.services.html_text import clean_document_html
+
 # Load environment variables
 load_dotenv()
 
@@ -42,25 +44,7 @@ print(f"[OK] Loaded {EMBEDDING_MODEL} (384 dimensions)")
 
 def clean_html(html_content: str) -> str:
     """Clean HTML content and extract readable text."""
-    if not html_content or not isinstance(html_content, str):
-        return ""
-
-    try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        # Remove script and style elements
-        for script in soup(["script", "style", "meta", "link"]):
-            script.extract()
-
-        # Get text and unescape HTML entities
-        text = unescape(soup.get_text(separator=' ', strip=True))
-
-        # Clean up whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text
-    except Exception as e:
-        print(f"[WARNING]  Warning: Error cleaning HTML: {e}")
-        return str(html_content)
+    return clean_document_html(html_content)
 
 
 def json_to_text(json_obj: Any) -> str:
@@ -205,6 +205,90 @@ AS $$
     LIMIT match_count;
 $$;
 
+-- Hybrid search: vector similarity + full-text retrieval fused in ONE call
+-- Keyword leg uses the documents_content_idx GIN index (no leading-wildcard ILIKE scans).
+-- keyword_score = fraction of query lexemes present in the document.
+-- Fusion: both legs -> average, vector only -> vector_score, keyword only -> keyword_score * 0.7
+CREATE OR REPLACE FUNCTION hybrid_search(
+    query_embedding vector(384),
+    query_text text,
+    match_threshold float DEFAULT 0.15,
+    match_count int DEFAULT 5,
+    vector_count int DEFAULT 10,
+    keyword_count int DEFAULT 50
+)
+RETURNS TABLE (
+    id bigint,
+    content text,
+    metadata jsonb,
+    source varchar(255),
+    vector_score float,
+    keyword_score float,
+    similarity float
+)
+LANGUAGE sql STABLE
+AS $$
+    WITH query_terms AS (
+        SELECT
+            -- OR together the query lexemes
+            replace(plainto_tsquery('english', query_text)::text, ' & ', ' | ')::tsquery AS ts_query,
+            tsvector_to_array(to_tsvector('english', query_text)) AS lexemes
+    ),
+    vector_hits AS (
+        SELECT
+            documents.id,
+            1 - (documents.embedding <=> query_embedding) AS vector_score
+        FROM documents
+        WHERE 1 - (documents.embedding <=> query_embedding) > match_threshold
+        ORDER BY documents.embedding <=> query_embedding
+        LIMIT vector_count
+    ),
+    keyword_hits AS (
+        SELECT
+            documents.id,
+            to_tsvector('english', documents.content) AS doc_vector
+        FROM documents, query_terms
+        WHERE to_tsvector('english', documents.content) @@ query_terms.ts_query
+        ORDER BY ts_rank_cd(to_tsvector('english', documents.content), query_terms.ts_query) DESC
+        LIMIT keyword_count
+    ),
+    keyword_scored AS (
+        SELECT
+            keyword_hits.id,
+            (
+                SELECT count(*)
+                FROM unnest(query_terms.lexemes) AS lexeme
+                WHERE lexeme = ANY(tsvector_to_array(keyword_hits.doc_vector))
+            )::float / GREATEST(cardinality(query_terms.lexemes), 1) AS keyword_score
+        FROM keyword_hits, query_terms
+    ),
+    fused AS (
+        SELECT
+            COALESCE(v.id, k.id) AS id,
+            COALESCE(v.vector_score, 0) AS vector_score,
+            COALESCE(k.keyword_score, 0) AS keyword_score,
+            CASE
+                WHEN v.id IS NOT NULL AND k.id IS NOT NULL THEN (v.vector_score + k.keyword_score) / 2
+                WHEN v.id IS NOT NULL THEN v.vector_score
+                ELSE k.keyword_score * 0.7
+            END AS similarity
+        FROM vector_hits v
+        FULL OUTER JOIN keyword_scored k ON v.id = k.id
+    )
+    SELECT
+        documents.id,
+        documents.content,
+        documents.metadata,
+        documents.source,
+        fused.vector_score,
+        fused.keyword_score,
+        fused.similarity
+    FROM fused
+    JOIN documents ON documents.id = fused.id
+    ORDER BY fused.similarity DESC
+    LIMIT match_count;
+$$;
+
 -- ============================================================================
 -- DEFAULT DATA: Create default professor account
 -- ============================================================================
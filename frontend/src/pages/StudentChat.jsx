@@ -1,6 +1,6 @@
 import { useState, useRef, useEffect } from 'react';
 import { Send, Flag, Bot, User, Sparkles, Home, Download, Copy, Check, Zap, BookOpen, GraduationCap, DollarSign, Globe, Building, ThumbsUp, ThumbsDown, Plus, Bell, Eye } from 'lucide-react';
-import { chat, flagIncorrect, submitFeedback, getNotifications, markNotificationAsRead, markAllNotificationsAsRead, getCorrectionDetails } from '../services/api';
+import { chatStream, flagIncorrect, submitFeedback, getNotifications, markNotificationAsRead, markAllNotificationsAsRead, getCorrectionDetails } from '../services/api';
 import ReactMarkdown from 'react-markdown';
 import remarkGfm from 'remark-gfm';
 import { useNavigate } from 'react-router-dom';
@@ -163,11 +163,24 @@ export default function StudentChat() {
           content: msg.content
         }));
 
-      const response = await chat(userMessage, history, sessionId);
-      setMessages((prev) => [
-        ...prev,
-        { role: 'assistant', content: response.response, id: Date.now() },
-      ]);
+      // Stream tokens into the assistant message as they arrive
+      const messageId = Date.now();
+      let streamed = '';
+      const upsertAssistantMessage = (content) => {
+        setMessages((prev) => (
+          prev.some((msg) => msg.id === messageId)
+            ? prev.map((msg) => (msg.id === messageId ? { ...msg, content } : msg))
+            : [...prev, { role: 'assistant', content, id: messageId }]
+        ));
+      };
+
+      const response = await chatStream(userMessage, history, sessionId, (token) => {
+        streamed += token;
+        upsertAssistantMessage(streamed);
+      });
+
+      // Final response is authoritative (it may differ after the relevance check)
+      upsertAssistantMessage(response.response);
 
       // Update suggested questions if provided
       if (response.suggested_questions && response.suggested_questions.length > 0) {
@@ -28,6 +28,58 @@ export const chat = async (query, conversationHistory = null, sessionId = null)
   return response.data;
 };
 
+// Streaming Chat API (Server-Sent Events over POST)
+// onToken(text) is called for each streamed chunk; resolves with the final
+// response object (same shape as chat()).
+export const chatStream = async (query, conversationHistory = null, sessionId = null, onToken = () => {}) => {
+  const res = await fetch(`${API_BASE_URL}/chat/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({
+      query,
+      conversation_history: conversationHistory,
+      session_id: sessionId
+    }),
+  });
+
+  if (!res.ok || !res.body) {
+    throw new Error(`Stream request failed: ${res.status}`);
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let finalResponse = null;
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+    const events = buffer.split('\n\n');
+    buffer = events.pop();
+
+    for (const event of events) {
+      const dataLine = event.split('\n').find((line) => line.startsWith('data: '));
+      if (!dataLine) continue;
+
+      const payload = JSON.parse(dataLine.slice(6));
+      if (payload.type === 'token') {
+        onToken(payload.content);
+      } else if (payload.type === 'done') {
+        finalResponse = payload;
+      } else if (payload.type === 'error') {
+        throw new Error(payload.response);
+      }
+    }
+  }
+
+  if (!finalResponse) {
+    throw new Error('Stream ended without a final response');
+  }
+  return finalResponse;
+};
+
 // Professor Auth API
 export const professorLogin = async (username, password) => {
   const response = await api.post('/professor/login', { username, password });
@@ -0,0 +1,225 @@
+"""
+Evaluate hybrid-search fusion strategies (legacy, rrf, zscore)
+Replays the QA pairs in data/qa_training_data.json and reports recall@k,
+MRR and latency per strategy. A hit = a retrieved document from the
+QA pair's source_url.
+
+Offline (default): builds an in-memory corpus from data/*.json, embeds it
+with the production embedding model (cached under backend/.index_cache)
+and runs vector + keyword retrieval locally, so strategies are compared on
+identical candidates without touching Supabase.
+
+Live (--live): runs DatabaseService.search_documents against Supabase with
+each strategy (reranker disabled).
+
+Usage (from project root):
+    python scripts/admin/evaluate_fusion.py [--questions 200] [--live]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+from pathlib import Path
+from typing import List, Dict
+
+import numpy as np
+from dotenv import load_dotenv
+
+# Add backend to path to import services the same way main.py does
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../backend'))
+from services.fusion import FUSION_STRATEGIES, get_fusion_strategy
+from services.database import DatabaseService
+from services.resources import EMBEDDING_MODEL_NAME, get_embedding_model
+
+load_dotenv()
+
+DATA_DIR = "./data"
+QA_FILE = "qa_training_data.json"
+CACHE_DIR = "./backend/.index_cache"
+K_VALUES = [1, 3, 5, 10, 15]
+THRESHOLD = 0.15
+KEYWORD_COUNT = 50
+
+
+def normalize_url(url: str) -> str:
+    """Compare URLs without scheme, www., fragment or trailing slash."""
+    url = (url or "").split('#')[0].rstrip('/').lower()
+    url = url.split('://', 1)[-1]
+    return url[4:] if url.startswith('www.') else url
+
+
+def load_qa_pairs(max_questions: int, seed: int) -> List[Dict]:
+    with open(Path(DATA_DIR) / QA_FILE, 'r', encoding='utf-8') as f:
+        pairs = [qa for qa in json.load(f) if qa.get('question') and qa.get('source_url')]
+
+    random.Random(seed).shuffle(pairs)
+    return pairs[:max_questions] if max_questions else pairs
+
+
+def load_corpus() -> List[Dict]:
+    """Every scraped item with a URL and content (the same items ingestion loads)."""
+    corpus = []
+    for path in sorted(Path(DATA_DIR).glob("*.json")):
+        if path.name == QA_FILE:
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"[WARNING] Skipping {path.name}: {e}")
+            continue
+
+        for item in data if isinstance(data, list) else []:
+            if not isinstance(item, dict):
+                continue
+            url = item.get('url') or item.get('source')
+            content = item.get('content') or item.get('full_text') or item.get('text')
+            if isinstance(url, str) and isinstance(content, str) and len(content.strip()) >= 50:
+                corpus.append({
+                    'id': len(corpus),
+                    'url': normalize_url(url),
+                    'content': f"{item.get('title', '')}\n{content}"[:10000]
+                })
+    return corpus
+
+
+def embed_corpus(corpus: List[Dict]) -> np.ndarray:
+    """Encode the corpus once and cache the matrix on disk."""
+    fingerprint = hashlib.md5("".join(d['url'] + d['content'][:200] for d in corpus).encode()).hexdigest()[:12]
+    cache_path = Path(CACHE_DIR) / f"fusion_eval_{fingerprint}.npy"
+
+    if cache_path.exists():
+        print(f"[INFO] Loading cached corpus embeddings: {cache_path}")
+        return np.load(cache_path)
+
+    print(f"[INFO] Embedding {len(corpus)} documents with {EMBEDDING_MODEL_NAME} (cached afterwards)...")
+    matrix = get_embedding_model().encode(
+        [d['content'] for d in corpus],
+        batch_size=64,
+        normalize_embeddings=True,
+        show_progress_bar=True
+    ).astype(np.float32)
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(cache_path, matrix)
+    return matrix
+
+
+def is_relevant(doc: Dict, source_url: str) -> bool:
+    if doc.get('url'):
+        return doc['url'] == source_url
+    # Live documents: URL is embedded in the content or metadata
+    metadata_url = normalize_url((doc.get('metadata') or {}).get('url', ''))
+    return metadata_url == source_url or source_url in doc.get('content', '').lower()
+
+
+def first_hit_rank(docs: List[Dict], source_url: str) -> int:
+    for rank, doc in enumerate(docs, start=1):
+        if is_relevant(doc, source_url):
+            return rank
+    return 0
+
+
+def summarize(name: str, ranks: List[int], latencies_ms: List[float]):
+    n = len(ranks)
+    recalls = "  ".join(f"R@{k}={sum(1 for r in ranks if 0 < r <= k) / n:.3f}" for k in K_VALUES)
+    mrr = sum(1.0 / r for r in ranks if r) / n
+    p50, p95 = np.percentile(latencies_ms, [50, 95])
+    print(f"  {name:<8} {recalls}  MRR={mrr:.3f}  p50={p50:.1f}ms  p95={p95:.1f}ms")
+
+
+def run_offline(qa_pairs: List[Dict]):
+    corpus = load_corpus()
+    corpus_urls = {d['url'] for d in corpus}
+    qa_pairs = [qa for qa in qa_pairs if normalize_url(qa['source_url']) in corpus_urls]
+    print(f"[INFO] Corpus: {len(corpus)} documents; {len(qa_pairs)} questions with their source in the corpus")
+
+    matrix = embed_corpus(corpus)
+    contents_lower = [d['content'].lower() for d in corpus]
+
+    query_vectors = get_embedding_model().encode([qa['question'] for qa in qa_pairs], normalize_embeddings=True)
+
+    limit = max(K_VALUES)
+    strategies = {name: get_fusion_strategy(name) for name in FUSION_STRATEGIES}
+    ranks = {name: [] for name in strategies}
+    latencies = {name: [] for name in strategies}
+
+    for qa, query_vector in zip(qa_pairs, query_vectors):
+        source_url = normalize_url(qa['source_url'])
+        retrieval_start = time.perf_counter()
+
+        # Vector leg (mirrors match_documents / hybrid_search vector_hits)
+        scores = matrix @ query_vector
+        top = np.argsort(-scores)[:limit * 2]
+        vector_hits = [
+            {**corpus[i], 'vector_score': float(scores[i]), 'similarity': float(scores[i])}
+            for i in top if scores[i] > THRESHOLD
+        ]
+
+        # Keyword leg (fraction of query keywords present, like the ILIKE path)
+        keywords = DatabaseService._extract_keywords(qa['question'])
+        keyword_hits = []
+        if keywords:
+            for i, content in enumerate(contents_lower):
+                matches = sum(1 for kw in keywords if kw.lower() in content)
+                if matches:
+                    keyword_hits.append({**corpus[i], 'keyword_score': matches / len(keywords)})
+            keyword_hits.sort(key=lambda d: d['keyword_score'], reverse=True)
+            keyword_hits = keyword_hits[:KEYWORD_COUNT]
+
+        retrieval_ms = (time.perf_counter() - retrieval_start) * 1000
+
+        for name, strategy in strategies.items():
+            start = time.perf_counter()
+            fused = strategy.fuse(vector_hits, keyword_hits, limit)
+            latencies[name].append(retrieval_ms + (time.perf_counter() - start) * 1000)
+            ranks[name].append(first_hit_rank(fused, source_url))
+
+    print(f"\nOffline results ({len(qa_pairs)} questions, latency = local retrieval + fusion)")
+    for name in strategies:
+        summarize(name, ranks[name], latencies[name])
+
+
+async def run_live(qa_pairs: List[Dict]):
+    db = DatabaseService()
+    db.reranker = None
+    limit = max(K_VALUES)
+
+    print(f"\nLive results ({len(qa_pairs)} questions, latency = search_documents end to end)")
+    for name in FUSION_STRATEGIES:
+        db.fusion = get_fusion_strategy(name)
+        db.embeddings.clear()  # Don't let the first strategy warm the cache for the others
+        ranks, latencies = [], []
+
+        for qa in qa_pairs:
+            start = time.perf_counter()
+            docs = await db.search_documents(qa['question'], limit=limit, threshold=THRESHOLD)
+            latencies.append((time.perf_counter() - start) * 1000)
+            ranks.append(first_hit_rank(docs, normalize_url(qa['source_url'])))
+
+        summarize(name, ranks, latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate hybrid-search fusion strategies")
+    parser.add_argument("--questions", type=int, default=0, help="Number of QA pairs to replay (0 = all)")
+    parser.add_argument("--seed", type=int, default=42, help="Shuffle seed for question sampling")
+    parser.add_argument("--live", action="store_true", help="Query Supabase instead of the offline corpus")
+    args = parser.parse_args()
+
+    qa_pairs = load_qa_pairs(args.questions, args.seed)
+    print(f"[INFO] Loaded {len(qa_pairs)} QA pairs from {DATA_DIR}/{QA_FILE}")
+
+    if args.live:
+        asyncio.run(run_live(qa_pairs))
+    else:
+        run_offline(qa_pairs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Benchmark HTML-to-text extraction over the data/*.json corpus
+Compares the legacy BeautifulSoup clean_html against backend/services/html_text.py
+(lxml and streaming backends) and reports pages/sec and output parity.
+
+Most documents in data/ were stored as extracted text, so the corpus is run
+twice: as stored, and with each document wrapped in a typical sfsu.edu page
+layout (head/scripts/styles/header/nav/footer, one <p> per line) to mirror
+what WebSearchService fetches.
+
+Usage (from project root):
+    python scripts/migration/benchmark_html_extraction.py [--repeat 3]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from html import escape, unescape
+from pathlib import Path
+from bs4 import BeautifulSoup
+
+# Add project root to path to import backend modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+from backend.services import html_text
+from backend.services.html_text import html_to_text, clean_document_html, WEB_DROP_TAGS
+
+DATA_DIR = "./data"
+TEXT_FIELDS = {'content', 'html', 'body', 'text', 'full_text'}
+
+
+def legacy_clean_html(html_content):
+    """Ingestion clean_html as it was before html_text.py."""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    for script in soup(["script", "style", "meta", "link"]):
+        script.extract()
+    text = unescape(soup.get_text(separator=' ', strip=True))
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def legacy_web_extract(html_content):
+    """WebSearchService page extraction as it was before html_text.py."""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    for script in soup(['script', 'style', 'nav', 'footer', 'header']):
+        script.decompose()
+    text = soup.get_text(separator=' ', strip=True)
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+
+def new_web_extract(html_content):
+    return html_to_text(html_content, drop_tags=WEB_DROP_TAGS)
+
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8"><title>{title}</title>
+<link rel="stylesheet" href="/themes/sfsu/css/style.css">
+<style>body {{ font-family: sans-serif; }} .nav a {{ color: #463077; }}</style>
+<script>window.dataLayer = window.dataLayer || []; function gtag(){{dataLayer.push(arguments);}}</script>
+</head>
+<body>
+<header><a href="/">San Francisco State University</a></header>
+<nav class="nav"><ul><li><a href="/academics">Academics</a></li><li><a href="/admissions">Admissions</a></li></ul></nav>
+<!-- main content -->
+<main><h1>{title}</h1>
+{paragraphs}
+<p>Questions? Contact the department<script>trackContact()</script>today<style>.cta {{ color: #463077; }}</style>or visit Thornton Hall.</p>
+</main>
+<footer>&copy; San Francisco State University &middot; 1600 Holloway Avenue</footer>
+</body>
+</html>"""
+
+
+def wrap_as_page(text):
+    """Wrap stored text in a typical page layout."""
+    paragraphs = "\n".join(f"<p>{escape(line)}</p>" for line in text.splitlines() if line.strip())
+    return PAGE_TEMPLATE.format(title=escape(text[:60]), paragraphs=paragraphs)
+
+
+def collect_documents():
+    """Collect every string the migration scripts pass to clean_html."""
+    docs = []
+
+    def walk(obj):
+        if isinstance(obj, dict):
+            for key, value in obj.items():
+                if key.lower() in TEXT_FIELDS and isinstance(value, str):
+                    docs.append(value)
+                elif isinstance(value, (dict, list)):
+                    walk(value)
+        elif isinstance(obj, list):
+            for item in obj:
+                walk(item)
+
+    for path in sorted(Path(DATA_DIR).glob("*.json")):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                walk(json.load(f))
+        except Exception as e:
+            print(f"[WARNING] Skipping {path.name}: {e}")
+
+    return docs
+
+
+def run(name, func, docs, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outputs = [func(doc) for doc in docs]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"  {name:<28} {len(docs) / best:>10.1f} pages/sec  ({best:.2f}s)")
+    return outputs
+
+
+def parity(reference, candidate):
+    """Fraction of identical outputs, exact and ignoring whitespace differences."""
+    if not reference:
+        return 1.0, 1.0
+    exact = sum(1 for a, b in zip(reference, candidate) if a == b)
+    normalized = sum(1 for a, b in zip(reference, candidate) if a.split() == b.split())
+    return exact / len(reference), normalized / len(reference)
+
+
+def benchmark(docs, repeat):
+    lxml_available = html_text.LXML_AVAILABLE
+    backends = (["lxml"] if lxml_available else []) + ["streaming"]
+
+    for label, legacy, new in [
+        ("Ingestion clean_html", legacy_clean_html, clean_document_html),
+        ("Web page extraction", legacy_web_extract, new_web_extract)
+    ]:
+        print(f"\n{label}")
+        reference = run("before (bs4 html.parser)", legacy, docs, repeat)
+
+        for backend in backends:
+            html_text.LXML_AVAILABLE = backend == "lxml"
+            outputs = run(f"after ({backend})", new, docs, repeat)
+            exact, normalized = parity(reference, outputs)
+            print(f"  {'parity (exact / whitespace)':<28} {exact:>9.1%} / {normalized:.1%}")
+
+        html_text.LXML_AVAILABLE = lxml_available
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML-to-text extraction")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per extractor (best is reported)")
+    parser.add_argument("--stored-only", action="store_true", help="Skip the wrapped web page run")
+    args = parser.parse_args()
+
+    docs = collect_documents()
+    print(f"[INFO] lxml available: {html_text.LXML_AVAILABLE}")
+
+    print(f"\n[INFO] Corpus as stored: {len(docs)} documents, {sum(len(d) for d in docs) / 1e6:.1f} MB")
+    benchmark(docs, args.repeat)
+
+    if not args.stored_only:
+        pages = [wrap_as_page(d) for d in docs]
+        print(f"\n[INFO] Corpus as web pages: {len(pages)} pages, {sum(len(p) for p in pages) / 1e6:.1f} MB")
+        benchmark(pages, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
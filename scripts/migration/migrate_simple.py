@@ -7,13 +7,15 @@ import json
 import os
 import sys
 from pathlib import Path
-from bs4 import BeautifulSoup
-from html import unescape
 import re
 from sentence_transformers import SentenceTransformer
 from supabase import create_client
 from dotenv import load_dotenv
 
+# Add project root to path to import backend modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+from backend.services.html_text import clean_document_html
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
@@ -39,17 +41,7 @@ supabase = create_client(supabase_url, supabase_key)
 print("[OK] Connected to Supabase")
 
 def clean_html(html_content):
-    if not html_content or not isinstance(html_content, str):
-        return ""
-    try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        for script in soup(["script", "style", "meta", "link"]):
-            script.extract()
-        text = unescape(soup.get_text(separator=' ', strip=True))
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text
-    except:
-        return str(html_content)
+    return clean_document_html(html_content)
 
 def json_to_text(json_obj):
     if isinstance(json_obj, dict):
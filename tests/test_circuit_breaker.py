@@ -0,0 +1,92 @@
+"""
+Test retrieval circuit breaker
+Verifies closed -> open -> half-open transitions and single-probe behavior
+"""
+
+import sys
+import os
+
+# Add backend directory to path to import backend modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from services.circuit_breaker import CircuitBreaker
+
+
+def _expire_cooldown(breaker: CircuitBreaker):
+    """Pretend the recovery window has passed."""
+    breaker.opened_at -= breaker.recovery_seconds
+
+
+def test_opens_after_consecutive_failures():
+    print("=" * 80)
+    print("CIRCUIT BREAKER OPEN TEST")
+    print("=" * 80)
+
+    breaker = CircuitBreaker("web", failure_threshold=3, recovery_seconds=30)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # Resets the streak
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED, "Failures must be consecutive to open"
+    print("[OK] A success resets the failure streak")
+
+    breaker.record_failure(timeout=True)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request(), "Open circuit rejects calls"
+
+    stats = breaker.get_stats()
+    print(f"Stats: {stats}")
+    assert stats['times_opened'] == 1 and stats['timeouts'] == 1 and stats['rejected'] == 1
+    print("[OK] Circuit opened after 3 consecutive failures")
+
+
+def test_half_open_probe():
+    print("\n" + "=" * 80)
+    print("CIRCUIT BREAKER HALF-OPEN TEST")
+    print("=" * 80)
+
+    breaker = CircuitBreaker("vector", failure_threshold=1, recovery_seconds=30)
+    breaker.record_failure()
+    _expire_cooldown(breaker)
+
+    assert breaker.allow_request(), "First call after the cool-down is the probe"
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request(), "Only one probe at a time"
+    print("[OK] Single probe allowed after cool-down")
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN, "Failed probe re-opens the circuit"
+    assert not breaker.allow_request()
+    print("[OK] Failed probe re-opened the circuit")
+
+    _expire_cooldown(breaker)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request() and breaker.allow_request(), "Closed circuit allows every call"
+    print("[OK] Successful probe closed the circuit")
+
+
+def test_cancelled_probe_frees_slot():
+    print("\n" + "=" * 80)
+    print("CIRCUIT BREAKER CANCELLED PROBE TEST")
+    print("=" * 80)
+
+    breaker = CircuitBreaker("web", failure_threshold=1, recovery_seconds=30)
+    breaker.record_failure()
+    _expire_cooldown(breaker)
+
+    assert breaker.allow_request()
+    breaker.record_cancelled()
+    assert breaker.state == CircuitBreaker.HALF_OPEN, "Cancellation gives no verdict"
+    assert breaker.allow_request(), "Next call may probe after a cancelled probe"
+    print("[OK] Cancelled probe does not block the next one")
+
+
+if __name__ == "__main__":
+    test_opens_after_consecutive_failures()
+    test_half_open_probe()
+    test_cancelled_probe_frees_slot()
+    print("\n[SUCCESS] All circuit breaker checks passed")
@@ -0,0 +1,102 @@
+"""
+Test query-embedding memo cache
+Verifies repeat/normalized queries skip encoding and LRU eviction works
+"""
+
+import asyncio
+import sys
+import os
+
+# Add backend directory to path to import backend modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from services.embeddings import EmbeddingService
+
+
+class FakeArray(list):
+    def tolist(self):
+        return list(self)
+
+
+class CountingModel:
+    """Stand-in for SentenceTransformer that counts encode calls."""
+
+    def __init__(self):
+        self.calls = 0
+        self.inputs = []  # What each encode() call received
+
+    def encode(self, text, batch_size=None):
+        self.calls += 1
+        self.inputs.append(text)
+        if isinstance(text, list):
+            return FakeArray([[float(len(t)), 1.0] for t in text])
+        return FakeArray([float(len(text)), 1.0])
+
+
+def test_embedding_cache():
+    print("=" * 80)
+    print("EMBEDDING CACHE TEST")
+    print("=" * 80)
+
+    model = CountingModel()
+    service = EmbeddingService(model=model, max_size=2)
+
+    first = service.encode("What is CPT at SFSU?")
+    second = service.encode("  what is   CPT at sfsu?")
+
+    assert first == second, "Normalized queries should share an embedding"
+    assert model.calls == 1, f"Expected 1 encode, got {model.calls}"
+    print("[OK] Repeat query served from cache")
+
+    service.encode("How do I apply for OPT?")
+    service.encode("Where is the CS department?")  # Evicts the CPT entry
+    service.encode("What is CPT at SFSU?")
+
+    assert model.calls == 4, f"Expected 4 encodes after eviction, got {model.calls}"
+    print("[OK] Least recently used entry evicted")
+
+    stats = service.get_stats()
+    print(f"Stats: {stats}")
+    assert stats['hits'] == 1 and stats['misses'] == 4
+    assert stats['size'] == 2
+
+
+def test_micro_batching():
+    # Plain pytest has no asyncio plugin configured; drive the loop directly
+    asyncio.run(_check_micro_batching())
+
+
+async def _check_micro_batching():
+    print("\n" + "=" * 80)
+    print("EMBEDDING MICRO-BATCHING TEST")
+    print("=" * 80)
+
+    model = CountingModel()
+    service = EmbeddingService(model=model, batch_window_ms=20)
+
+    queries = [f"question number {i}" for i in range(10)] + ["question number 0"]
+    results = await asyncio.gather(*(service.encode_async(q) for q in queries))
+
+    assert model.calls == 1, f"Expected one batched encode, got {model.calls}"
+    assert isinstance(model.inputs[0], list), "Batch should be encoded as a list of texts"
+    assert sorted(model.inputs[0]) == sorted(set(queries)), "Each distinct query encoded exactly once"
+    assert results[0] == results[-1], "Duplicate queries should share a result"
+    assert results[3] == [float(len("question number 3")), 1.0]
+    print(f"[OK] {len(queries)} concurrent requests -> {model.calls} encode call")
+
+    stats = service.get_stats()
+    print(f"Stats: {stats}")
+    assert stats['batches'] == 1 and stats['avg_batch_size'] == 10
+
+    # Requests in separate windows are separate batches; cached ones are not re-encoded
+    await service.encode_async("a later question")
+    await service.encode_async("question number 5")
+    assert model.calls == 2, f"Expected a second batch only for the new query, got {model.calls}"
+    assert model.inputs[1] == ["a later question"]
+    print("[OK] Later request batched separately, cached request skipped encode")
+
+
+if __name__ == "__main__":
+    test_embedding_cache()
+    test_micro_batching()
+    print("\n[SUCCESS] All embedding cache checks passed")
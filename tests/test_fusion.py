@@ -0,0 +1,122 @@
+"""
+Test hybrid search fusion strategies
+Verifies merging by id, legacy scoring, RRF ranking and z-score weighting
+"""
+
+import sys
+import os
+
+# Add backend directory to path to import backend modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from services.fusion import (
+    FusionStrategy,
+    LegacyFusion,
+    RRFFusion,
+    WeightedZScoreFusion,
+    get_fusion_strategy,
+    legacy_similarity
+)
+
+
+VECTOR_HITS = [
+    {'id': 1, 'content': 'CPT eligibility', 'vector_score': 0.9},
+    {'id': 2, 'content': 'OPT timeline', 'vector_score': 0.8},
+    {'id': 3, 'content': 'Graduate advising', 'vector_score': 0.7}
+]
+
+KEYWORD_HITS = [
+    {'id': 4, 'content': 'CPT form', 'keyword_score': 1.0},
+    {'id': 2, 'content': 'OPT timeline', 'keyword_score': 0.5}
+]
+
+
+def test_legacy_similarity():
+    print("=" * 80)
+    print("LEGACY SIMILARITY TEST")
+    print("=" * 80)
+
+    assert legacy_similarity(0.75, 0.25) == 0.5, "Both scores are averaged"
+    assert legacy_similarity(0.8, 0) == 0.8, "Vector-only keeps the vector score"
+    assert abs(legacy_similarity(0, 1.0) - 0.7) < 1e-9, "Keyword-only is discounted"
+    print("[OK] Legacy formula matches the original search behavior")
+
+
+def test_merge_keeps_both_scores():
+    print("\n" + "=" * 80)
+    print("FUSION MERGE TEST")
+    print("=" * 80)
+
+    fused = LegacyFusion().fuse(VECTOR_HITS, KEYWORD_HITS, limit=10)
+    by_id = {doc['id']: doc for doc in fused}
+
+    assert sorted(by_id) == [1, 2, 3, 4], "Every doc from both lists appears once"
+    assert by_id[2]['vector_score'] == 0.8 and by_id[2]['keyword_score'] == 0.5
+    assert by_id[4]['vector_score'] == 0, "Keyword-only hit gets a zero vector score"
+    assert all('similarity' in doc and 'fusion_score' in doc for doc in fused)
+    assert [doc['id'] for doc in fused] == [1, 3, 4, 2], f"Unexpected legacy order: {[d['id'] for d in fused]}"
+    print("[OK] Duplicate ids merged, legacy ranking preserved")
+
+    assert len(LegacyFusion().fuse(VECTOR_HITS, KEYWORD_HITS, limit=2)) == 2
+    print("[OK] limit respected")
+
+
+def test_rrf_rewards_docs_in_both_lists():
+    print("\n" + "=" * 80)
+    print("RRF FUSION TEST")
+    print("=" * 80)
+
+    fused = RRFFusion(k=60).fuse(VECTOR_HITS, KEYWORD_HITS, limit=10)
+
+    assert fused[0]['id'] == 2, "Doc ranked in both lists should win under RRF"
+    assert abs(fused[0]['fusion_score'] - (1 / 62 + 1 / 62)) < 1e-9
+    # Rank 1 in one list beats rank 3 in one list
+    scores = {doc['id']: doc['fusion_score'] for doc in fused}
+    assert scores[1] == scores[4] > scores[3]
+    print(f"[OK] RRF order: {[doc['id'] for doc in fused]}")
+
+
+def test_zscore_weights():
+    print("\n" + "=" * 80)
+    print("Z-SCORE FUSION TEST")
+    print("=" * 80)
+
+    vector_heavy = WeightedZScoreFusion(vector_weight=1.0, keyword_weight=0.0)
+    assert vector_heavy.fuse(VECTOR_HITS, KEYWORD_HITS, limit=1)[0]['id'] == 1
+
+    keyword_heavy = WeightedZScoreFusion(vector_weight=0.0, keyword_weight=1.0)
+    assert keyword_heavy.fuse(VECTOR_HITS, KEYWORD_HITS, limit=1)[0]['id'] == 4
+    print("[OK] Weights decide which list dominates")
+
+    # Identical scores have zero spread; must not divide by zero
+    flat = [{'id': i, 'vector_score': 0.5} for i in range(3)]
+    fused = WeightedZScoreFusion().fuse(flat, [], limit=3)
+    assert len(fused) == 3
+    print("[OK] Zero-variance list handled")
+
+
+def test_strategy_selection():
+    print("\n" + "=" * 80)
+    print("FUSION STRATEGY SELECTION TEST")
+    print("=" * 80)
+
+    assert isinstance(get_fusion_strategy("rrf"), RRFFusion)
+    assert isinstance(get_fusion_strategy("zscore"), WeightedZScoreFusion)
+    assert isinstance(get_fusion_strategy("legacy"), LegacyFusion)
+    assert isinstance(get_fusion_strategy("no-such-strategy"), LegacyFusion), "Unknown names fall back to legacy"
+
+    try:
+        FusionStrategy()
+        assert False, "FusionStrategy must be abstract"
+    except TypeError:
+        pass
+    print("[OK] Strategies resolved by name, base class is abstract")
+
+
+if __name__ == "__main__":
+    test_legacy_similarity()
+    test_merge_keeps_both_scores()
+    test_rrf_rewards_docs_in_both_lists()
+    test_zscore_weights()
+    test_strategy_selection()
+    print("\n[SUCCESS] All fusion checks passed")
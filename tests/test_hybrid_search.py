@@ -0,0 +1,178 @@
+"""
+Test the single-RPC hybrid document search
+Verifies one hybrid_search round trip, result mapping and the multi-query fallback
+"""
+
+import sys
+import os
+import asyncio
+
+# Add backend directory to path to import backend modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from services.database import DatabaseService
+from services.fusion import get_fusion_strategy
+
+
+EMBEDDING = [0.1, 0.2, 0.3]
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    """Stands in for both rpc(...) and table(...).select(...).ilike(...).limit(...)."""
+
+    def __init__(self, client, data=None, error=None):
+        self.client = client
+        self.data = data
+        self.error = error
+
+    def select(self, *args):
+        return self
+
+    def ilike(self, column, pattern):
+        self.client.calls.append(("ilike", pattern))
+        return self
+
+    def limit(self, count):
+        return self
+
+    def execute(self):
+        if self.error is not None:
+            raise self.error
+        return FakeResult(self.data)
+
+
+class FakeClient:
+    """Records every Supabase call; hybrid_search either answers or raises."""
+
+    def __init__(self, hybrid_rows=None, hybrid_error=None, vector_rows=None, keyword_rows=None):
+        self.calls = []
+        self.hybrid_rows = hybrid_rows or []
+        self.hybrid_error = hybrid_error
+        self.vector_rows = vector_rows or []
+        self.keyword_rows = keyword_rows or []
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        if name == "hybrid_search":
+            return FakeQuery(self, self.hybrid_rows, self.hybrid_error)
+        return FakeQuery(self, self.vector_rows)
+
+    def table(self, name):
+        self.calls.append(("table", name))
+        return FakeQuery(self, self.keyword_rows)
+
+
+class FakeEmbeddings:
+    async def encode_async(self, text):
+        return EMBEDDING
+
+
+def make_service(client, fusion="legacy"):
+    """DatabaseService wired to fakes (skips the Supabase/model singletons)."""
+    service = DatabaseService.__new__(DatabaseService)
+    service.client = client
+    service.embeddings = FakeEmbeddings()
+    service.hybrid_rpc_available = True
+    service.fusion = get_fusion_strategy(fusion)
+    service.document_index = None
+    service.reranker = None
+    return service
+
+
+def test_single_round_trip():
+    print("=" * 80)
+    print("HYBRID SEARCH RPC TEST")
+    print("=" * 80)
+
+    rows = [
+        {'id': 7, 'content': 'CPT eligibility rules', 'source': 'isss', 'similarity': 0.81,
+         'vector_score': 0.9, 'keyword_score': 0.5},
+        {'id': 3, 'content': 'CPT application form', 'source': 'isss', 'similarity': 0.55,
+         'vector_score': 0, 'keyword_score': 1.0}
+    ]
+    client = FakeClient(hybrid_rows=rows)
+    service = make_service(client)
+
+    docs = asyncio.run(service.search_documents("CPT eligibility requirements", limit=5, threshold=0.4))
+
+    assert len(client.calls) == 1, f"Expected one round trip, got {client.calls}"
+    name, params = client.calls[0]
+    assert name == "hybrid_search"
+    assert params["query_embedding"] == EMBEDDING
+    assert params["match_threshold"] == 0.4
+    assert params["match_count"] == 5, "Legacy fusion runs in Postgres and returns `limit` rows"
+    assert params["vector_count"] == 10
+    assert "cpt" in params["query_text"].lower()
+    print("[OK] One hybrid_search call with the expected parameters")
+
+    assert docs == rows, "RPC rows are returned as-is, in ranked order"
+    print("[OK] Rows mapped straight through")
+
+
+def test_python_fusion_requests_all_candidates():
+    print("\n" + "=" * 80)
+    print("HYBRID SEARCH PYTHON FUSION TEST")
+    print("=" * 80)
+
+    rows = [
+        {'id': 1, 'content': 'OPT timeline', 'vector_score': 0.9, 'keyword_score': 0},
+        {'id': 2, 'content': 'OPT STEM extension', 'vector_score': 0.7, 'keyword_score': 1.0}
+    ]
+    client = FakeClient(hybrid_rows=rows)
+    service = make_service(client, fusion="rrf")
+
+    docs = asyncio.run(service.search_documents("OPT extension", limit=1))
+
+    _, params = client.calls[0]
+    assert params["match_count"] == params["vector_count"] + params["keyword_count"]
+    assert [doc['id'] for doc in docs] == [2], "RRF favours the doc in both lists"
+    assert 'fusion_score' in docs[0]
+    print("[OK] Every candidate fetched and fused in Python")
+
+
+def test_fallback_on_rpc_error():
+    print("\n" + "=" * 80)
+    print("HYBRID SEARCH FALLBACK TEST")
+    print("=" * 80)
+
+    vector_rows = [{'id': 5, 'content': 'Graduate advising hours', 'similarity': 0.7}]
+    keyword_rows = [{'id': 6, 'content': 'Graduate advising office', 'source': 'cs'}]
+
+    # Transient failure: fall back this time, keep trying the RPC afterwards
+    client = FakeClient(hybrid_error=Exception("connection reset"),
+                        vector_rows=vector_rows, keyword_rows=keyword_rows)
+    service = make_service(client)
+
+    docs = asyncio.run(service.search_documents("graduate advising", limit=5))
+
+    names = [call[0] for call in client.calls]
+    assert names[:2] == ["hybrid_search", "match_documents"], names
+    assert "ilike" in names, "Multi-query path runs the keyword queries"
+    assert sorted(doc['id'] for doc in docs) == [5, 6]
+    assert service.hybrid_rpc_available, "Transient errors must not disable the RPC"
+    print("[OK] Multi-query fallback used, RPC still enabled")
+
+    # Function missing: stop calling it until restart
+    client = FakeClient(hybrid_error=Exception("PGRST202: function hybrid_search does not exist"),
+                        vector_rows=vector_rows)
+    service = make_service(client)
+
+    asyncio.run(service.search_documents("graduate advising", limit=5))
+    assert not service.hybrid_rpc_available
+
+    client.calls.clear()
+    asyncio.run(service.search_documents("graduate advising", limit=5))
+    assert "hybrid_search" not in [call[0] for call in client.calls]
+    print("[OK] Missing function disables the RPC for later searches")
+
+
+if __name__ == "__main__":
+    test_single_round_trip()
+    test_python_fusion_requests_all_candidates()
+    test_fallback_on_rpc_error()
+    print("\n[SUCCESS] All hybrid search checks passed")
@@ -0,0 +1,150 @@
+"""
+Test Ollama backend pool routing
+Verifies least-outstanding routing, ejection on connection failures and
+5xx (but not timeouts), fallback when every backend is out, and rejoin
+"""
+
+import asyncio
+import sys
+import os
+
+import aiohttp
+
+# Add backend directory to path to import backend modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from services.ollama_pool import OllamaBackendPool
+
+
+URLS = ["http://gpu-1:11434", "http://gpu-2:11434", "http://gpu-3:11434"]
+
+
+def test_least_outstanding_routing():
+    print("=" * 80)
+    print("OLLAMA POOL ROUTING TEST")
+    print("=" * 80)
+
+    pool = OllamaBackendPool(URLS, model="llama3.2:3b")
+
+    # Idle backends share load in rotation
+    picked = [pool.pick().url for _ in range(6)]
+    assert sorted(picked) == sorted(URLS * 2), f"Uneven rotation: {picked}"
+    print("[OK] Idle backends picked in rotation")
+
+    pool.backends[0].in_flight = 2
+    pool.backends[1].in_flight = 1
+    assert pool.pick() is pool.backends[2], "Backend with fewest in-flight requests wins"
+    print("[OK] Least-loaded backend picked")
+
+
+def test_lease_tracks_in_flight():
+    asyncio.run(_check_lease())
+
+
+async def _check_lease():
+    print("\n" + "=" * 80)
+    print("OLLAMA POOL LEASE TEST")
+    print("=" * 80)
+
+    pool = OllamaBackendPool(URLS[:2], model="llama3.2:3b")
+
+    async with pool.lease() as first:
+        async with pool.lease() as second:
+            assert first is not second, "Concurrent leases spread across backends"
+            assert pool.get_stats()['in_flight'] == 2
+    assert pool.get_stats()['in_flight'] == 0
+    print("[OK] Leases spread and release in-flight counts")
+
+
+async def _fail_in_lease(pool, error):
+    try:
+        async with pool.lease() as backend:
+            raise error
+    except type(error):
+        pass
+    return backend
+
+
+def test_ejection_on_connection_errors_only():
+    asyncio.run(_check_ejection())
+
+
+async def _check_ejection():
+    print("\n" + "=" * 80)
+    print("OLLAMA POOL EJECTION TEST")
+    print("=" * 80)
+
+    pool = OllamaBackendPool(URLS[:1], model="llama3.2:3b", failure_threshold=2)
+    backend = pool.backends[0]
+
+    for _ in range(3):
+        await _fail_in_lease(pool, asyncio.TimeoutError())
+    assert backend.failures == 0 and backend.ejected_until == 0
+    assert backend.samples == 3, "Timeouts are kept as latency samples"
+    print("[OK] Timeouts do not count as failures")
+
+    await _fail_in_lease(pool, aiohttp.ClientConnectionError("refused"))
+    pool.record_response(backend, 503, 0.1)
+    assert backend.failures == 2 and backend.ejected_until > 0
+    assert pool.available_count() == 0
+    print("[OK] Connection error + 5xx ejected the backend")
+
+    # Every backend out: still route somewhere instead of failing outright
+    assert pool.pick() is backend
+    assert pool.get_stats()['no_backend_available'] == 1
+    print("[OK] Falls back to the whole pool when nothing is available")
+
+    pool.record_response(backend, 404, 0.1)
+    assert backend.consecutive_failures == 0, "4xx is the caller's problem, not the backend's"
+
+
+def test_health_checks_and_rejoin():
+    print("\n" + "=" * 80)
+    print("OLLAMA POOL HEALTH TEST")
+    print("=" * 80)
+
+    pool = OllamaBackendPool(URLS[:2], model="llama3.2:3b", health_timeout=3)
+    backend = pool.backends[0]
+
+    assert pool._tags_verdict(200, {'models': [{'name': 'llama3.2:3b'}]}, 50) is None
+    assert "not loaded" in pool._tags_verdict(200, {'models': [{'name': 'mistral'}]}, 50)
+    assert "took" in pool._tags_verdict(200, {'models': [{'name': 'llama3.2:3b'}]}, 5000)
+    assert "500" in pool._tags_verdict(500, None, 50)
+    print("[OK] /api/tags verdicts")
+
+    pool._apply_health(backend, False, 10, "/api/tags returned 500")
+    assert not backend.healthy and pool.available_count() == 1
+    assert pool.pick() is pool.backends[1], "Unhealthy backend is skipped"
+
+    # Ejection window over and healthy again: rejoins with a clean slate
+    backend.ejected_until = 1.0
+    backend.consecutive_failures = 5
+    pool._apply_health(backend, True, 10, None)
+    assert backend.healthy and backend.ejected_until == 0 and backend.consecutive_failures == 0
+    assert pool.available_count() == 2
+    print("[OK] Backend rejoined after a healthy check")
+
+
+def test_slow_backend_ejected():
+    print("\n" + "=" * 80)
+    print("OLLAMA POOL SLOW BACKEND TEST")
+    print("=" * 80)
+
+    pool = OllamaBackendPool(URLS[:2], model="llama3.2:3b", slow_factor=3.0)
+    fast, slow = pool.backends
+
+    for _ in range(pool.min_samples_for_slow):
+        pool.record_success(fast, 1.0)
+        pool.record_success(slow, 10.0)
+
+    assert slow.ejected_until > 0 and fast.ejected_until == 0
+    print(f"[OK] Slow backend ejected (EMA {slow.latency_ema:.1f}s vs {fast.latency_ema:.1f}s)")
+
+
+if __name__ == "__main__":
+    test_least_outstanding_routing()
+    test_lease_tracks_in_flight()
+    test_ejection_on_connection_errors_only()
+    test_health_checks_and_rejoin()
+    test_slow_backend_ejected()
+    print("\n[SUCCESS] All Ollama pool checks passed")
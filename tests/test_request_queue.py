@@ -0,0 +1,166 @@
+"""
+Test LLM admission control
+Verifies the in-flight cap, professor priority, load shedding, cancellation
+and that queued requests are admitted when a backend rejoins
+"""
+
+import asyncio
+import sys
+import os
+
+# Add backend directory to path to import backend modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from services.request_queue import AdmissionController, ServerBusy, PRIORITY_PROFESSOR, PRIORITY_STUDENT
+
+
+def test_priority_order():
+    # Plain pytest has no asyncio plugin configured; drive the loop directly
+    asyncio.run(_check_priority_order())
+
+
+async def _check_priority_order():
+    print("=" * 80)
+    print("ADMISSION PRIORITY TEST")
+    print("=" * 80)
+
+    admission = AdmissionController(max_in_flight_per_backend=1, max_wait_seconds=5, initial_service_seconds=0.1)
+    order = []
+    release = asyncio.Event()
+
+    async def generate(name, priority, hold=None):
+        async with admission.slot(priority):
+            order.append(name)
+            if hold is not None:
+                await hold.wait()
+
+    running = asyncio.create_task(generate("first", PRIORITY_STUDENT, release))
+    await asyncio.sleep(0.01)
+    assert admission.in_flight == 1
+
+    queued = [
+        asyncio.create_task(generate("student-1", PRIORITY_STUDENT)),
+        asyncio.create_task(generate("student-2", PRIORITY_STUDENT)),
+        asyncio.create_task(generate("professor", PRIORITY_PROFESSOR))
+    ]
+    await asyncio.sleep(0.01)
+    assert admission.get_stats()['queue_depth'] == {'professor': 1, 'student': 2}
+
+    release.set()
+    await asyncio.gather(running, *queued)
+
+    assert order == ["first", "professor", "student-1", "student-2"], f"Unexpected order: {order}"
+    assert admission.in_flight == 0
+    print(f"[OK] Admission order: {order}")
+
+
+def test_shedding():
+    asyncio.run(_check_shedding())
+
+
+async def _check_shedding():
+    print("\n" + "=" * 80)
+    print("ADMISSION SHEDDING TEST")
+    print("=" * 80)
+
+    admission = AdmissionController(max_in_flight_per_backend=1, max_wait_seconds=1, initial_service_seconds=5)
+    release = asyncio.Event()
+
+    async def hold():
+        async with admission.slot():
+            await release.wait()
+
+    running = asyncio.create_task(hold())
+    await asyncio.sleep(0.01)
+
+    assert admission.estimate_wait() == 5
+    try:
+        admission.check(PRIORITY_STUDENT)
+        assert False, "Expected ServerBusy"
+    except ServerBusy as e:
+        assert e.estimated_wait == 5
+    assert admission.get_stats()['shed']['student'] == 1
+    print("[OK] Request shed when the estimated wait exceeds the deadline")
+
+    release.set()
+    await running
+    admission.check(PRIORITY_STUDENT)  # Free slot: no wait
+    print("[OK] Request admitted once a slot is free")
+
+
+def test_cancelled_waiter_releases_nothing():
+    asyncio.run(_check_cancellation())
+
+
+async def _check_cancellation():
+    print("\n" + "=" * 80)
+    print("ADMISSION CANCELLATION TEST")
+    print("=" * 80)
+
+    admission = AdmissionController(max_in_flight_per_backend=1, max_wait_seconds=5, initial_service_seconds=0.1)
+    release = asyncio.Event()
+
+    async def hold():
+        async with admission.slot():
+            await release.wait()
+
+    running = asyncio.create_task(hold())
+    await asyncio.sleep(0.01)
+    waiter = asyncio.create_task(hold())
+    await asyncio.sleep(0.01)
+
+    waiter.cancel()
+    release.set()
+    await running
+    await asyncio.sleep(0)
+
+    assert waiter.cancelled()
+    assert admission.in_flight == 0, f"Slot leaked: in_flight={admission.in_flight}"
+    print("[OK] Cancelled waiter did not keep a slot")
+
+
+def test_capacity_growth_admits_waiters():
+    asyncio.run(_check_capacity_growth())
+
+
+async def _check_capacity_growth():
+    print("\n" + "=" * 80)
+    print("ADMISSION CAPACITY GROWTH TEST")
+    print("=" * 80)
+
+    backends = [1]
+    admission = AdmissionController(
+        max_in_flight_per_backend=1,
+        backend_count=lambda: backends[0],
+        max_wait_seconds=5,
+        initial_service_seconds=0.1,
+        capacity_poll_seconds=0.02
+    )
+    release = asyncio.Event()
+
+    async def hold():
+        async with admission.slot():
+            await release.wait()
+
+    running = asyncio.create_task(hold())
+    await asyncio.sleep(0.01)
+    waiter = asyncio.create_task(hold())
+    await asyncio.sleep(0.05)
+    assert admission.in_flight == 1, "Second request must queue while one backend is busy"
+
+    backends[0] = 2  # A backend rejoined the pool
+    await asyncio.sleep(0.1)
+    assert admission.in_flight == 2, "Queued request should be admitted without a release"
+    print("[OK] Queued request admitted when capacity grew")
+
+    release.set()
+    await asyncio.gather(running, waiter)
+    assert admission.in_flight == 0
+
+
+if __name__ == "__main__":
+    test_priority_order()
+    test_shedding()
+    test_cancelled_waiter_releases_nothing()
+    test_capacity_growth_admits_waiters()
+    print("\n[SUCCESS] All admission control checks passed")
@@ -0,0 +1,127 @@
+"""
+Test single-flight request coalescing
+Verifies concurrent identical requests share one execution, errors reach
+every caller, and cancellation only stops the work once nobody waits
+"""
+
+import asyncio
+import sys
+import os
+
+# Add backend directory to path to import backend modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from services.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    # Plain pytest has no asyncio plugin configured; drive the loop directly
+    asyncio.run(_check_sharing())
+
+
+async def _check_sharing():
+    print("=" * 80)
+    print("SINGLE-FLIGHT SHARING TEST")
+    print("=" * 80)
+
+    flights = SingleFlight("test")
+    calls = []
+
+    async def answer(key):
+        calls.append(key)
+        await asyncio.sleep(0.05)
+        return f"answer for {key}"
+
+    results = await asyncio.gather(
+        flights.do("cpt", lambda: answer("cpt")),
+        flights.do("cpt", lambda: answer("cpt")),
+        flights.do("cpt", lambda: answer("cpt")),
+        flights.do("opt", lambda: answer("opt"))
+    )
+
+    assert calls.count("cpt") == 1 and calls.count("opt") == 1, f"Unexpected executions: {calls}"
+    assert [r for r, _ in results] == ["answer for cpt"] * 3 + ["answer for opt"]
+    assert [shared for _, shared in results] == [False, True, True, False]
+    print("[OK] 3 identical requests -> 1 execution")
+
+    # Finished flights are forgotten; a later call runs again
+    await flights.do("cpt", lambda: answer("cpt"))
+    assert calls.count("cpt") == 2
+
+    stats = flights.get_stats()
+    print(f"Stats: {stats}")
+    assert stats['executions'] == 3 and stats['coalesced'] == 2 and stats['in_flight'] == 0
+
+
+def test_errors_reach_every_caller():
+    asyncio.run(_check_errors())
+
+
+async def _check_errors():
+    print("\n" + "=" * 80)
+    print("SINGLE-FLIGHT ERROR TEST")
+    print("=" * 80)
+
+    flights = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("backend down")
+
+    results = await asyncio.gather(
+        flights.do("q", fail),
+        flights.do("q", fail),
+        return_exceptions=True
+    )
+
+    assert all(isinstance(r, ValueError) for r in results), f"Expected ValueError for both callers: {results}"
+    assert flights.get_stats()['executions'] == 1
+    print("[OK] Exception re-raised to both callers")
+
+
+def test_cancellation():
+    asyncio.run(_check_cancellation())
+
+
+async def _check_cancellation():
+    print("\n" + "=" * 80)
+    print("SINGLE-FLIGHT CANCELLATION TEST")
+    print("=" * 80)
+
+    flights = SingleFlight("test")
+    finished = []
+
+    async def slow():
+        await asyncio.sleep(0.1)
+        finished.append(True)
+        return "done"
+
+    # One of two callers goes away: the other still gets the result
+    first = asyncio.create_task(flights.do("q", slow))
+    second = asyncio.create_task(flights.do("q", slow))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    result, shared = await second
+    assert result == "done" and shared
+    assert first.cancelled()
+    print("[OK] Remaining caller got the result after another was cancelled")
+
+    # Every caller goes away: the execution is cancelled
+    only = asyncio.create_task(flights.do("q2", slow))
+    await asyncio.sleep(0.01)
+    only.cancel()
+    await asyncio.sleep(0.15)
+
+    assert len(finished) == 1, "Abandoned execution must not run to completion"
+    stats = flights.get_stats()
+    print(f"Stats: {stats}")
+    assert stats['abandoned'] == 1 and stats['in_flight'] == 0
+    print("[OK] Execution cancelled once nobody was waiting")
+
+
+if __name__ == "__main__":
+    test_concurrent_calls_share_one_execution()
+    test_errors_reach_every_caller()
+    test_cancellation()
+    print("\n[SUCCESS] All single-flight checks passed")